@@ -1,11 +1,19 @@
 import os
+import time
+import statistics
+import threading
 import requests
 import unicodedata
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
+from types import SimpleNamespace
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import case, func
 from backend import models
+from backend.odds_budget import OddsBudgetPlanner, parse_quota_headers, game_odds_ttl_hours
+from backend.upstreams import ODDS_API_BASE_URL
 from dotenv import load_dotenv
 
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), '../.env'))
@@ -32,6 +40,275 @@ def normalize_name(name):
     return n.lower().replace(".", "").replace("'", "").strip()
 
 
+# Suffixes ignorés pour le matching ("Jaren Jackson Jr." == "Jaren Jackson")
+NAME_SUFFIXES = {"jr", "sr", "ii", "iii", "iv"}
+
+# Durée de vie de l'index joueurs (les rosters créent des joueurs en cours de scan)
+PLAYER_INDEX_TTL_SECONDS = 3600
+
+
+def _name_tokens(name_norm):
+    tokens = name_norm.replace("-", " ").split()
+    return [t for t in tokens if t not in NAME_SUFFIXES]
+
+
+# Pseudo-bookmakers dérivés de l'ensemble des books à l'écriture des snapshots
+CONSENSUS_BOOKMAKER = "consensus"  # ligne consensus + cote juste (sans marge / no-vig)
+BEST_PRICE_BOOKMAKER = "best"  # ligne consensus + meilleure cote Over/Under disponible
+DERIVED_SOURCE = "derived"
+
+
+def extract_bookmaker_lines(bookie: dict, player_index, unmatched: dict | None = None) -> dict:
+    """
+    Regroupe les outcomes Over/Under d'un bookmaker par (player_id, market).
+
+    `unmatched` (optionnel) collecte {nom normalisé: nom brut} des outcomes sans joueur local.
+
+    Returns:
+        dict: {(player_id, market): {"line": float, "price_over": float|None, "price_under": float|None}}
+        Si un book propose plusieurs lignes pour un joueur, on garde la plus équilibrée.
+    """
+    pairs = {}
+    for market in bookie.get("markets", []):
+        m_type = market["key"].removeprefix("player_")
+        for outcome in market.get("outcomes", []):
+            line = outcome.get("point")
+            side = outcome.get("name")
+            if line is None or side not in ("Over", "Under"):
+                continue
+            matched_id = player_index.match(outcome.get("description"))
+            if not matched_id:
+                if unmatched is not None and outcome.get("description"):
+                    unmatched.setdefault(normalize_name(outcome["description"]), outcome["description"])
+                continue
+            pair = pairs.setdefault((matched_id, m_type, float(line)), {"price_over": None, "price_under": None})
+            pair["price_over" if side == "Over" else "price_under"] = outcome.get("price")
+
+    lines = {}
+    for (pid, m_type, line), pair in pairs.items():
+        cand = {"line": line, **pair}
+        current = lines.get((pid, m_type))
+        if current is None or _balance_key(cand) < _balance_key(current):
+            lines[(pid, m_type)] = cand
+    return lines
+
+
+def _price_key(line, over, under):
+    """Clé de comparaison (line, over, under) arrondie comme en BDD (DECIMAL(10,2))."""
+    return tuple(round(float(v), 2) if v is not None else None for v in (line, over, under))
+
+
+def _balance_key(entry):
+    """Tri : paires complètes d'abord, puis la plus proche de 50/50."""
+    over, under = entry.get("price_over"), entry.get("price_under")
+    if not over or not under:
+        return (1, 0.0)
+    return (0, abs(1 / over - 1 / under))
+
+
+def build_consensus_lines(book_lines: dict) -> dict:
+    """
+    Calcule par (player_id, market) la ligne consensus, la cote juste et la meilleure cote.
+
+    Args:
+        book_lines (dict): {bookmaker: {(player_id, market): {"line", "price_over", "price_under"}}}
+
+    Returns:
+        dict: {(player_id, market): {"line", "fair_over", "fair_under", "best_over", "best_under",
+                                     "best_over_book", "best_under_book", "books"}}
+    """
+    grouped = {}
+    for book, lines in book_lines.items():
+        for key, entry in lines.items():
+            grouped.setdefault(key, []).append((book, entry))
+
+    out = {}
+    for key, entries in grouped.items():
+        # Ligne consensus = la plus cotée par les books (égalité -> la plus proche de la vraie médiane,
+        # puis la plus basse : résultat indépendant de l'ordre des books)
+        counts = {}
+        for _, e in entries:
+            counts[e["line"]] = counts.get(e["line"], 0) + 1
+        median = statistics.median(e["line"] for _, e in entries)
+        line = max(counts, key=lambda l: (counts[l], -abs(l - median), -l))
+        at_line = [(b, e) for b, e in entries if e["line"] == line]
+
+        # Cote juste : moyenne des probabilités Over sans marge (1/o normalisé)
+        fair_probs = [(1 / e["price_over"]) / (1 / e["price_over"] + 1 / e["price_under"])
+                      for _, e in at_line if e.get("price_over") and e.get("price_under")]
+        fair_p = sum(fair_probs) / len(fair_probs) if fair_probs else None
+
+        overs = [(e["price_over"], b) for b, e in at_line if e.get("price_over")]
+        unders = [(e["price_under"], b) for b, e in at_line if e.get("price_under")]
+        best_over = max(overs) if overs else (None, None)
+        best_under = max(unders) if unders else (None, None)
+
+        out[key] = {
+            "line": line,
+            "fair_over": round(1 / fair_p, 3) if fair_p else None,
+            "fair_under": round(1 / (1 - fair_p), 3) if fair_p and fair_p < 1 else None,
+            "best_over": best_over[0],
+            "best_under": best_under[0],
+            "best_over_book": best_over[1],
+            "best_under_book": best_under[1],
+            "books": len(entries),
+        }
+    return out
+
+
+# Marchés joueurs demandés à The-Odds-API
+ODDS_MARKETS = "player_points,player_rebounds,player_assists"
+# Combos (même appel /odds ; la clé "player_" retirée donne le nom interne : points_rebounds_assists...).
+# Chaque marché compte dans le quota : activés seulement si ODDS_INCLUDE_COMBOS=1.
+ODDS_COMBO_MARKETS = "player_points_rebounds_assists,player_points_rebounds,player_points_assists,player_rebounds_assists"
+if os.getenv("ODDS_INCLUDE_COMBOS", "0") == "1":
+    ODDS_MARKETS = f"{ODDS_MARKETS},{ODDS_COMBO_MARKETS}"
+
+# Nombre max de requêtes /odds en parallèle (slate entier)
+ODDS_MAX_CONCURRENCY = int(os.getenv("ODDS_MAX_CONCURRENCY", "4"))
+
+# La liste des events change peu : on la garde quelques minutes (1 appel par slate)
+EVENTS_CACHE_SECONDS = 600
+
+# Cache négatif : un lookup raté (match introuvable, event sans cotes) n'est pas retenté avant ce délai
+NEGATIVE_CACHE_SECONDS = int(os.getenv("ODDS_NEGATIVE_CACHE_SECONDS", "1800"))
+
+
+def _delta_encode(values: list) -> list:
+    """[a, b, c] -> [a, b-a, c-b] (None conservé, arrondi au centime comme en BDD)."""
+    out, prev = [], None
+    for v in values:
+        if v is None or prev is None:
+            out.append(v)
+        else:
+            out.append(round(v - prev, 2))
+        if v is not None:
+            prev = v
+    return out
+
+
+def build_line_movement(rows, delta: bool = False) -> list:
+    """
+    Transforme des lignes triées par (player_id, market, bookmaker, fetched_at) en séries colonnes.
+
+    Returns:
+        list[dict]: [{"player_id", "market", "bookmaker", "t": [...], "line": [...], "over": [...], "under": [...]}]
+        t = timestamps epoch (s). Avec delta=True, t/line/over/under sont encodés en différences
+        (premier élément absolu).
+    """
+    series = []
+    current, key = None, None
+    for r in rows:
+        k = (r.player_id, r.market, r.bookmaker)
+        if k != key:
+            key = k
+            current = {"player_id": r.player_id, "market": r.market, "bookmaker": r.bookmaker,
+                       "t": [], "line": [], "over": [], "under": []}
+            series.append(current)
+        current["t"].append(int(r.fetched_at.replace(tzinfo=timezone.utc).timestamp()))  # fetched_at stocké en UTC naïf
+        current["line"].append(float(r.line) if r.line is not None else None)
+        current["over"].append(float(r.price_over) if r.price_over is not None else None)
+        current["under"].append(float(r.price_under) if r.price_under is not None else None)
+
+    if delta:
+        for sr in series:
+            sr["t"] = [int(v) for v in _delta_encode(sr["t"])]
+            for col in ("line", "over", "under"):
+                sr[col] = _delta_encode(sr[col])
+    return series
+
+
+class PlayerNameIndex:
+    """
+    Index des noms de joueurs pour matcher les outcomes The-Odds-API en O(1).
+
+    - exact : nom normalisé (full_name + table aliases) -> player_id
+    - tokens : token du nom -> {player_id} pour les noms partiels ("Luka", "L Doncic")
+    Un match partiel n'est accepté que s'il désigne UN seul joueur (pas de faux positifs).
+    """
+
+    def __init__(self, players, aliases=()):
+        self.exact = {}
+        self.tokens = {}
+        self.player_tokens = {}
+        self.misses = set()  # noms déjà non résolus : pas de re-calcul jusqu'au prochain rebuild
+        self.built_at = time.time()
+        self.fingerprint = None  # empreinte des tables player / aliases au moment du build
+
+        for pid, full_name in players:
+            self._add(pid, normalize_name(full_name))
+        for pid, alias_norm in aliases:
+            self._add(pid, alias_norm)
+
+    @classmethod
+    def from_db(cls, db: Session):
+        players = db.query(models.Player.id, models.Player.full_name).all()
+        aliases = []
+        for entity_id, alias, alias_norm in db.query(models.Alias.entity_id, models.Alias.alias,
+                                                      models.Alias.normalized_alias) \
+                .filter(models.Alias.entity_type == "player").all():
+            aliases.append((entity_id, alias_norm or normalize_name(alias)))
+        return cls(players, aliases)
+
+    def _add(self, pid, name_norm):
+        if not name_norm:
+            return
+        tokens = _name_tokens(name_norm)
+        # En cas d'homonymes, le nom exact devient ambigu : on ne garde aucun des deux
+        for key in {name_norm, " ".join(tokens)}:
+            if key in self.exact and self.exact[key] != pid:
+                self.exact[key] = None
+            else:
+                self.exact[key] = pid
+        self.player_tokens.setdefault(pid, set()).update(tokens)
+        for t in tokens:
+            self.tokens.setdefault(t, set()).add(pid)
+
+    def match(self, raw_name):
+        """Retourne le player_id correspondant au nom API, ou None si absent/ambigu."""
+        name_norm = normalize_name(raw_name)
+        if not name_norm or name_norm in self.misses:
+            return None
+        pid = self._match(name_norm)
+        if pid is None:
+            self.misses.add(name_norm)
+        return pid
+
+    def _match(self, name_norm):
+        if name_norm in self.exact:
+            return self.exact[name_norm]
+
+        tokens = _name_tokens(name_norm)
+        if not tokens:
+            return None
+        stripped = " ".join(tokens)
+        if stripped in self.exact:
+            return self.exact[stripped]
+
+        # Partiel : tokens complets (len > 1) -> intersection ; initiales ("l") -> préfixe
+        full = [t for t in tokens if len(t) > 1]
+        initials = [t for t in tokens if len(t) == 1]
+        if not full or sum(len(t) for t in tokens) <= 4:
+            return None
+
+        candidates = None
+        for t in full:
+            pids = self.tokens.get(t)
+            if not pids:
+                return None
+            candidates = set(pids) if candidates is None else candidates & pids
+            if not candidates:
+                return None
+
+        if initials:
+            candidates = {pid for pid in candidates
+                          if all(any(pt.startswith(i) for pt in self.player_tokens[pid]) for i in initials)}
+
+        if len(candidates) == 1:
+            return next(iter(candidates))
+        return None
+
+
 class BettingOddsProvider:
     def __init__(self):
         # DEBUG : On imprime ce qu'on trouve pour être sûr
@@ -52,52 +329,151 @@ class BettingOddsProvider:
             print(f"   ✅ Clé chargée : {masked} (1/{len(self.api_keys)})")
         else:
             self.api_keys = []
+            self.current_key_index = 0
             self.api_key = None
             print("   ❌ Variable 'THE_ODDS_API_KEY' vide ou inexistante dans le .env")
 
-        self.base_url = "https://api.the-odds-api.com/v4/sports/basketball_nba"
+        self.base_url = ODDS_API_BASE_URL
         self.quota_exceeded = False
+        self._player_index = None
+
+        # Session HTTP poolée (keep-alive) partagée par tous les appels, y compris en parallèle
+        self.max_concurrency = ODDS_MAX_CONCURRENCY
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(self.max_concurrency, 1))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._key_lock = threading.Lock()
+        self._events_lock = threading.Lock()
+        self._events_cache = None
+        # Cache négatif des lookups ratés : {clé: expiration (epoch)}
+        self._misses = {}
+        self._misses_lock = threading.Lock()
+
+        # Quota restant par clé (headers x-requests-*), alimenté à chaque réponse
+        self.key_budgets = {}
+        self._probed_keys = set()
+        self.planner = OddsBudgetPlanner(self, markets_count=len(ODDS_MARKETS.split(",")))
 
         if not self.api_key:
             print("🚨 ERREUR CRITIQUE : Clés THE_ODDS_API_KEY manquantes !")
 
-    def switch_to_next_key(self):
-        if self.current_key_index < len(self.api_keys) - 1:
-            self.current_key_index += 1
-            self.api_key = self.api_keys[self.current_key_index]
-            self.quota_exceeded = False
-            masked = self.api_key[:4] + "***"
-            print(f"🔄 Changement de clé API : {masked} ({self.current_key_index + 1}/{len(self.api_keys)})")
+    def remaining_key_budgets(self) -> dict:
+        """Copie cohérente {clé: quota} de la clé courante et des suivantes (lue sous le verrou de rotation)."""
+        with self._key_lock:
+            return {key: self.key_budgets.get(key) for key in self.api_keys[self.current_key_index:]}
+
+    def probe_key_budgets(self):
+        """
+        Renseigne le quota des clés encore jamais interrogées (process neuf : key_budgets vide).
+        /events ne consomme pas de quota mais renvoie les headers x-requests-* ; une tentative par clé.
+        """
+        with self._key_lock:
+            keys = [k for k in self.api_keys[self.current_key_index:]
+                    if self.key_budgets.get(k) is None and k not in self._probed_keys]
+            self._probed_keys.update(keys)
+        for key in keys:
+            try:
+                res = self.session.get(f"{self.base_url}/events", params={"apiKey": key}, timeout=5)
+            except requests.RequestException as e:
+                print(f"⚠️ Quota de la clé {key[:4]}*** inconnu : {e}")
+                continue
+            quota = parse_quota_headers(res.headers)
+            if quota:
+                with self._key_lock:
+                    self.key_budgets[key] = quota
+
+    def switch_to_next_key(self, failed_key: str | None = None):
+        """
+        Passe à la clé suivante. Thread-safe : si `failed_key` n'est plus la clé courante,
+        une autre requête en vol a déjà fait la rotation et on ne saute pas de clé.
+        """
+        with self._key_lock:
+            if failed_key is not None and failed_key != self.api_key:
+                return not self.quota_exceeded
+            if self.current_key_index < len(self.api_keys) - 1:
+                self.current_key_index += 1
+                self.api_key = self.api_keys[self.current_key_index]
+                self.quota_exceeded = False
+                masked = self.api_key[:4] + "***"
+                print(f"🔄 Changement de clé API : {masked} ({self.current_key_index + 1}/{len(self.api_keys)})")
+                return True
+            else:
+                print("🚨 Toutes les clés API épuisées !")
+                self.quota_exceeded = True
+                return False
+
+    def _api_get(self, path: str, params: dict, timeout: int = 8):
+        """
+        GET sur The-Odds-API via la session poolée (keep-alive), avec rotation de clé sur 401/429.
+        Retourne la réponse, ou None si aucune clé n'est utilisable.
+        """
+        for _ in range(len(self.api_keys) + 1):
+            with self._key_lock:
+                key = self.api_key
+                budget = self.key_budgets.get(key)
+            if self.quota_exceeded or not key:
+                return None
+            if budget and budget.get("remaining") is not None and budget["remaining"] <= 0:
+                # Clé vide d'après les headers : rotation sans gaspiller un appel en 429
+                if not self.switch_to_next_key(failed_key=key):
+                    return None
+                continue
+            res = self.session.get(f"{self.base_url}{path}", params={**params, "apiKey": key}, timeout=timeout)
+            quota = parse_quota_headers(res.headers)
+            if quota:
+                # Même verrou que la rotation : le planner et les autres workers lisent key_budgets
+                with self._key_lock:
+                    self.key_budgets[key] = quota
+            if res.status_code not in [401, 429]:
+                return res
+            print(f"🚨 ALERTE API : Quota dépassé ou clé invalide ({res.status_code}). Tentative de changement de clé.")
+            if not self.switch_to_next_key(failed_key=key):
+                return None
+        return None
+
+    def _is_cached_miss(self, key) -> bool:
+        with self._misses_lock:
+            expires = self._misses.get(key)
+            if expires is None:
+                return False
+            if expires < time.time():
+                del self._misses[key]
+                return False
             return True
-        else:
-            print("🚨 Toutes les clés API épuisées !")
-            return False
+
+    def _remember_miss(self, key):
+        with self._misses_lock:
+            self._misses[key] = time.time() + NEGATIVE_CACHE_SECONDS
+
+    def _get_events(self):
+        """Liste des events NBA (cache EVENTS_CACHE_SECONDS, partagé entre threads)."""
+        with self._events_lock:
+            cached = self._events_cache
+            if cached and (time.time() - cached[0]) < EVENTS_CACHE_SECONDS:
+                return cached[1]
+
+            res = self._api_get("/events", {"regions": "us", "markets": "h2h"}, timeout=5)
+            if res is None:
+                return None
+            if res.status_code != 200:
+                print(f"⚠️ Erreur HTTP API Odds : {res.status_code}")
+                return None
+            events = res.json()
+            self._events_cache = (time.time(), events)
+            return events
 
     def get_event_id(self, home_team_code, away_team_code):
         """Récupère l'ID du match chez The-Odds-API en matching home/away (pas uniquement Bet365)."""
         if self.quota_exceeded or not self.api_key: return None
+        if self._is_cached_miss(("event", home_team_code, away_team_code)):
+            return None
 
         try:
-            params = {"apiKey": self.api_key, "regions": "us", "markets": "h2h"}
-            res = requests.get(f"{self.base_url}/events", params=params, timeout=5)
-
-            if res.status_code in [401, 429]:
-                print(f"🚨 ALERTE API : Quota dépassé ou clé invalide ({res.status_code}). Tentative de changement de clé.")
-                if self.switch_to_next_key():
-                    params["apiKey"] = self.api_key
-                    res = requests.get(f"{self.base_url}/events", params=params, timeout=5)
-                    if res.status_code in [401, 429]:
-                        self.quota_exceeded = True
-                        return None
-                else:
-                    self.quota_exceeded = True
-                    return None
-
-            if res.status_code != 200:
-                print(f"⚠️ Erreur HTTP API Odds : {res.status_code}")
+            events = self._get_events()
+            if events is None:
                 return None
 
-            events = res.json()
             home_name = TEAM_MAPPING.get(home_team_code)
             away_name = TEAM_MAPPING.get(away_team_code)
 
@@ -119,248 +495,434 @@ class BettingOddsProvider:
                 if (home_name and norm(home_name) in h) or (away_name and norm(away_name) in a):
                     return e["id"]
 
-            print(f"⚠️ Match non trouvé sur The-Odds-API pour : {home_team_code} vs {away_team_code}")
+            print(f"⚠️ Match non trouvé sur The-Odds-API pour : {home_team_code} vs {away_team_code} "
+                  f"(pas de nouvel essai avant {NEGATIVE_CACHE_SECONDS // 60} min)")
+            self._remember_miss(("event", home_team_code, away_team_code))
             return None
 
         except Exception as e:
             print(f"❌ Exception API Events: {e}")
         return None
 
-    def _select_bookmaker(self, bookmakers: list):
-        """Choisit le bookmaker le plus pertinent (Bet365/FanDuel/DK sinon premier avec markets)."""
-        if not bookmakers:
-            return None
-        preferred = ["bet365", "fanduel", "draftkings"]
-        for key in preferred:
-            for b in bookmakers:
-                if key in b.get("key", "").lower() and b.get("markets"):
-                    return b
-        for b in bookmakers:
-            if b.get("markets"):
-                return b
-        return bookmakers[0]
-
-    def update_odds_for_game(self, db: Session, nba_game_id: str, home_code: str, away_code: str):
+    def fetch_event_odds(self, event_id: str):
         """
-        Met à jour les cotes en BDD si elles sont vieilles ou absentes.
+        Télécharge les cotes joueurs d'un event (payload JSON) ou None.
+        Un event sans bookmakers (ou inconnu) est mis en cache négatif : pas de quota dépensé à nouveau.
         """
-        # 1. Check BDD (Cache 4h)
-        recent = datetime.now() - timedelta(hours=4)
-        existing = db.query(models.BettingOdds).filter(
-            models.BettingOdds.game_id == nba_game_id,
-            models.BettingOdds.updated_at > recent
-        ).first()
-
-        if existing:
-            # print(f"   💾 Cotes trouvées en cache BDD pour {home_code}.")
-            return True
-
-        if self.quota_exceeded or not self.api_key:
-            return False
-
-        # 2. Appel API (Seulement si pas de cache)
-        event_id = self.get_event_id(home_code, away_code)
-        if not event_id: return False
-
-        print(f"   📡 Téléchargement des cotes pour {home_code} vs {away_code}...")
-
+        if self._is_cached_miss(("odds", event_id)):
+            return None
         try:
-            params = {
-                "apiKey": self.api_key,
-                "regions": "us",  # ou 'eu'
-                "markets": "player_points,player_rebounds,player_assists",
-                "oddsFormat": "decimal"
-            }
-            res = requests.get(f"{self.base_url}/events/{event_id}/odds", params=params, timeout=8)
-
-            if res.status_code in [401, 429]:
-                print(f"🚨 ALERTE API : Quota dépassé ou clé invalide ({res.status_code}) lors de la récupération des cotes. Tentative de changement de clé.")
-                if self.switch_to_next_key():
-                    params["apiKey"] = self.api_key
-                    res = requests.get(f"{self.base_url}/events/{event_id}/odds", params=params, timeout=8)
-                    if res.status_code not in [401, 429]:
-                        print("   ✅ Nouvelle clé fonctionnelle pour les cotes.")
-                    else:
-                        print("   ❌ Nouvelle clé aussi épuisée pour les cotes.")
-                        return False
-                else:
-                    return False
-
+            params = {"regions": "us", "markets": ODDS_MARKETS, "oddsFormat": "decimal"}
+            res = self._api_get(f"/events/{event_id}/odds", params, timeout=8)
+            if res is None:
+                return None
+            if res.status_code == 404:
+                self._remember_miss(("odds", event_id))
+                return None
             if res.status_code != 200:
-                return False
-
+                return None
             data = res.json()
-            bookmakers = data.get("bookmakers", [])
-            if not bookmakers:
-                print("   ⚠️ Aucune cote bookmaker disponible pour ce match.")
-                return False
+            if not data.get("bookmakers"):
+                self._remember_miss(("odds", event_id))
+                return None
+            return data
+        except Exception as e:
+            print(f"   ❌ Exception API Odds ({event_id}): {e}")
+            return None
 
-            bookie = self._select_bookmaker(bookmakers)
-            if not bookie:
-                return False
-            print(f"   ✅ Source des cotes : {bookie['title']}")
-
-            # Suppression anciens records pour ce match
-            db.query(models.BettingOdds).filter(models.BettingOdds.game_id == nba_game_id).delete()
-
-            new_odds = []
-            # On précharge tous les joueurs pour éviter les requêtes SQL en boucle
-            players_cache = {p.id: normalize_name(p.full_name) for p in db.query(models.Player).all()}
-
-            for market in bookie.get("markets", []):
-                m_type = market["key"].replace("player_", "")
-                for outcome in market["outcomes"]:
-                    api_name_norm = normalize_name(outcome["description"])
-                    line = outcome["point"]
-
-                    # Correspondance ID Joueur (Matching Fuzzy)
-                    matched_id = None
-                    for pid, pname in players_cache.items():
-                        if pname == api_name_norm:  # Match exact nom normalisé
-                            matched_id = pid
-                            break
-                        # Fallback partiel (ex: "Luka" dans "Luka Doncic")
-                        if len(api_name_norm) > 4 and api_name_norm in pname:
-                            matched_id = pid
-                            break
-
-                    if not matched_id: continue
-
-                    if outcome["name"] == "Over":
-                        obj = models.BettingOdds(
-                            game_id=nba_game_id,
-                            player_id=matched_id,
-                            market=m_type,
-                            line=line,
-                            odds_over=outcome["price"],
-                            odds_under=1.85,  # Valeur par défaut
-                            bookmaker=bookie["title"]
-                        )
-                        new_odds.append(obj)
-
-            if new_odds:
-                db.add_all(new_odds)
-                db.commit()
-                print(f"   📥 {len(new_odds)} lignes sauvegardées en BDD.")
-                return True
-            else:
-                print("   ⚠️ Cotes récupérées mais aucun joueur matché avec la BDD locale.")
-                return False
+    def fetch_event_odds_bulk(self, event_ids: list, max_concurrency: int | None = None):
+        """
+        Télécharge les cotes de plusieurs events en parallèle (borné par max_concurrency).
 
-        except Exception as e:
-            print(f"   ❌ Crash update_odds: {e}")
-            return False
+        Returns:
+            dict: {event_id: payload} (seulement les events récupérés avec succès)
+        """
+        event_ids = list(dict.fromkeys(e for e in event_ids if e))
+        if not event_ids:
+            return {}
+        workers = max(1, min(max_concurrency or self.max_concurrency, len(event_ids)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            payloads = list(pool.map(self.fetch_event_odds, event_ids))
+        return {eid: data for eid, data in zip(event_ids, payloads) if data}
+
+    @staticmethod
+    def _player_index_fingerprint(db: Session):
+        """Empreinte des tables player / aliases (nb, dernier id, dernière modif d'alias)."""
+        players = db.query(func.count(models.Player.id), func.max(models.Player.id)).one()
+        aliases = db.query(func.count(models.Alias.id), func.max(models.Alias.id), func.max(models.Alias.updated_at)) \
+            .filter(models.Alias.entity_type == "player").one()
+        return tuple(players) + tuple(aliases)
+
+    def get_player_index(self, db: Session, refresh: bool = False):
+        """
+        Index joueurs construit une fois par provider, reconstruit dès qu'un joueur ou un alias est écrit
+        (empreinte des tables, y compris par les scripts data-pipeline) ou après PLAYER_INDEX_TTL_SECONDS.
+        Le rebuild repart avec un cache de noms ratés (misses) vide.
+        """
+        idx = self._player_index
+        fingerprint = self._player_index_fingerprint(db)
+        if refresh or idx is None or idx.fingerprint != fingerprint \
+                or (time.time() - idx.built_at) > PLAYER_INDEX_TTL_SECONDS:
+            idx = PlayerNameIndex.from_db(db)
+            idx.fingerprint = fingerprint
+            self._player_index = idx
+        return idx
+
+    def update_odds_for_game(self, db: Session, nba_game_id: str, home_code: str, away_code: str,
+                             ttl_hours: float | None = None, game=None):
+        """
+        Met à jour les cotes en BDD si elles sont vieilles ou absentes.
+
+        Chemin d'écriture unique : un seul appel API, écrit dans odds_snapshots (historique)
+        et latest_odds (ligne courante). betting_odds n'est plus alimentée.
+        TTL adaptatif selon l'heure du match si ttl_hours n'est pas forcé.
+        """
+        return self.fetch_odds_snapshots_for_game(db, nba_game_id, home_code, away_code, ttl_hours=ttl_hours,
+                                                  game=game)
 
     def get_odds_from_db(self, db: Session, player_id: int, game_id: str, market: str):
-        """Lecture rapide depuis la BDD."""
-        return db.query(models.BettingOdds).filter(
-            models.BettingOdds.player_id == player_id,
-            models.BettingOdds.game_id == game_id,
-            models.BettingOdds.market == market
-        ).first()
-
-    def _has_fresh_snapshots(self, db: Session, game_id: str, ttl_hours: int = 4):
-        cutoff = datetime.utcnow() - timedelta(hours=ttl_hours)
-        return db.query(models.OddsSnapshot).filter(
-            models.OddsSnapshot.game_id == game_id,
-            models.OddsSnapshot.fetched_at >= cutoff
-        ).first() is not None
+        """
+        Lecture rapide de la ligne courante au format legacy betting_odds
+        (line / odds_over / odds_under / bookmaker / updated_at), servie depuis latest_odds.
+        """
+        snap = self.get_snapshot_odds(db, game_id, player_id, market)
+        if not snap:
+            return None
+        return SimpleNamespace(
+            game_id=game_id,
+            player_id=player_id,
+            market=market,
+            line=snap["line"],
+            odds_over=snap["price_over"],
+            odds_under=snap["price_under"],
+            bookmaker=snap["bookmaker"],
+            updated_at=snap["fetched_at"],
+        )
+
+    def ttl_for_game(self, db: Session, game_id: str, game=None) -> float | None:
+        """TTL adaptatif (heures) d'un match, None si le match a commencé (cotes figées)."""
+        if game is None:
+            game = db.query(models.GameSchedule).filter(models.GameSchedule.nba_game_id == game_id).first()
+        return game_odds_ttl_hours(game)
+
+    def _has_fresh_snapshots(self, db: Session, game_id: str, ttl_hours: float | None = 4):
+        """Lookup par clé primaire dans odds_freshness (last_fetched_at = dernière confirmation des lignes)."""
+        row = db.get(models.OddsFreshness, game_id)
+        return self._is_fresh(row, ttl_hours)
+
+    @staticmethod
+    def _is_fresh(row, ttl_hours: float | None, now: datetime | None = None) -> bool:
+        if row is None:
+            return False
+        if ttl_hours is None:
+            return True  # match commencé : n'importe quelle ligne existante est définitive
+        now = now or datetime.utcnow()
+        return row.last_fetched_at >= now - timedelta(hours=ttl_hours)
+
+    def get_freshness(self, db: Session, game_ids: list) -> dict:
+        """{game_id: OddsFreshness} pour un slate (une seule requête)."""
+        if not game_ids:
+            return {}
+        rows = db.query(models.OddsFreshness).filter(models.OddsFreshness.game_id.in_(game_ids)).all()
+        return {r.game_id: r for r in rows}
 
     def fetch_odds_snapshots_for_game(self, db: Session, game_id: str, home_code: str, away_code: str,
-                                      ingestion_run_id: int | None = None, ttl_hours: int = 4):
-        """Récupère les cotes et les écrit dans odds_snapshots avec TTL et optional ingestion_run_id."""
+                                      ingestion_run_id: int | None = None, ttl_hours: float | None = None,
+                                      stats: dict | None = None, game=None):
+        """
+        Récupère les cotes et les écrit dans odds_snapshots avec TTL et optional ingestion_run_id.
+
+        ttl_hours=None : TTL adaptatif calculé depuis GameSchedule (voir odds_budget.odds_ttl_hours).
+        """
         if self.quota_exceeded or not self.api_key:
             return False
 
+        if ttl_hours is None:
+            ttl_hours = self.ttl_for_game(db, game_id, game)
+            if ttl_hours is None:
+                # Match commencé : on garde les lignes d'avant-match, jamais de refetch
+                return self._has_fresh_snapshots(db, game_id, ttl_hours=None)
+
         if self._has_fresh_snapshots(db, game_id, ttl_hours=ttl_hours):
             return True  # cache valide
 
+        # Même contrôle de budget que la version slate : quota épuisé -> lignes existantes en repli
+        if self.planner.available_requests() == 0:
+            print(f"   💸 Quota limité : cotes de {game_id} non rafraîchies.")
+            return self._has_fresh_snapshots(db, game_id, ttl_hours=None)
+
         event_id = self.get_event_id(home_code, away_code)
         if not event_id:
             return False
 
-        try:
-            params = {
-                "apiKey": self.api_key,
-                "regions": "us",
-                "markets": "player_points,player_rebounds,player_assists",
-                "oddsFormat": "decimal"
-            }
-            res = requests.get(f"{self.base_url}/events/{event_id}/odds", params=params, timeout=8)
+        data = self.fetch_event_odds(event_id)
+        if not data:
+            return False
+        return self.store_odds_snapshots(db, game_id, data, ingestion_run_id=ingestion_run_id, ttl_hours=ttl_hours,
+                                         stats=stats)
 
-            if res.status_code in [401, 429]:
-                if self.switch_to_next_key():
-                    params["apiKey"] = self.api_key
-                    res = requests.get(f"{self.base_url}/events/{event_id}/odds", params=params, timeout=8)
-                else:
-                    return False
+    def fetch_odds_snapshots_for_games(self, db: Session, games: list, ingestion_run_id: int | None = None,
+                                       ttl_hours: float | None = None, stats: dict | None = None):
+        """
+        Version slate : résout les events (1 appel /events), télécharge les cotes en parallèle
+        puis écrit les snapshots séquentiellement (la Session SQLAlchemy n'est pas thread-safe).
 
-            if res.status_code != 200:
-                return False
+        ttl_hours=None : TTL adaptatif par match (heure du tip-off).
 
-            data = res.json()
+        Returns:
+            tuple: (success, skipped)
+        """
+        if self.quota_exceeded or not self.api_key:
+            return 0, len(games)
+
+        success = 0
+        stale_games = []
+        ttl_by_game = {}
+        freshness = self.get_freshness(db, [g.nba_game_id for g in games])
+        now = datetime.utcnow()
+        for g in games:
+            ttl = ttl_hours if ttl_hours is not None else game_odds_ttl_hours(g, now=now)
+            if self._is_fresh(freshness.get(g.nba_game_id), ttl, now=now):
+                success += 1
+            elif ttl is not None:
+                stale_games.append(g)
+                ttl_by_game[g.nba_game_id] = ttl
+            # ttl None sans ligne : match commencé, rien à récupérer
+
+        # Budget : on dépense le quota restant sur les matchs les plus urgents d'abord
+        last_fetch = {gid: f.last_fetched_at for gid, f in freshness.items()}
+        planned, deferred = self.planner.plan(stale_games, last_fetch, now=now)
+        if deferred:
+            print(f"   💸 Quota limité : {len(deferred)} match(s) reporté(s), {len(planned)} prioritaire(s).")
+
+        to_fetch = {}
+        for g in planned:
+            event_id = self.get_event_id(g.home_team_code, g.away_team_code)
+            if event_id:
+                to_fetch[g.nba_game_id] = event_id
+
+        payloads = self.fetch_event_odds_bulk(list(to_fetch.values()))
+        for game_id, event_id in to_fetch.items():
+            data = payloads.get(event_id)
+            if data and self.store_odds_snapshots(db, game_id, data, ingestion_run_id=ingestion_run_id,
+                                                  ttl_hours=ttl_by_game[game_id], stats=stats):
+                success += 1
+
+        return success, len(games) - success
+
+    def store_odds_snapshots(self, db: Session, game_id: str, data: dict, ingestion_run_id: int | None = None,
+                             ttl_hours: float = 4, stats: dict | None = None):
+        """
+        Écrit un payload /events/{id}/odds dans odds_snapshots (tous books + lignes dérivées).
+
+        Delta-only : seules les lignes dont (line, over, under) a bougé depuis la dernière valeur
+        stockée pour (player, market, bookmaker) sont insérées (insert bulk). Les lignes inchangées
+        voient simplement leur TTL prolongé. `stats` (optionnel) cumule inserted/unchanged.
+        """
+        try:
             bookmakers = data.get("bookmakers", [])
             if not bookmakers:
                 return False
 
-            bookie = self._select_bookmaker(bookmakers)
-            if not bookie:
-                return False
-
-            players_cache = {p.id: normalize_name(p.full_name) for p in db.query(models.Player).all()}
-            ttl_expire_at = datetime.utcnow() + timedelta(hours=ttl_hours)
+            # Tous les bookmakers du payload (même coût de quota qu'un seul)
+            player_index = self.get_player_index(db)
+            book_lines = {}
+            unmatched = {}
+            for bookie in bookmakers:
+                lines = extract_bookmaker_lines(bookie, player_index, unmatched=unmatched)
+                if lines:
+                    book_lines[bookie.get("title") or bookie.get("key")] = lines
+
+            fetched_at = datetime.utcnow()
+            ttl_expire_at = fetched_at + timedelta(hours=ttl_hours)
             rows = []
 
-            for market in bookie.get("markets", []):
-                m_type = market["key"].replace("player_", "")
-                for outcome in market.get("outcomes", []):
-                    api_name_norm = normalize_name(outcome.get("description"))
-                    line = outcome.get("point")
-
-                    matched_id = None
-                    for pid, pname in players_cache.items():
-                        if pname == api_name_norm:
-                            matched_id = pid; break
-                        if len(api_name_norm) > 4 and api_name_norm in pname:
-                            matched_id = pid; break
-
-                    if not matched_id:
-                        continue
-
-                    if outcome.get("name") == "Over":
-                        rows.append(models.OddsSnapshot(
-                            ingestion_run_id=ingestion_run_id,
-                            game_id=game_id,
-                            player_id=matched_id,
-                            market=m_type,
-                            line=line,
-                            price_over=outcome.get("price"),
-                            price_under=None,
-                            bookmaker=bookie.get("title"),
-                            fetched_at=datetime.utcnow(),
-                            ttl_expire_at=ttl_expire_at
-                        ))
+            def snapshot(player_id, m_type, bookmaker, line, over, under, source="the-odds-api"):
+                return {
+                    "ingestion_run_id": ingestion_run_id,
+                    "game_id": game_id,
+                    "player_id": player_id,
+                    "market": m_type,
+                    "line": line,
+                    "price_over": over,
+                    "price_under": under,
+                    "bookmaker": bookmaker,
+                    "source": source,
+                    "fetched_at": fetched_at,
+                    "ttl_expire_at": ttl_expire_at,
+                    "created_at": fetched_at,
+                    "updated_at": fetched_at,
+                }
+
+            for book, lines in book_lines.items():
+                for (pid, m_type), entry in lines.items():
+                    rows.append(snapshot(pid, m_type, book, entry["line"], entry["price_over"], entry["price_under"]))
+
+            # Lignes dérivées pré-calculées : le scan lit directement la meilleure cote
+            for (pid, m_type), c in build_consensus_lines(book_lines).items():
+                rows.append(snapshot(pid, m_type, CONSENSUS_BOOKMAKER, c["line"], c["fair_over"], c["fair_under"],
+                                     source=DERIVED_SOURCE))
+                rows.append(snapshot(pid, m_type, BEST_PRICE_BOOKMAKER, c["line"], c["best_over"], c["best_under"],
+                                     source=DERIVED_SOURCE))
+
+            # Noms non matchés : comptés même si aucune ligne n'est exploitable (liste d'aliases à créer)
+            self._record_unmatched_names(db, game_id, unmatched, fetched_at)
 
             if not rows:
+                db.commit()
                 return False
 
-            db.add_all(rows)
+            latest = self._latest_values(db, game_id)
+            changed, unchanged = [], 0
+            for r in rows:
+                prev = latest.get((r["player_id"], r["market"], r["bookmaker"]))
+                if prev and prev[1:] == _price_key(r["line"], r["price_over"], r["price_under"]):
+                    unchanged += 1
+                    r["fetched_at"] = prev[0]  # la ligne n'a pas bougé depuis ce fetch
+                else:
+                    changed.append(r)
+
+            # Historique (delta) + ligne courante + registre de fraîcheur dans la même transaction
+            self._bulk_insert_snapshots(db, changed)
+            self._upsert_latest_odds(db, rows)
+            self._upsert_freshness(db, {
+                "game_id": game_id,
+                "last_fetched_at": fetched_at,
+                "ttl_expire_at": ttl_expire_at,
+                "bookmaker_count": len(book_lines),
+                "row_count": len(rows),
+                "updated_at": fetched_at,
+            })
             db.commit()
+
+            if stats is not None:
+                stats["inserted"] = stats.get("inserted", 0) + len(changed)
+                stats["unchanged"] = stats.get("unchanged", 0) + unchanged
             return True
         except Exception as e:
-            print(f"   ❌ Crash fetch_odds_snapshots_for_game: {e}")
+            print(f"   ❌ Crash store_odds_snapshots: {e}")
             db.rollback()
             return False
 
+    def _latest_values(self, db: Session, game_id: str) -> dict:
+        """{(player_id, market, bookmaker): (fetched_at, line, over, under)} depuis latest_odds (préfixe de PK)."""
+        rows = db.query(
+            models.LatestOdds.player_id, models.LatestOdds.market, models.LatestOdds.bookmaker,
+            models.LatestOdds.fetched_at, models.LatestOdds.line, models.LatestOdds.price_over,
+            models.LatestOdds.price_under
+        ).filter(models.LatestOdds.game_id == game_id).all()
+        return {(r.player_id, r.market, r.bookmaker): (r.fetched_at,) + _price_key(r.line, r.price_over, r.price_under)
+                for r in rows}
+
+    @staticmethod
+    def _dialect_insert(db: Session):
+        """insert() supportant ON CONFLICT pour le dialecte courant (PostgreSQL / SQLite)."""
+        if db.connection().dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        return insert
+
+    def _upsert_latest_odds(self, db: Session, rows: list):
+        """INSERT ... ON CONFLICT DO UPDATE sur latest_odds (PostgreSQL / SQLite)."""
+        if not rows:
+            return
+        insert = self._dialect_insert(db)
+
+        cols = ["game_id", "player_id", "market", "bookmaker", "line", "price_over", "price_under", "source",
+                "ingestion_run_id", "fetched_at", "ttl_expire_at", "updated_at"]
+        stmt = insert(models.LatestOdds.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["game_id", "player_id", "market", "bookmaker"],
+            set_={c: getattr(stmt.excluded, c) for c in cols[4:]}
+        )
+        db.execute(stmt, [{c: r[c] for c in cols} for r in rows])
+
+    def _upsert_freshness(self, db: Session, row: dict):
+        """Upsert de la ligne odds_freshness du match."""
+        insert = self._dialect_insert(db)
+        stmt = insert(models.OddsFreshness.__table__).values(**row)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["game_id"],
+            set_={c: getattr(stmt.excluded, c) for c in row if c != "game_id"}
+        )
+        db.execute(stmt)
+
+    def _record_unmatched_names(self, db: Session, game_id: str, unmatched: dict, seen_at: datetime):
+        """Upsert des noms d'outcomes sans joueur local (+1 par payload où ils apparaissent)."""
+        if not unmatched:
+            return
+        insert = self._dialect_insert(db)
+        table = models.UnmatchedOddsName.__table__
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["normalized_name"],
+            set_={
+                "raw_name": stmt.excluded.raw_name,
+                "seen_count": table.c.seen_count + 1,
+                "last_seen_at": stmt.excluded.last_seen_at,
+                "last_game_id": stmt.excluded.last_game_id,
+            }
+        )
+        db.execute(stmt, [{
+            "normalized_name": name_norm,
+            "raw_name": raw[:150],
+            "source": "the-odds-api",
+            "seen_count": 1,
+            "first_seen_at": seen_at,
+            "last_seen_at": seen_at,
+            "last_game_id": game_id,
+        } for name_norm, raw in unmatched.items()])
+
+    def get_unmatched_names(self, db: Session, limit: int = 100) -> list:
+        """Noms The-Odds-API toujours non résolus (les plus fréquents d'abord) : aliases à ajouter."""
+        index = self.get_player_index(db)
+        rows = db.query(models.UnmatchedOddsName) \
+            .order_by(models.UnmatchedOddsName.seen_count.desc()).limit(limit).all()
+        return [{
+            "raw_name": r.raw_name,
+            "normalized_name": r.normalized_name,
+            "seen_count": r.seen_count,
+            "first_seen_at": r.first_seen_at,
+            "last_seen_at": r.last_seen_at,
+            "last_game_id": r.last_game_id,
+        } for r in rows if index.match(r.raw_name) is None]  # alias ajouté depuis : plus listé
+
+    def _bulk_insert_snapshots(self, db: Session, rows: list):
+        """Insert bulk dans odds_snapshots (execute_values sous psycopg2, executemany sinon)."""
+        if not rows:
+            return
+        conn = db.connection()
+        if conn.dialect.name == "postgresql" and conn.dialect.driver == "psycopg2":
+            from psycopg2.extras import execute_values
+            cols = list(rows[0].keys())
+            cur = conn.connection.cursor()
+            execute_values(
+                cur,
+                f"INSERT INTO odds_snapshots ({', '.join(cols)}) VALUES %s",
+                [tuple(r[c] for c in cols) for r in rows],
+                page_size=1000
+            )
+        else:
+            db.execute(models.OddsSnapshot.__table__.insert(), rows)
+
     def get_snapshot_odds(self, db: Session, game_id: str, player_id: int, market: str):
-        """Retourne la dernière cote snapshot non expirée pour un joueur/marché/match."""
+        """Retourne la ligne courante non expirée (meilleure cote en priorité) pour un joueur/marché/match."""
         now = datetime.utcnow()
-        row = db.query(models.OddsSnapshot).filter(
-            models.OddsSnapshot.game_id == game_id,
-            models.OddsSnapshot.player_id == player_id,
-            models.OddsSnapshot.market == market,
-            (models.OddsSnapshot.ttl_expire_at.is_(None)) | (models.OddsSnapshot.ttl_expire_at > now)
-        ).order_by(models.OddsSnapshot.fetched_at.desc()).first()
+
+        def valid(r):
+            return r is not None and (r.ttl_expire_at is None or r.ttl_expire_at > now)
+
+        row = db.get(models.LatestOdds, (game_id, player_id, market, BEST_PRICE_BOOKMAKER))
+        if not valid(row):
+            # Pas de ligne "best" : le book confirmé le plus récemment
+            row = db.query(models.LatestOdds).filter(
+                models.LatestOdds.game_id == game_id,
+                models.LatestOdds.player_id == player_id,
+                models.LatestOdds.market == market,
+                models.LatestOdds.bookmaker != CONSENSUS_BOOKMAKER,
+                (models.LatestOdds.ttl_expire_at.is_(None)) | (models.LatestOdds.ttl_expire_at > now)
+            ).order_by(models.LatestOdds.updated_at.desc()).first()
         if not row:
             return None
         return {
@@ -370,3 +932,63 @@ class BettingOddsProvider:
             "bookmaker": row.bookmaker,
             "fetched_at": row.fetched_at,
         }
+
+    def get_game_lines(self, db: Session, game_id: str) -> dict:
+        """
+        Toutes les lignes courantes d'un match en UNE requête sur latest_odds.
+
+        Priorité par (player_id, market) : ligne "best" > autre book confirmé le plus récemment.
+
+        Returns:
+            dict: {(player_id, market): {"line", "price_over", "price_under", "bookmaker", "fetched_at"}}
+        """
+        now = datetime.utcnow()
+        lo = models.LatestOdds
+        rows = db.query(
+            lo.player_id, lo.market, lo.line, lo.price_over, lo.price_under, lo.bookmaker, lo.updated_at
+        ).filter(
+            lo.game_id == game_id,
+            lo.bookmaker != CONSENSUS_BOOKMAKER,
+            (lo.ttl_expire_at.is_(None)) | (lo.ttl_expire_at > now)
+        ).order_by(
+            case((lo.bookmaker == BEST_PRICE_BOOKMAKER, 0), else_=1),
+            lo.updated_at.desc()
+        ).all()
+
+        lines = {}
+        for r in rows:
+            key = (r.player_id, r.market)
+            if key in lines:
+                continue  # déjà servi par une source prioritaire
+            lines[key] = {
+                "line": float(r.line) if r.line is not None else None,
+                "price_over": float(r.price_over) if r.price_over is not None else None,
+                "price_under": float(r.price_under) if r.price_under is not None else None,
+                "bookmaker": r.bookmaker,
+                "fetched_at": r.updated_at,
+            }
+        return lines
+
+    def get_line_movement(self, db: Session, game_id: str, since: datetime | None = None, player_id: int | None = None,
+                          market: str | None = None, bookmaker: str | None = None, delta: bool = False):
+        """Historique des lignes d'un match en une requête ordonnée (colonnes seulement, pas d'objets ORM)."""
+        s = models.OddsSnapshot
+        q = db.query(s.player_id, s.market, s.bookmaker, s.fetched_at, s.line, s.price_over, s.price_under) \
+            .filter(s.game_id == game_id, s.player_id.isnot(None))
+        if since is not None:
+            q = q.filter(s.fetched_at >= since)
+        if player_id is not None:
+            q = q.filter(s.player_id == player_id)
+        if market:
+            q = q.filter(s.market == market)
+        if bookmaker:
+            q = q.filter(s.bookmaker == bookmaker)
+        rows = q.order_by(s.player_id, s.market, s.bookmaker, s.fetched_at).all()
+        return build_line_movement(rows, delta=delta)
+
+    def get_games_with_current_odds(self, db: Session):
+        """IDs des matchs ayant des lignes courantes non expirées (registre odds_freshness, 1 ligne par match)."""
+        now = datetime.utcnow()
+        f = models.OddsFreshness
+        return [g[0] for g in db.query(f.game_id)
+                .filter((f.ttl_expire_at.is_(None)) | (f.ttl_expire_at > now)).all()]
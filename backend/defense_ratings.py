@@ -83,22 +83,79 @@ KEY_DEFENDERS_IMPACT = {
     "Lu Dort": {"pos": "G", "impact": 0.07},
 }
 
+# 📊 RATINGS CALCULÉS (data-pipeline/compute_team_ratings.py)
+# La version active de team_rating_versions remplace les constantes ci-dessus (qui restent le fallback
+# pour les équipes / postes absents). Le dict entier est remplacé d'un coup : pas de lecture à moitié à jour.
+# DvP par stat : seuls les points ont des constantes ; sans version calculée, les autres stats restent neutres.
+DVP_STATS = ("points", "rebounds", "assists", "three_points_made")
+_ACTIVE_RATINGS = {"version": None, "dvp": {"points": DVP_RATINGS}, "pace": PACE_RATINGS}
+
+
+def refresh_team_ratings(engine):
+    """
+    Recharge la version active des ratings si elle a changé (1 requête légère sinon).
+    Appelée au démarrage de l'API et au début de chaque scan.
+
+    Returns:
+        int | None: version en mémoire
+    """
+    global _ACTIVE_RATINGS
+    from sqlalchemy import text
+
+    try:
+        with engine.connect() as conn:
+            version = conn.execute(text(
+                "SELECT MAX(id) FROM team_rating_versions WHERE status = 'active'")).scalar()
+            if version is None or version == _ACTIVE_RATINGS["version"]:
+                return _ACTIVE_RATINGS["version"]
+            dvp_rows = conn.execute(text(
+                "SELECT team_code, position, factor, rebounds_factor, assists_factor, three_points_made_factor "
+                "FROM dvp_ratings WHERE version_id = :v"), {"v": version}).all()
+            pace_rows = conn.execute(text(
+                "SELECT team_code, factor FROM pace_ratings WHERE version_id = :v"), {"v": version}).all()
+    except Exception as e:
+        print(f"⚠️ Ratings DvP / Pace calculés indisponibles (constantes utilisées) : {e}")
+        return _ACTIVE_RATINGS["version"]
+
+    dvp = {stat: {} for stat in DVP_STATS}
+    dvp["points"] = {team: dict(row) for team, row in DVP_RATINGS.items()}
+    for team, pos, *factors in dvp_rows:
+        for stat, factor in zip(DVP_STATS, factors):
+            if factor is not None:
+                dvp[stat].setdefault(team, {})[pos] = round(float(factor), 3)
+    pace = dict(PACE_RATINGS)
+    for team, factor in pace_rows:
+        pace[team] = round(float(factor), 3)
+
+    _ACTIVE_RATINGS = {"version": version, "dvp": dvp, "pace": pace}
+    print(f"🛡️ Ratings DvP / Pace v{version} chargés ({len(dvp_rows)} DvP, {len(pace_rows)} Pace).")
+    return version
+
+
+def get_ratings_version():
+    return _ACTIVE_RATINGS["version"]
+
+
+def get_dvp_row(team_code, stat="points"):
+    return _ACTIVE_RATINGS["dvp"].get(stat, {}).get(team_code)
+
+
 def get_pace_factor(team_code):
-    return PACE_RATINGS.get(team_code, 1.0)
+    return _ACTIVE_RATINGS["pace"].get(team_code, 1.0)
 
-def get_defensive_factor(opponent_code, player_position="G"):
+def get_defensive_factor(opponent_code, player_position="G", stat="points"):
     """
-    Récupère le facteur défensif spécifique au poste du joueur.
+    Récupère le facteur défensif spécifique au poste du joueur, pour une stat donnée.
     
     Args:
         opponent_code (str): Code de l'équipe adverse (ex: "MIN")
         player_position (str): Position du joueur (ex: "PG", "C", "G-F")
+        stat (str): "points", "rebounds", "assists" ou "three_points_made" (pas de DvP -> 1.0)
     """
-    if opponent_code not in DVP_RATINGS:
+    team_dvp = get_dvp_row(opponent_code, stat)
+    if team_dvp is None:
         return 1.0
     
-    team_dvp = DVP_RATINGS[opponent_code]
-    
     # Normalisation de la position (G-F -> G, etc.)
     # On prend la position primaire
     pos = player_position.split('-')[0] if player_position else "G"
@@ -148,7 +205,7 @@ def adjust_defense_for_injuries(opponent_code, opponent_roster):
 
 def get_defense_analysis(opponent_code, missing_defenders=None, pace_factor=1.0, player_pos="G"):
     """Génère l'analyse textuelle DvP."""
-    if opponent_code not in DVP_RATINGS:
+    if get_dvp_row(opponent_code) is None:
         return {"rating": "Inconnue", "description": "N/A", "opportunity": False}
 
     # On récupère le rating spécifique au poste
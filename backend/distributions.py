@@ -0,0 +1,271 @@
+"""
+Module de lois de probabilité ajustées par joueur.
+
+📐 Choix de la loi par (joueur, stat)
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+- points (et toute stat à moyenne élevée) : Loi Normale (avec correction de continuité).
+- petites stats (3PM, steals, blocks, rebonds/passes faibles) : loi de comptage
+  Poisson si variance ≈ moyenne, Binomiale Négative si sur-dispersion (variance > moyenne).
+
+Les paramètres sont ajustés en UNE passe sur player_game_stats pour tout un groupe de joueurs,
+puis gardés en cache avec l'empreinte des stats du joueur (nb de matchs, dernier id) :
+tant qu'aucun match n'est ajouté, une proba Over/Under ou palier = lookup + un calcul CDF vectorisé.
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+from scipy.special import gammainc, betainc, ndtr
+from sqlalchemy import text, bindparam
+
+from backend.probability import milestone_grid
+
+# Familles de lois
+NORMAL = 0
+POISSON = 1
+NEG_BINOMIAL = 2
+FAMILY_NAMES = {NORMAL: "normal", POISSON: "poisson", NEG_BINOMIAL: "neg_binomial"}
+
+DISTRIBUTION_STATS = ["points", "rebounds", "assists", "three_points_made", "steals", "blocks"]
+
+# Marchés combinés = somme des colonnes par match (la covariance entre stats est donc incluse)
+COMBO_STATS = {
+    "points_rebounds_assists": ("points", "rebounds", "assists"),
+    "points_rebounds": ("points", "rebounds"),
+    "points_assists": ("points", "assists"),
+    "rebounds_assists": ("rebounds", "assists"),
+}
+
+
+def combo_columns_sql() -> str:
+    """Colonnes SQL des combos (ex: "points + rebounds AS points_rebounds")."""
+    return ", ".join(f"{' + '.join(parts)} AS {combo}" for combo, parts in COMBO_STATS.items())
+
+
+def add_combo_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Ajoute les colonnes combos (somme par match) à un DataFrame de logs, en place."""
+    for combo, parts in COMBO_STATS.items():
+        if all(c in df.columns for c in parts):
+            df[combo] = df[list(parts)].sum(axis=1, min_count=len(parts))
+    return df
+
+# Fenêtre d'ajustement (mêmes 82 derniers matchs que compute_projection)
+DISTRIBUTION_WINDOW_GAMES = 82
+
+# Moins de matchs : pas assez d'historique pour estimer la dispersion -> Normale à 25% (comme probability.py)
+MIN_GAMES_FOR_FIT = 5
+
+# Au-delà de cette moyenne, la Normale est assez précise pour une stat de comptage
+NORMAL_MIN_MEAN = 10.0
+
+# Tolérance de sur-dispersion avant de passer en Binomiale Négative (variance > moyenne * (1 + tol))
+POISSON_DISPERSION_TOL = 0.10
+
+
+def _choose_family(stat: str, mean: np.ndarray, var: np.ndarray, n: np.ndarray) -> np.ndarray:
+    family = np.full(mean.shape, NORMAL, dtype=np.int8)
+    if stat == "points":
+        return family
+    count_like = (mean < NORMAL_MIN_MEAN) & (n >= MIN_GAMES_FOR_FIT)
+    overdispersed = var > mean * (1 + POISSON_DISPERSION_TOL)
+    family[count_like & ~overdispersed] = POISSON
+    family[count_like & overdispersed & (mean > 0)] = NEG_BINOMIAL
+    return family
+
+
+def fit_distributions(df: pd.DataFrame, stats: list | None = None) -> dict:
+    """
+    Ajuste une loi par (player_id, stat) sur un DataFrame de logs (une ligne par match).
+
+    Returns:
+        dict: {(player_id, stat): {"family", "mean", "std", "r", "p", "n_games"}}
+    """
+    stats = [s for s in (stats or DISTRIBUTION_STATS + list(COMBO_STATS)) if s in df.columns]
+    if df.empty or not stats:
+        return {}
+
+    grouped = df.groupby("player_id")[stats]
+    means = grouped.mean()
+    variances = grouped.var(ddof=1).fillna(0.0)
+    counts = grouped.count()
+
+    fits = {}
+    for stat in stats:
+        mean = means[stat].to_numpy(dtype=float)
+        var = variances[stat].to_numpy(dtype=float)
+        n = counts[stat].to_numpy()
+        family = _choose_family(stat, mean, var, n)
+
+        std = np.sqrt(var)
+        std = np.where((n < MIN_GAMES_FOR_FIT) | (std == 0), mean * 0.25, std)
+        # Binomiale Négative (méthode des moments) : r = m² / (v - m), p = r / (r + m)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r = np.where(family == NEG_BINOMIAL, mean ** 2 / (var - mean), np.nan)
+            p = np.where(family == NEG_BINOMIAL, r / (r + mean), np.nan)
+
+        for i, pid in enumerate(means.index.tolist()):
+            fits[(int(pid), stat)] = {
+                "family": int(family[i]),
+                "mean": float(mean[i]),
+                "std": float(std[i]),
+                "r": float(r[i]),
+                "p": float(p[i]),
+                "n_games": int(n[i]),
+            }
+    return fits
+
+
+def _prob_at_least(family, mean, std, r, k):
+    """
+    P(X >= k) vectorisé (k entier, broadcast (n,) x (n, K)).
+
+    Poisson : P(X >= k) = P(k, λ) (gamma incomplète régularisée).
+    Binomiale Négative : P(X >= k) = I_{1-p}(k, r) (bêta incomplète régularisée).
+    Normale : 1 - Φ((k - 0.5 - μ) / σ) (correction de continuité).
+    """
+    k = np.asarray(k, dtype=float)
+    if k.ndim == 2:
+        family, mean, std, r = (a[:, None] for a in (family, mean, std, r))
+    p_nb = r / (r + mean)
+
+    k_pos = np.maximum(k, 1.0)  # k <= 0 : certitude, traité après
+    with np.errstate(divide="ignore", invalid="ignore"):
+        normal = np.where(std > 0, 1 - ndtr((k - 0.5 - mean) / np.where(std > 0, std, 1.0)),
+                          np.where(k - 0.5 < mean, 1.0, 0.0))
+        poisson = gammainc(k_pos, np.maximum(mean, 0.0))
+        negbin = betainc(k_pos, np.where(r > 0, r, 1.0), 1 - p_nb)
+
+    out = np.where(family == POISSON, poisson, np.where(family == NEG_BINOMIAL, negbin, normal))
+    return np.where((family != NORMAL) & (k <= 0), 1.0, out)
+
+
+def _param_arrays(fits: list, means=None):
+    """Empile les paramètres ; `means` (optionnel) recentre chaque loi sur la projection du jour."""
+    family = np.array([f["family"] for f in fits], dtype=np.int8)
+    base_mean = np.array([f["mean"] for f in fits], dtype=float)
+    std = np.array([f["std"] for f in fits], dtype=float)
+    r = np.array([f["r"] for f in fits], dtype=float)
+    mean = base_mean if means is None else np.asarray(means, dtype=float)
+    # Binomiale Négative : on garde r (dispersion), p se recalcule depuis la nouvelle moyenne
+    return family, mean, std, np.where(np.isnan(r), 0.0, r)
+
+
+def probability_over(fits: list, lines, means=None) -> np.ndarray:
+    """
+    P(Over) pour N lignes : Over gagne si X >= floor(line) + 1 (une ligne entière en push ne compte pas).
+
+    Args:
+        fits: paramètres par ligne (résultats de fit_distributions / DistributionCache)
+        lines: lignes bookmaker (n,)
+        means: projections à utiliser comme moyenne (optionnel, sinon moyenne historique)
+    """
+    if not fits:
+        return np.empty(0)
+    family, mean, std, r = _param_arrays(fits, means)
+    k = np.floor(np.asarray(lines, dtype=float)) + 1
+    return _prob_at_least(family, mean, std, r, k)
+
+
+def probability_under(fits: list, lines, means=None) -> np.ndarray:
+    """P(Under) : X <= ceil(line) - 1."""
+    if not fits:
+        return np.empty(0)
+    family, mean, std, r = _param_arrays(fits, means)
+    k = np.ceil(np.asarray(lines, dtype=float))
+    return 1 - _prob_at_least(family, mean, std, r, k)
+
+
+def milestone_probabilities(fits: list, projections, stat_types) -> dict:
+    """
+    Paliers P(X >= palier) depuis les lois ajustées recentrées sur la projection du jour,
+    sur la même grille que probability.milestone_grid.
+
+    Returns:
+        dict: même format que probability.calculate_milestone_probabilities_batch
+              (à convertir avec milestone_batch_to_lists)
+    """
+    means = np.asarray(projections, dtype=float)
+    values, valid = milestone_grid(means, stat_types)
+    family, mean, std, r = _param_arrays(fits, means)
+    probs = np.round(_prob_at_least(family, mean, std, r, values.astype(float)) * 100, 1)
+    return {
+        "values": values,
+        "valid": valid,
+        "probabilities": np.where(valid, probs, np.nan),
+    }
+
+
+class DistributionCache:
+    """
+    Cache des lois ajustées par joueur, invalidé par empreinte (nb de matchs, dernier id de player_game_stats).
+
+    get() : 1 requête d'empreintes pour le groupe, puis 1 seule requête + 1 ajustement groupé
+    pour les joueurs nouveaux ou dont les stats ont changé.
+    """
+
+    def __init__(self, window_games: int = DISTRIBUTION_WINDOW_GAMES):
+        self.window_games = window_games
+        self._fits = {}  # player_id -> (fingerprint, {stat: params})
+        self._lock = threading.Lock()
+
+    def _fingerprints(self, engine, player_ids: list) -> dict:
+        q = text("""
+            SELECT player_id, COUNT(*) AS n, MAX(id) AS last_id
+            FROM player_game_stats
+            WHERE player_id IN :ids
+            GROUP BY player_id
+        """).bindparams(bindparam("ids", expanding=True))
+        with engine.connect() as conn:
+            rows = conn.execute(q, {"ids": player_ids}).all()
+        return {int(pid): (int(n), int(last_id)) for pid, n, last_id in rows}
+
+    def _load_logs(self, engine, player_ids: list) -> pd.DataFrame:
+        q = text(f"""
+            SELECT player_id, {', '.join(DISTRIBUTION_STATS)}, {combo_columns_sql()}
+            FROM (
+                SELECT pgs.*, ROW_NUMBER() OVER (PARTITION BY player_id ORDER BY game_id DESC) AS rn
+                FROM player_game_stats pgs
+                WHERE player_id IN :ids
+            ) recent
+            WHERE rn <= :window
+        """).bindparams(bindparam("ids", expanding=True))
+        with engine.connect() as conn:
+            return pd.read_sql(q, conn, params={"ids": player_ids, "window": self.window_games})
+
+    def get(self, engine, player_ids: list) -> dict:
+        """{(player_id, stat): params} pour tous les joueurs ayant des stats."""
+        player_ids = sorted({int(p) for p in player_ids if p})
+        if not player_ids:
+            return {}
+        fingerprints = self._fingerprints(engine, player_ids)
+
+        with self._lock:
+            stale = [pid for pid, fp in fingerprints.items()
+                     if pid not in self._fits or self._fits[pid][0] != fp]
+        if stale:
+            fitted = fit_distributions(self._load_logs(engine, stale))
+            by_player = {}
+            for (pid, stat), params in fitted.items():
+                by_player.setdefault(pid, {})[stat] = params
+            with self._lock:
+                for pid in stale:
+                    self._fits[pid] = (fingerprints[pid], by_player.get(pid, {}))
+
+        out = {}
+        with self._lock:
+            for pid in fingerprints:
+                for stat, params in self._fits.get(pid, (None, {}))[1].items():
+                    out[(pid, stat)] = params
+        return out
+
+    def invalidate(self, player_id: int | None = None):
+        with self._lock:
+            if player_id is None:
+                self._fits.clear()
+            else:
+                self._fits.pop(player_id, None)
+
+
+# Cache partagé par le process (API + scans)
+distribution_cache = DistributionCache()
@@ -0,0 +1,285 @@
+"""
+Module de contexte de match (calculé une fois par match, partagé par tous les joueurs).
+
+🏟️ Contexte de match
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+Tous les joueurs d'un match partagent le même rythme, la même défense adverse et les mêmes absents.
+Plutôt que de re-scanner les deux effectifs pour chaque joueur, on construit une seule fois :
+
+- le produit des Pace des deux équipes,
+- les facteurs DvP (par poste et par stat) de l'adversaire de chaque équipe, mémorisés au premier accès,
+- les défenseurs clés absents (adjust_defense_for_injuries) de chaque équipe,
+- les boosts offensifs des absents (splits on/off, sinon forfait stars) de chaque équipe,
+- un index des joueurs OUT par équipe.
+
+Chaque projection applique ensuite le contexte par simples lookups.
+"""
+
+import copy
+import threading
+from datetime import datetime
+
+from cachetools import TTLCache
+
+from backend.distributions import COMBO_STATS
+from backend.defense_ratings import get_pace_factor, get_defensive_factor, adjust_defense_for_injuries, \
+    get_defense_analysis, get_ratings_version
+from backend.offensive_impact import get_offensive_boost, get_team_offensive_boosts
+
+NEUTRAL_FACTORS = {"defensive_factor": 1.0, "offensive_boost": 1.0, "pace_factor": 1.0}
+
+
+def _status(player: dict) -> str:
+    return str(player.get("injury_status") or "HEALTHY").upper()
+
+
+class GameContext:
+    """
+    Contexte d'un match : facteurs communs à tous les joueurs, indexés par équipe.
+
+    Args:
+        home_code / away_code: codes équipes (ex: "BOS")
+        home_roster / away_roster: effectifs avec "full_name", "id", "position", "injury_status"
+    """
+
+    def __init__(self, home_code: str, away_code: str, home_roster: list | None = None,
+                 away_roster: list | None = None, game_id: str | None = None):
+        self.game_id = game_id
+        self.affected_teams = set()
+        self.home_code = home_code
+        self.away_code = away_code
+        self.rosters = {home_code: list(home_roster or []), away_code: list(away_roster or [])}
+        self.opponents = {home_code: away_code, away_code: home_code}
+
+        # Version DvP / Pace active à la construction (None = constantes), exposée dans summary()
+        self.ratings_version = get_ratings_version()
+        # Pace du match = produit des rythmes des deux équipes
+        self.pace_factor = get_pace_factor(home_code) * get_pace_factor(away_code)
+
+        self.team_by_player = {}
+        self.out_players = {}     # équipe -> [joueurs OUT] (index utilisé par les boosts)
+        self.out_ids = {}         # équipe -> {player_id OUT}
+        self.out_names = {}       # équipe -> {nom OUT}
+        self.defense_adjustments = {}
+        self.missing_defenders = {}
+        self.offensive_boosts = {}
+        self.missing_stars = {}
+        for team in self.rosters:
+            self._index_team(team)
+        for team in self.rosters:
+            self._team_factors(team)
+
+        self._dvp_factors = {}
+
+    def _index_team(self, team: str):
+        roster = self.rosters[team]
+        # Statut normalisé : adjust_defense_for_injuries / get_offensive_boost comparent à "OUT"
+        out = [{**p, "injury_status": "OUT"} for p in roster if _status(p) == "OUT"]
+        self.out_players[team] = out
+        self.out_ids[team] = {p["id"] for p in out if p.get("id")}
+        self.out_names[team] = {p.get("full_name") for p in out}
+        for p in roster:
+            if p.get("id"):
+                self.team_by_player[p["id"]] = team
+            if p.get("full_name"):
+                self.team_by_player.setdefault(p["full_name"], team)
+
+    def _team_factors(self, team: str):
+        """Facteurs d'équipe dépendant des absents : défense adverse affaiblie + boosts d'usage."""
+        opp = self.opponents[team]
+        # Défenseurs absents de l'ADVERSAIRE -> bonus pour l'équipe qui attaque
+        adj, missing = adjust_defense_for_injuries(opp, self.out_players[opp])
+        self.defense_adjustments[team] = adj
+        self.missing_defenders[team] = missing
+        # Absents de l'équipe -> boost d'usage des coéquipiers (lookup indexé par équipe + ensemble des OUT)
+        team_boosts = get_team_offensive_boosts(team, self.out_players[team])
+        self.offensive_boosts[team] = team_boosts
+        self.missing_stars[team] = team_boosts["missing"]
+
+    def with_statuses(self, overrides: dict) -> "GameContext":
+        """
+        Copie du contexte avec des statuts blessure forcés (what-if), sans relire les effectifs.
+
+        Seules les équipes dont l'ensemble des OUT change sont ré-indexées ; leurs boosts et la défense
+        vue par leur adversaire sont recalculés, le reste est partagé avec le contexte d'origine.
+
+        Args:
+            overrides: {player_id ou nom complet: statut} (ex: {"Joel Embiid": "OUT"})
+
+        Returns:
+            GameContext: avec .affected_teams (équipes dont les absents ont changé)
+        """
+        ctx = copy.copy(self)
+        ctx.rosters = dict(self.rosters)
+        ctx.affected_teams = set()
+        for team, roster in self.rosters.items():
+            changed = False
+            new_roster = []
+            for p in roster:
+                status = overrides.get(p.get("id"), overrides.get(p.get("full_name")))
+                if status is not None and str(status).upper() != _status(p):
+                    p = {**p, "injury_status": str(status).upper(), "play_probability": None}
+                    changed = True
+                new_roster.append(p)
+            if changed:
+                ctx.rosters[team] = new_roster
+                ctx.affected_teams.add(team)
+
+        if not ctx.affected_teams:
+            return ctx
+        for attr in ("out_players", "out_ids", "out_names", "defense_adjustments", "missing_defenders",
+                     "offensive_boosts", "missing_stars", "team_by_player"):
+            setattr(ctx, attr, dict(getattr(self, attr)))
+        for team in ctx.affected_teams:
+            ctx._index_team(team)
+        # Équipe touchée : ses boosts ; son adversaire : la défense qu'il affronte
+        for team in ctx.affected_teams | {self.opponents[t] for t in ctx.affected_teams}:
+            ctx._team_factors(team)
+        return ctx
+
+    def player(self, player_id: int) -> dict | None:
+        team = self.team_by_player.get(player_id)
+        return next((p for p in self.rosters.get(team, []) if p.get("id") == player_id), None)
+
+    @classmethod
+    def for_game(cls, game, home_roster: list, away_roster: list) -> "GameContext":
+        return cls(game.home_team_code, game.away_team_code, home_roster, away_roster, game_id=game.nba_game_id)
+
+    def team_of(self, player_id: int | None = None, player_name: str | None = None) -> str | None:
+        return self.team_by_player.get(player_id) or self.team_by_player.get(player_name)
+
+    def opponent_of(self, team_code: str) -> str | None:
+        return self.opponents.get(team_code)
+
+    def is_home(self, team_code: str) -> bool:
+        return team_code == self.home_code
+
+    def _dvp_factor(self, team_code: str, position: str | None, stat: str) -> float:
+        # DvP de la stat elle-même (rebonds concédés au poste, etc.), pas celui des points
+        key = (team_code, position, stat)
+        if key not in self._dvp_factors:
+            self._dvp_factors[key] = get_defensive_factor(self.opponents.get(team_code), position or "G", stat)
+        return self._dvp_factors[key]
+
+    def _offensive_boost(self, team_code: str, player_name: str | None, player_id: int | None = None) -> dict:
+        # Une star absente ne se booste pas elle-même : seul cas où l'on recalcule (index des OUT uniquement)
+        if player_name in self.out_names.get(team_code, ()):
+            return get_offensive_boost(player_name, team_code, self.out_players[team_code])[0]
+        team_boosts = self.offensive_boosts.get(team_code)
+        if not team_boosts:
+            return {}
+        return team_boosts["by_player"].get(player_id) or team_boosts["default"]
+
+    def factors(self, stat: str, team_code: str, position: str | None = None, player_name: str | None = None,
+                player_id: int | None = None) -> dict:
+        """Facteurs multiplicatifs d'une stat pour un joueur de `team_code` (lookups uniquement)."""
+        if team_code not in self.opponents:
+            return dict(NEUTRAL_FACTORS)
+        defense = self._dvp_factor(team_code, position, stat) * (1 + self.defense_adjustments[team_code].get(stat, 0.0))
+        return {
+            "defensive_factor": round(defense, 3),
+            "offensive_boost": round(self._offensive_boost(team_code, player_name, player_id).get(stat, 1.0), 3),
+            "pace_factor": round(self.pace_factor, 3),
+        }
+
+    def apply(self, base_projections: dict, team_code: str, position: str | None = None,
+              player_name: str | None = None, player_id: int | None = None) -> dict:
+        """
+        Applique le contexte aux projections de base d'un joueur.
+
+        Args:
+            base_projections: {stat: {"base_projection", "consistency", ...}} (sans contexte)
+
+        Returns:
+            dict: {stat: {... , "projection", "defensive_factor", "offensive_boost", "pace_factor"}}
+        """
+        out, raw = {}, {}
+        for stat, base in base_projections.items():
+            if stat in COMBO_STATS:
+                continue
+            f = self.factors(stat, team_code, position, player_name, player_id)
+            raw[stat] = (base["base_projection"], f)
+            proj = base["base_projection"] * f["defensive_factor"] * f["offensive_boost"] * f["pace_factor"]
+            out[stat] = {**base, **f, "projection": round(proj, 1)}
+
+        # Combos : somme des composantes contextualisées (facteurs affichés = moyenne pondérée par la base)
+        for combo, parts in COMBO_STATS.items():
+            if combo not in base_projections or not all(c in raw for c in parts):
+                continue
+            weight = sum(raw[c][0] for c in parts) or 1.0
+            f = {k: round(sum(raw[c][0] * raw[c][1][k] for c in parts) / weight, 3) for k in NEUTRAL_FACTORS}
+            proj = sum(raw[c][0] * raw[c][1]["defensive_factor"] * raw[c][1]["offensive_boost"]
+                       * raw[c][1]["pace_factor"] for c in parts)
+            out[combo] = {**base_projections[combo], **f, "projection": round(proj, 1)}
+        return out
+
+    def is_out(self, player_id: int | None) -> bool:
+        return player_id in self.out_ids.get(self.team_by_player.get(player_id), ())
+
+    def apply_scenario(self, base_projections: dict, team_code: str, player: dict) -> dict:
+        """apply() pour un scénario : un joueur OUT dans ce contexte ne joue pas (projection 0)."""
+        out = self.apply(base_projections, team_code, player.get("position"), player.get("full_name"), player.get("id"))
+        if self.is_out(player.get("id")):
+            out = {stat: {**d, "projection": 0.0} for stat, d in out.items()}
+        return out
+
+    def defense_analysis(self, team_code: str, position: str | None = None) -> dict:
+        opp = self.opponents.get(team_code)
+        return get_defense_analysis(opp, self.missing_defenders.get(team_code), self.pace_factor,
+                                    (position or "G").split('-')[0])
+
+    def summary(self) -> dict:
+        return {
+            "game_id": self.game_id,
+            "ratings_version": self.ratings_version,
+            "pace_factor": round(self.pace_factor, 3),
+            "out_players": {t: sorted(n for n in names if n) for t, names in self.out_names.items()},
+            "missing_defenders": self.missing_defenders,
+            "missing_stars": self.missing_stars,
+        }
+
+
+# --- BASES PAR MATCH (what-if) ---
+# Le scan garde, par match, le contexte et les projections de base (avant contexte) de chaque joueur :
+# un what-if ne fait que ré-appliquer un contexte modifié, sans stats ni appel upstream.
+GAME_BASE_TTL_SECONDS = 6 * 3600
+_game_bases = TTLCache(maxsize=64, ttl=GAME_BASE_TTL_SECONDS)
+_game_bases_lock = threading.Lock()
+
+
+def base_of(projections: dict) -> dict:
+    """Projections contextualisées -> projections de base réutilisables (retire les facteurs du match)."""
+    return {stat: {"base_projection": d["base_projection"], "consistency": d.get("consistency")}
+            for stat, d in projections.items() if d.get("base_projection") is not None}
+
+
+def what_if_projections(base_ctx: GameContext, ctx: GameContext, bases: dict, markets) -> list:
+    """
+    Projections avant / après un scénario (ctx = base_ctx.with_statuses(...)) pour chaque joueur et marché.
+
+    Returns:
+        list[tuple]: (joueur avant, joueur après, stat, projection avant, projection après)
+    """
+    rows = []
+    for player_id, base in bases.items():
+        p_before, p_after = base_ctx.player(player_id), ctx.player(player_id)
+        team = ctx.team_of(player_id)
+        if p_before is None or p_after is None or team is None:
+            continue
+        proj_before = base_ctx.apply_scenario(base, team, p_before)
+        proj_after = ctx.apply_scenario(base, team, p_after)
+        for stat in markets:
+            if stat in proj_after:
+                rows.append((p_before, p_after, stat, proj_before[stat], proj_after[stat]))
+    return rows
+
+
+def store_game_base(context: GameContext, bases: dict):
+    """bases: {player_id: {stat: {"base_projection", "consistency"}}}"""
+    with _game_bases_lock:
+        _game_bases[context.game_id] = {"context": context, "bases": bases, "stored_at": datetime.now()}
+
+
+def get_game_base(game_id: str) -> dict | None:
+    with _game_bases_lock:
+        return _game_bases.get(game_id)
@@ -7,10 +7,18 @@ from backend.database import get_db, engine
 from backend import models
 from backend.ai_agent import ask_jimmy
 from backend.defense_ratings import get_defensive_factor, get_defense_analysis, adjust_defense_for_injuries, \
-    get_pace_factor, NBA_TEAM_CODES
-from backend.offensive_impact import get_offensive_boost
+    get_pace_factor, refresh_team_ratings, get_ratings_version, NBA_TEAM_CODES
+from backend.offensive_impact import get_offensive_boost, refresh_on_off_splits
+from backend.game_context import GameContext, NEUTRAL_FACTORS, base_of, store_game_base, get_game_base, \
+    what_if_projections
 from backend.betting_service import BettingOddsProvider
-from backend.probability import calculate_milestone_probabilities, cumulative_distribution_function
+from backend.probability import calculate_milestone_probabilities, cumulative_distribution_function, \
+    calculate_milestone_probabilities_batch, milestone_batch_to_lists
+from backend.distributions import distribution_cache, probability_over, probability_under, FAMILY_NAMES, \
+    COMBO_STATS, add_combo_columns, milestone_probabilities
+from backend.simulation import simulate_game, get_cached_simulation
+from backend.parlay import ParlayPricer, optimize_parlays, max_feasible_legs
+from backend.upstreams import ESPN_SITE_BASE_URL, configure_nba_api
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
@@ -28,11 +36,13 @@ PLAYER_STATS_TTL_HOURS = 1
 
 
 # ✅ Import du module de Scoring
-from backend.scoring import calculate_confidence_score
+from backend.scoring import calculate_confidence_scores, injury_factors, TopKPicks
 
 # ✅ Import NBA API
 from nba_api.stats.endpoints import commonteamroster, playergamelog
 
+configure_nba_api()
+
 # ✅ Création des tables
 models.Base.metadata.create_all(bind=engine)
 
@@ -147,6 +157,8 @@ def run_migrations():
 
 
 run_migrations()
+refresh_team_ratings(engine)
+refresh_on_off_splits(engine)
 
 app = FastAPI(title="Jimmy.AI API", description="Moteur de prédiction NBA")
 
@@ -168,12 +180,25 @@ class Bet(BaseModel):
     game_id: str
     player_id: int
     bet_type: str
+    hit_probability: Optional[float] = None
+    consistency: Optional[float] = None
+
+
+class ParlayPricingRequest(BaseModel):
+    bets: List[Bet]
+    combos: Optional[List[List[int]]] = None  # indices dans bets ; défaut : un parlay avec tous les legs
 
 
 class ScanRequest(BaseModel):
     markets: Optional[list[str]] = None
 
 
+class WhatIfRequest(BaseModel):
+    nba_game_id: str
+    overrides: dict[str, str]  # {player_id ou nom complet: statut}, ex: {"Joel Embiid": "OUT"}
+    markets: Optional[list[str]] = None
+
+
 _LINEUPS_CACHE: dict[str, dict] = {}
 
 
@@ -206,7 +231,7 @@ def _fetch_roster_fallback_espn(team_code: str):
     tid = _get_espn_team_id(team_code)
     if not tid: return []
     try:
-        url = f"https://site.web.api.espn.com/apis/site/v2/sports/basketball/nba/teams/{tid}/roster"
+        url = f"{ESPN_SITE_BASE_URL}/teams/{tid}/roster"
         res = requests.get(url, timeout=5).json()
         players = []
         for grp in res.get('athletes', []):
@@ -328,16 +353,20 @@ def calculate_stat_projection(df, stat_column, player_name, team_code, opponent_
 
     return {
         "projection": round(final_proj, 1),
+        "base_projection": float(weighted_proj),
         "consistency": round(consistency, 2)
     }
 
 
-def compute_projection(player_id: int, games: int = 82, game_id: str = None, db: Session = Depends(get_db),
-                       odds_event_id: str = None):
-    player = db.query(models.Player).filter(models.Player.id == player_id).first()
-    if not player: return {}
+PROJECTION_STATS = ["points", "rebounds", "assists", "three_points_made"] + list(COMBO_STATS)
 
-    query = f"SELECT * FROM player_game_stats WHERE player_id = {player_id} ORDER BY game_id DESC LIMIT {games}"
+# Marchés évalués par le scan (combos PRA, P+R, P+A, R+A inclus : aucune requête supplémentaire)
+SCAN_MARKETS = ["points", "rebounds", "assists"] + list(COMBO_STATS)
+
+
+def _load_player_stats(player, games: int = 82) -> pd.DataFrame:
+    """Derniers matchs du joueur (re-fetch via populate_stats si aucune stat locale)."""
+    query = f"SELECT * FROM player_game_stats WHERE player_id = {player.id} ORDER BY game_id DESC LIMIT {games}"
     df = pd.read_sql(query, engine)
 
     # TTL pour éviter les re-fetch API si déjà rafraîchi récemment
@@ -361,7 +390,7 @@ def compute_projection(player_id: int, games: int = 82, game_id: str = None, db:
 
     if needs_refresh:
         if not player.nba_player_id or player.nba_player_id == 0:
-            return {}
+            return pd.DataFrame()
         try:
             sys_path_added = False
             import sys
@@ -374,31 +403,92 @@ def compute_projection(player_id: int, games: int = 82, game_id: str = None, db:
             sync_player_stats(player.nba_player_id, limit=games)
             df = pd.read_sql(query, engine)
         except Exception as e:
-            return {}
+            return pd.DataFrame()
+    return df
 
-    if df.empty: return {}
 
+def compute_base_projections(df: pd.DataFrame, player_name: str = None, odds_event_id: str = None) -> dict:
+    """
+    Projections sans contexte de match (forme récente + saison), réutilisables pour tout le match.
+    Les combos sont projetés sur la somme par match : la consistency inclut la covariance des stats.
+    """
+    df = add_combo_columns(df)
     projections = {}
-    stats_list = ["points", "rebounds", "assists", "three_points_made"]
-
-    game = db.query(models.GameSchedule).filter(models.GameSchedule.nba_game_id == game_id).first()
-    team_code = game.home_team_code if game else "N/A"
-
-    for stat in stats_list:
+    for stat in PROJECTION_STATS:
         if stat not in df.columns: continue
         season_avg = df[stat].mean()
-        def_factor = 1.0
-
-        proj = calculate_stat_projection(
-            df, stat, player.full_name, team_code, None, None,
-            season_avg, def_factor, 1.0, 1.0, event_id=odds_event_id
-        )
+        proj = calculate_stat_projection(df, stat, player_name, None, None, None, season_avg, event_id=odds_event_id)
         if proj: projections[stat] = proj
+    return projections
+
+
+def _attach_milestones(projections: dict, player_id: int | None = None, fits: dict | None = None) -> dict:
+    """
+    Paliers de toutes les stats du joueur (combos inclus) en un seul calcul vectorisé.
+    Stats avec loi ajustée (Poisson / Binomiale Négative / Normale) : loi recentrée sur la projection ;
+    sinon Normale (projection, consistency).
+    """
+    fits = fits or {}
+    stats = [s for s, d in projections.items() if d.get("projection") is not None]
+    fitted = [s for s in stats if (player_id, s) in fits and not pd.isna(projections[s]["projection"])]
+    others = [s for s in stats if s not in fitted]
+    if fitted:
+        batch = milestone_probabilities([fits[(player_id, s)] for s in fitted],
+                                        [projections[s]["projection"] for s in fitted], fitted)
+        for stat, milestones in zip(fitted, milestone_batch_to_lists(batch)):
+            projections[stat]["milestones"] = milestones
+    if others:
+        batch = calculate_milestone_probabilities_batch([projections[s]["projection"] for s in others],
+                                                        [projections[s].get("consistency") for s in others], others)
+        for stat, milestones in zip(others, milestone_batch_to_lists(batch)):
+            projections[stat]["milestones"] = milestones
+    return projections
+
+
+def compute_projection(player_id: int, games: int = 82, game_id: str = None, db: Session = Depends(get_db),
+                       odds_event_id: str = None, context: GameContext | None = None, player_info: dict | None = None,
+                       fits: dict | None = None):
+    """
+    Projection d'un joueur pour un match : base (stats) x contexte du match (DvP, absents, pace).
+
+    Args:
+        context: contexte du match déjà construit (scan) ; sinon construit ici à partir des effectifs
+        player_info: entrée du roster (position, équipe) si déjà connue
+        fits: lois ajustées déjà chargées (scan) ; sinon lues dans distribution_cache
+    """
+    player = db.query(models.Player).filter(models.Player.id == player_id).first()
+    if not player: return {}
+
+    df = _load_player_stats(player, games)
+    if df.empty: return {}
+
+    base = compute_base_projections(df, player.full_name, odds_event_id)
+    if fits is None:
+        fits = distribution_cache.get(engine, [player.id])
+
+    if context is None and game_id:
+        game = db.query(models.GameSchedule).filter(models.GameSchedule.nba_game_id == game_id).first()
+        if game:
+            context = GameContext.for_game(game, get_roster_for_team(game.home_team_code, db),
+                                           get_roster_for_team(game.away_team_code, db))
+
+    position = (player_info or {}).get("position") or player.position
+    team_code = (player_info or {}).get("team") or (context.team_of(player.id, player.full_name) if context else None)
+    if context is None or team_code is None:
+        projections = {stat: {**data, **NEUTRAL_FACTORS} for stat, data in base.items()}
+        return {"player": player.full_name, "opponent": "OPP", "position": position,
+                "projections": _attach_milestones(projections, player.id, fits)}
 
     return {
         "player": player.full_name,
-        "opponent": "OPP",
-        "projections": projections
+        "nba_player_id": player.nba_player_id,
+        "position": position,
+        "team": team_code,
+        "opponent": context.opponent_of(team_code),
+        "location": "Home" if context.is_home(team_code) else "Away",
+        "defense": context.defense_analysis(team_code, position),
+        "projections": _attach_milestones(context.apply(base, team_code, position, player.full_name, player.id),
+                                          player.id, fits),
     }
 
 
@@ -416,15 +506,50 @@ def _run_sync_injuries():
 
 # --- MAIN SCAN LOOP ---
 
+def _attach_hit_probabilities(picks: list, fits: dict):
+    """Probabilité de gain de chaque pick du match (lois ajustées centrées sur la projection), un seul calcul vectorisé."""
+    priced = [(b, fits[(b["player_id"], b["market"])]) for b in picks if (b["player_id"], b["market"]) in fits]
+    if not priced:
+        return
+    params = [f for _, f in priced]
+    lines = [b["line"] for b, _ in priced]
+    means = [b["projection"] for b, _ in priced]
+    p_over = probability_over(params, lines, means=means)
+    p_under = probability_under(params, lines, means=means)
+    for i, (b, f) in enumerate(priced):
+        prob = p_over[i] if b["bet_type"] == "Over" else p_under[i]
+        b["hit_probability"] = round(float(prob), 3)
+        b["distribution"] = FAMILY_NAMES.get(f["family"])
+
+
+def _score_candidates(candidates: list):
+    """Scores de confiance de candidats (joueur, stat, projection_data, cotes) en une passe (colonnes)."""
+    if not candidates:
+        return [], []
+    return calculate_confidence_scores(
+        [c[2].get('projection') for c in candidates],
+        [c[3].get('line') or 0 for c in candidates],
+        consistency=[c[2].get('consistency', 10) for c in candidates],
+        recent_avg=[c[2].get('recent_avg') for c in candidates],
+        defensive_factor=[c[2].get('defensive_factor', 1.0) for c in candidates],
+        injury_factor=injury_factors([c[0].get('injury_status', 'HEALTHY') for c in candidates],
+                                     [c[0].get('play_probability') for c in candidates]),
+    )
+
+
+# Nombre de picks gardés par scan (tas borné)
+SCAN_TOP_K = 50
+
+
 def run_best_bets_scan(job_id: str, markets: list[str] | None = None):
     print(f"🚀 Démarrage du scan {job_id}...")
     _run_sync_injuries()
+    # Nouvelle version DvP / Pace ou splits on/off publiés par le data-pipeline depuis le dernier scan ?
+    refresh_team_ratings(engine)
+    refresh_on_off_splits(engine)
     with Session(engine) as db:
-        now = datetime.utcnow()
-        # Prioriser les matchs pour lesquels on a des snapshots d'odds non expirés
-        odds_games = [g[0] for g in db.query(models.OddsSnapshot.game_id)
-                      .filter((models.OddsSnapshot.ttl_expire_at.is_(None)) | (models.OddsSnapshot.ttl_expire_at > now))
-                      .distinct().all()]
+        # Prioriser les matchs pour lesquels on a des lignes courantes non expirées (table latest_odds)
+        odds_games = betting_provider.get_games_with_current_odds(db)
         if odds_games:
             all_games = db.query(models.GameSchedule).filter(models.GameSchedule.nba_game_id.in_(odds_games)).all()
         else:
@@ -432,10 +557,11 @@ def run_best_bets_scan(job_id: str, markets: list[str] | None = None):
             all_games = db.query(models.GameSchedule).filter(models.GameSchedule.game_date == today).all()
 
         if not all_games:
-            ANALYSIS_JOBS[job_id] = {"status": "complete", "data": [], "progress": 100, "message": "Aucun match ou aucune cote."}
+            ANALYSIS_JOBS[job_id] = {"status": "complete", "data": [], "progress": 100, "message": "Aucun match ou aucune cote.",
+                                     "ratings_version": get_ratings_version()}
             return
 
-        best_bets = []
+        top_picks = TopKPicks(k=SCAN_TOP_K)
         total_games = len(all_games)
 
         # Check quota au début
@@ -443,10 +569,12 @@ def run_best_bets_scan(job_id: str, markets: list[str] | None = None):
             print("🛑 SCAN ARRÊTÉ : Quota API Odds dépassé. Les cotes ne seront pas mises à jour.")
 
         for i, game in enumerate(all_games):
-            ANALYSIS_JOBS[job_id] = {"status": "running", "data": best_bets, "progress": int((i / total_games) * 100)}
+            ANALYSIS_JOBS[job_id] = {"status": "running", "data": top_picks.sorted(),
+                                     "progress": int((i / total_games) * 100)}
             print(f"🔍 Analyse match {game.away_team_code} @ {game.home_team_code}...")
 
-            has_odds = betting_provider.update_odds_for_game(db, game.nba_game_id, game.home_team_code, game.away_team_code)
+            has_odds = betting_provider.update_odds_for_game(db, game.nba_game_id, game.home_team_code, game.away_team_code,
+                                                              game=game)
             if not has_odds and betting_provider.quota_exceeded:
                 print("   ⚠️ Pas de mise à jour des cotes (Quota). Utilisation du cache existant si dispo.")
 
@@ -460,68 +588,83 @@ def run_best_bets_scan(job_id: str, markets: list[str] | None = None):
 
             print(f"   📊 Joueurs : {len(all_players)}")
 
+            # Contexte du match (pace, DvP, absents) construit une fois pour tous les joueurs
+            for p in home_roster: p["team"] = game.home_team_code
+            for p in away_roster: p["team"] = game.away_team_code
+            context = GameContext.for_game(game, home_roster, away_roster)
+
+            # Toutes les lignes du match en une requête, puis lookups en mémoire
+            game_lines = betting_provider.get_game_lines(db, game.nba_game_id)
+            # Lois ajustées de tout le match (cache par empreinte des stats)
+            game_fits = distribution_cache.get(engine, [p['id'] for p in all_players if p.get('id')])
+            game_picks = []
+            game_projections = {}
+            game_bases = {}  # projections avant contexte, gardées pour les what-if
+            candidates = []  # (joueur, stat, projection_data, cotes) : scorés ensemble après la boucle
+
             for p in all_players:
                 if not p.get('id'): continue
                 try:
-                    proj_data = compute_projection(p['id'], games=82, game_id=game.nba_game_id, db=db)
+                    proj_data = compute_projection(p['id'], games=82, game_id=game.nba_game_id, db=db,
+                                                   context=context, player_info=p, fits=game_fits)
                 except Exception:
                     continue
                 if not proj_data or "projections" not in proj_data: continue
+                game_bases[p['id']] = base_of(proj_data["projections"])
+                for stat_key, stat_proj in proj_data["projections"].items():
+                    game_projections[(p['id'], stat_key)] = stat_proj.get('projection')
 
-                for stat in (markets or ["points", "rebounds", "assists"]):
+                for stat in (markets or SCAN_MARKETS):
                     data = proj_data["projections"].get(stat)
                     if not data: continue
+                    candidates.append((p, stat, data, game_lines.get((p['id'], stat)) or {}))
 
-                    proj = data.get('projection')
-
-                    snap = betting_provider.get_snapshot_odds(db, game.nba_game_id, p['id'], stat)
-                    if snap:
-                        line = snap.get('line'); odds_over = snap.get('price_over'); odds_under = snap.get('price_under')
-                        odds_source = snap.get('bookmaker', 'snapshot')
-                    else:
-                        odds_db = betting_provider.get_odds_from_db(db, p['id'], game.nba_game_id, stat)
-                        line = odds_db.line if odds_db else None
-                        odds_over = odds_db.odds_over if odds_db else None
-                        odds_under = odds_db.odds_under if odds_db else None
-                        odds_source = odds_db.bookmaker if odds_db else None
-
-                    score, tag = calculate_confidence_score(data, line if line else 0, 0)
-
-                    injury_status = p.get('injury_status', 'HEALTHY')
-                    play_prob = p.get('play_probability')
-                    injury_factor = 1.0
-                    status_penalty = {
-                        'OUT': 0.0,
-                        'DOUBTFUL': 0.5,
-                        'QUESTIONABLE': 0.7,
-                        'DAY_TO_DAY': 0.7,
-                        'GTD': 0.7,
-                        'PROBABLE': 0.9,
-                    }
-                    injury_factor *= status_penalty.get(str(injury_status).upper(), 1.0)
-                    if play_prob is not None:
-                        injury_factor *= max(0.0, min(1.0, float(play_prob) / 100.0))
-                    score *= injury_factor
-
-                    if score < 60 or not line:
-                        continue
-
-                    base_pick = {"player": p['full_name'], "team": game.home_team_code if p in home_roster else game.away_team_code,
-                                 "opponent": game.away_team_code if p in home_roster else game.home_team_code,
-                                 "market": stat, "line": line, "odds": odds_over if proj > line else odds_under,
-                                 "projection": proj, "confidence": f"{tag} ({score:.0f})", "ev": score,
-                                 "game_id": game.nba_game_id, "player_id": p['id'], "bet_type": "Over" if proj > line else "Under",
-                                 "odds_source": odds_source, "injury_status": injury_status, "play_probability": play_prob}
-
-                    if proj > line and odds_over:
-                        best_bets.append(base_pick)
-                    elif proj < line and odds_under:
-                        base_pick["bet_type"] = "Under"
-                        best_bets.append(base_pick)
-
-        best_bets.sort(key=lambda x: x['ev'], reverse=True)
-        ANALYSIS_JOBS[job_id] = {"status": "complete", "data": best_bets[:50], "progress": 100}
-        print(f"✅ Scan terminé : {len(best_bets)} picks.")
+            store_game_base(context, game_bases)
+            # Score de confiance de tous les candidats du match en une passe (colonnes)
+            scores, tags = _score_candidates(candidates)
+
+            for (p, stat, data, odds), score, tag in zip(candidates, scores, tags):
+                score = float(score)
+                proj = data.get('projection')
+                line = odds.get('line'); odds_over = odds.get('price_over'); odds_under = odds.get('price_under')
+                odds_source = odds.get('bookmaker')
+                injury_status = p.get('injury_status', 'HEALTHY')
+                play_prob = p.get('play_probability')
+
+                if score < 60 or not line:
+                    continue
+
+                base_pick = {"player": p['full_name'], "team": p['team'], "opponent": context.opponent_of(p['team']),
+                             "market": stat, "line": line, "odds": odds_over if proj > line else odds_under,
+                             "projection": proj, "confidence": f"{tag} ({score:.0f})", "ev": score,
+                             "game_id": game.nba_game_id, "player_id": p['id'], "bet_type": "Over" if proj > line else "Under",
+                             "odds_source": odds_source, "injury_status": injury_status, "play_probability": play_prob}
+
+                if proj > line and odds_over:
+                    game_picks.append(base_pick)
+                elif proj < line and odds_under:
+                    base_pick["bet_type"] = "Under"
+                    game_picks.append(base_pick)
+
+            _attach_hit_probabilities(game_picks, game_fits)
+            # Simulation jointe du match (props corrélés, PRA, paliers) ; gardée en cache pour les parlays
+            try:
+                sim = simulate_game(engine, game.nba_game_id, [p['id'] for p in all_players if p.get('id')],
+                                    projections=game_projections)
+            except Exception as e:
+                print(f"   ⚠️ Simulation impossible : {e}")
+                sim = None
+            if sim is not None:
+                for b in game_picks:
+                    prob = (sim.prob_over if b["bet_type"] == "Over" else sim.prob_under)(
+                        b["player_id"], b["market"], b["line"])
+                    if prob is not None:
+                        b["sim_hit_probability"] = round(prob, 3)
+            top_picks.extend(game_picks)
+
+        ANALYSIS_JOBS[job_id] = {"status": "complete", "data": top_picks.sorted(), "progress": 100,
+                                 "ratings_version": get_ratings_version()}
+        print(f"✅ Scan terminé : {top_picks.seen} picks (top {SCAN_TOP_K} gardés).")
 
 
 @app.post("/analysis/start-scan")
@@ -538,22 +681,145 @@ def get_scan_results(job_id: str):
     return ANALYSIS_JOBS.get(job_id, {"status": "not_found"})
 
 
+def _priced_parlay(pricer: ParlayPricer, leg_indices: list, parlay_type: str, priced: dict | None = None):
+    """Parlay au format API avec probabilité jointe (corrélations incluses) et EV."""
+    priced = priced or pricer.price_one(leg_indices)
+    return {
+        "legs": [pricer.legs[i].dict() for i in leg_indices],
+        "total_odds": priced["total_odds"],
+        "type": parlay_type,
+        "hit_probability": round(priced["joint_probability"], 4),
+        "independent_probability": round(priced["independent_probability"], 4),
+        "correlation_lift": round(priced["correlation_lift"], 3),
+        "ev": round(priced["ev"], 4),
+    }
+
+
 @app.post("/analysis/build-parlay")
-def build_parlay(bets: List[Bet]):
+def build_parlay(bets: List[Bet], max_legs: int = Query(3, ge=1, le=6), max_legs_per_game: int = Query(2, ge=1),
+                 alternatives: int = Query(0, ge=0, le=10)):
+    """
+    Optimise les parlays sur tout le pool de picks (beam search, legs corrélés pricés ensemble) :
+    - "Sûreté" : probabilité jointe maximale à max_legs legs
+    - "Value" : EV maximale de 2 à max_legs legs
+    Contraintes : max_legs_per_game legs par match, jamais deux côtés / lignes du même joueur-marché.
+    Si max_legs est inatteignable (ex: tous les picks dans un seul match), on retombe sur le plus grand
+    nombre de legs possible et la réponse l'indique dans "constraints".
+    """
     if not bets: return {"safe_bet": None, "value_bet": None}
-    bets.sort(key=lambda x: (x.confidence, x.ev), reverse=True)
-    safe_bets = bets[:3]
-    safe_parlay = {"legs": [], "total_odds": 1.0, "type": "Sûreté"}
-    for bet in safe_bets:
-        safe_parlay["legs"].append(bet.dict())
-        safe_parlay["total_odds"] *= (bet.odds or 1.0)
-    bets.sort(key=lambda x: x.ev, reverse=True)
-    value_bets = bets[:2]
-    value_parlay = {"legs": [], "total_odds": 1.0, "type": "Value"}
-    for bet in value_bets:
-        value_parlay["legs"].append(bet.dict())
-        value_parlay["total_odds"] *= (bet.odds or 1.0)
-    return {"safe_bet": safe_parlay, "value_bet": value_parlay}
+    pricer = ParlayPricer(bets, engine=engine)
+    feasible = max_feasible_legs(bets, max_legs_per_game)
+    legs_used = min(max_legs, feasible)
+    top_n = alternatives + 1
+
+    safe = optimize_parlays(pricer, max_legs=legs_used, min_legs=legs_used, objective="probability",
+                            max_legs_per_game=max_legs_per_game, top_n=top_n)
+    value = optimize_parlays(pricer, max_legs=legs_used, min_legs=min(2, legs_used), objective="ev",
+                             max_legs_per_game=max_legs_per_game, top_n=top_n)
+
+    def fmt(results, parlay_type):
+        return [_priced_parlay(pricer, r["legs"], parlay_type, priced=r) for r in results]
+
+    safe_list, value_list = fmt(safe, "Sûreté"), fmt(value, "Value")
+    out = {"safe_bet": safe_list[0] if safe_list else None, "value_bet": value_list[0] if value_list else None}
+    if legs_used < max_legs:
+        out["constraints"] = {
+            "requested_legs": max_legs,
+            "legs_used": legs_used,
+            "reason": f"{len(bets)} picks sur {len({b.game_id for b in bets})} match(s), "
+                      f"max {max_legs_per_game} leg(s) par match et un seul leg par joueur-marché : "
+                      f"{feasible} leg(s) au plus.",
+        }
+    if alternatives:
+        out["alternatives"] = {"safe": safe_list[1:], "value": value_list[1:]}
+    return out
+
+
+@app.post("/analysis/price-parlays")
+def price_parlays(req: ParlayPricingRequest):
+    """Probabilité jointe + EV de lots de parlays (milliers de combinaisons évaluées en une passe vectorisée)."""
+    if not req.bets: return {"parlays": []}
+    pricer = ParlayPricer(req.bets, engine=engine)
+    combos = req.combos or [list(range(len(req.bets)))]
+    width = max(len(c) for c in combos)
+    padded = [list(c) + [-1] * (width - len(c)) for c in combos]
+    if any(i >= len(req.bets) for c in combos for i in c):
+        raise HTTPException(status_code=400, detail="Indice de leg invalide")
+    res = pricer.price(padded)
+    return {"parlays": [{
+        "legs": combos[j],
+        "hit_probability": round(float(res["joint_probability"][j]), 4),
+        "independent_probability": round(float(res["independent_probability"][j]), 4),
+        "total_odds": round(float(res["total_odds"][j]), 3),
+        "ev": round(float(res["ev"][j]), 4),
+    } for j in range(len(combos))]}
+
+
+@app.post("/analysis/what-if")
+def what_if_injuries(req: WhatIfRequest, db: Session = Depends(get_db)):
+    """
+    "Et si Embiid est OUT ?" : projections et scores des deux effectifs avec des statuts forcés.
+
+    Repart des projections de base et du contexte gardés par le dernier scan du match : seuls les boosts
+    et ajustements défensifs des équipes touchées sont recalculés, aucun appel upstream.
+    """
+    cached = get_game_base(req.nba_game_id)
+    if not cached:
+        raise HTTPException(status_code=404, detail="Match absent du cache : lancez d'abord un scan.")
+    base_ctx, bases = cached["context"], cached["bases"]
+    overrides = {int(k) if str(k).isdigit() else k: v for k, v in req.overrides.items()}
+    ctx = base_ctx.with_statuses(overrides)
+    game_lines = betting_provider.get_game_lines(db, req.nba_game_id)
+
+    # Joueur OUT dans un scénario : projection 0 (le delta reflète son absence, pas seulement le score)
+    before, after = [], []
+    for p_before, p_after, stat, data_before, data_after in what_if_projections(
+            base_ctx, ctx, bases, req.markets or SCAN_MARKETS):
+        odds = game_lines.get((p_after.get("id"), stat)) or {}
+        before.append((p_before, stat, data_before, odds))
+        after.append((p_after, stat, data_after, odds))
+
+    scores_before, _ = _score_candidates(before)
+    scores_after, tags_after = _score_candidates(after)
+    players = []
+    for (_, _, data_before, _), (p, stat, data, odds), s_before, s_after, tag in zip(
+            before, after, scores_before, scores_after, tags_after):
+        line = odds.get('line')
+        bet_type = ("Over" if data["projection"] > line else "Under") if line else None
+        players.append({
+            "player": p.get("full_name"), "player_id": p.get("id"), "team": ctx.team_of(p.get("id")),
+            "injury_status": p.get("injury_status"), "market": stat, "line": line,
+            "projection_before": data_before["projection"], "projection": data["projection"],
+            "delta": round(data["projection"] - data_before["projection"], 1),
+            "score_before": round(float(s_before), 1), "score": round(float(s_after), 1), "confidence": tag,
+            "bet_type": None if ctx.is_out(p.get("id")) else bet_type,
+            "defensive_factor": data["defensive_factor"], "offensive_boost": data["offensive_boost"],
+        })
+    players.sort(key=lambda x: abs(x["delta"]), reverse=True)
+    return {
+        "game_id": req.nba_game_id,
+        "affected_teams": sorted(ctx.affected_teams),
+        "context": ctx.summary(),  # inclut ratings_version (version DvP / Pace du scan)
+        "base_computed_at": cached["stored_at"].isoformat(),
+        "players": players,
+    }
+
+
+@app.get("/analysis/simulate/{nba_game_id}")
+def simulate_game_endpoint(nba_game_id: str, draws: int = 5000, db: Session = Depends(get_db)):
+    """Props, PRA et paliers de tous les joueurs d'un match (simulation jointe).
+    Réutilise la simulation du dernier scan si disponible (projections du jour), sinon moyennes historiques."""
+    sim = get_cached_simulation(nba_game_id)
+    if sim is None:
+        game = db.query(models.GameSchedule).filter(models.GameSchedule.nba_game_id == nba_game_id).first()
+        if not game:
+            raise HTTPException(status_code=404, detail="Match introuvable")
+        players = get_roster_for_team(game.home_team_code, db) + get_roster_for_team(game.away_team_code, db)
+        sim = simulate_game(engine, nba_game_id, [p['id'] for p in players if p.get('id')],
+                            draws=min(max(draws, 500), 20000))
+        if sim is None:
+            raise HTTPException(status_code=404, detail="Aucune stat historique pour ce match")
+    return {"game_id": nba_game_id, "draws": sim.draws, "players": sim.summary()}
 
 
 @app.get("/health")
@@ -733,17 +999,50 @@ def list_ingestion_runs(source: Optional[str] = None, limit: int = 50, db: Sessi
     return q.limit(min(limit, 200)).all()
 
 
+def _odds_history_since(days: Optional[int]) -> Optional[datetime]:
+    """Borne fetched_at optionnelle (?days=N) : ne lit que les partitions récentes ; sans paramètre, tout l'historique."""
+    return datetime.utcnow() - timedelta(days=days) if days is not None else None
+
+
 @app.get("/datahub/odds-snapshots", response_model=List[OddsSnapshotDTO])
-def list_odds_snapshots(game_id: str = Query(...), bookmaker: Optional[str] = None, limit: int = 200, db: Session = Depends(get_db)):
-    q = db.query(models.OddsSnapshot).filter(models.OddsSnapshot.game_id == game_id).order_by(models.OddsSnapshot.fetched_at.desc())
+def list_odds_snapshots(game_id: str = Query(...), bookmaker: Optional[str] = None, limit: int = 200,
+                        days: Optional[int] = None, db: Session = Depends(get_db)):
+    since = _odds_history_since(days)
+    q = db.query(models.OddsSnapshot).filter(models.OddsSnapshot.game_id == game_id) \
+        .order_by(models.OddsSnapshot.fetched_at.desc())
+    if since is not None:
+        q = q.filter(models.OddsSnapshot.fetched_at >= since)
     if bookmaker:
         q = q.filter(models.OddsSnapshot.bookmaker == bookmaker)
     return q.limit(min(limit, 500)).all()
 
 
+@app.get("/datahub/unmatched-odds-names")
+def list_unmatched_odds_names(limit: int = 100, db: Session = Depends(get_db)):
+    """Noms de joueurs The-Odds-API non reconnus (par fréquence) : candidats pour la table aliases."""
+    return {"names": betting_provider.get_unmatched_names(db, limit=min(limit, 500))}
+
+
+@app.get("/odds/{game_id}/movement")
+def get_odds_movement(game_id: str, player_id: Optional[int] = None, market: Optional[str] = None,
+                      bookmaker: Optional[str] = None, delta: bool = False, days: Optional[int] = None,
+                      db: Session = Depends(get_db)):
+    """Mouvement des lignes d'un match : séries colonnes (t, line, over, under) par (joueur, marché, bookmaker).
+    Avec delta=true, chaque série est encodée en différences (premier point absolu) pour une réponse plus compacte.
+    """
+    since = _odds_history_since(days)
+    series = betting_provider.get_line_movement(db, game_id, since, player_id=player_id, market=market,
+                                                bookmaker=bookmaker, delta=delta)
+    return {"game_id": game_id, "delta": delta, "series": series}
+
+
 @app.get("/analysis/odds-cache/{nba_game_id}")
-def get_odds_cache_for_game(nba_game_id: str, bookmaker: Optional[str] = None, db: Session = Depends(get_db)):
+def get_odds_cache_for_game(nba_game_id: str, bookmaker: Optional[str] = None, days: Optional[int] = None,
+                            db: Session = Depends(get_db)):
+    since = _odds_history_since(days)
     q = db.query(models.OddsSnapshot).filter(models.OddsSnapshot.game_id == nba_game_id)
+    if since is not None:
+        q = q.filter(models.OddsSnapshot.fetched_at >= since)
     if bookmaker:
         q = q.filter(models.OddsSnapshot.bookmaker == bookmaker)
     rows = q.order_by(models.OddsSnapshot.fetched_at.desc()).all()
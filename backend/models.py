@@ -198,7 +198,13 @@ class IngestionRun(Base):
 
 
 class OddsSnapshot(Base):
+    # Table partitionnée par mois sur fetched_at (migration 006) : toujours filtrer sur fetched_at
+    # pour que PostgreSQL ne lise que les partitions récentes.
+    # create_all crée une table simple (id auto-incrémenté, SQLite compris) ; la migration 006 la convertit en
+    # table partitionnée de clé primaire (id, fetched_at), que le mapper déclare comme identité ci-dessous.
     __tablename__ = "odds_snapshots"
+    __table_args__ = (UniqueConstraint('game_id', 'player_id', 'market', 'bookmaker', 'fetched_at',
+                                       name='uq_odds_snapshot'),)
 
     id = Column(Integer, primary_key=True, index=True)
     ingestion_run_id = Column(Integer, ForeignKey("ingestion_runs.id"))
@@ -210,10 +216,145 @@ class OddsSnapshot(Base):
     price_under = Column(DECIMAL(10, 2))
     bookmaker = Column(String(50), index=True, nullable=False)
     source = Column(String(30), default='the-odds-api')
-    fetched_at = Column(DateTime, default=datetime.now)
+    fetched_at = Column(DateTime, default=datetime.now, nullable=False)
     ttl_expire_at = Column(DateTime, index=True)
     created_at = Column(DateTime, default=datetime.now)
     updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
 
     ingestion_run = relationship("IngestionRun")
     player = relationship("Player")
+
+    # Identité ORM = clé primaire de la table partitionnée (migration 006)
+    __mapper_args__ = {"primary_key": [id, fetched_at]}
+
+
+class LatestOdds(Base):
+    """Vue "ligne courante" : 1 ligne par (match, joueur, marché, bookmaker), upsert à chaque écriture de snapshot."""
+    __tablename__ = "latest_odds"
+
+    game_id = Column(String(50), primary_key=True)
+    player_id = Column(Integer, ForeignKey("player.id"), primary_key=True)
+    market = Column(String(50), primary_key=True)
+    bookmaker = Column(String(50), primary_key=True)
+    line = Column(DECIMAL(10, 2))
+    price_over = Column(DECIMAL(10, 2))
+    price_under = Column(DECIMAL(10, 2))
+    source = Column(String(30), default='the-odds-api')
+    ingestion_run_id = Column(Integer)
+    fetched_at = Column(DateTime)  # dernier changement de la ligne
+    ttl_expire_at = Column(DateTime)
+    updated_at = Column(DateTime, default=datetime.now)  # dernière confirmation de la ligne
+
+    player = relationship("Player")
+
+
+class OddsFreshness(Base):
+    """Registre de fraîcheur : 1 ligne par match, upsert à chaque écriture de cotes (planification du scan)."""
+    __tablename__ = "odds_freshness"
+
+    game_id = Column(String(50), primary_key=True)
+    last_fetched_at = Column(DateTime, nullable=False)  # dernière confirmation des lignes du match
+    ttl_expire_at = Column(DateTime, index=True)
+    bookmaker_count = Column(Integer, default=0)
+    row_count = Column(Integer, default=0)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+
+
+class UnmatchedOddsName(Base):
+    """Noms d'outcomes The-Odds-API sans joueur local : compteur pour savoir quels aliases ajouter."""
+    __tablename__ = "unmatched_odds_names"
+
+    normalized_name = Column(String(150), primary_key=True)
+    raw_name = Column(String(150))
+    source = Column(String(30), default='the-odds-api')
+    seen_count = Column(Integer, default=0)
+    first_seen_at = Column(DateTime, default=datetime.now)
+    last_seen_at = Column(DateTime, default=datetime.now, index=True)
+    last_game_id = Column(String(50))
+
+
+class OddsSnapshotBar(Base):
+    """Résumé open/close/high/low d'une partition mensuelle de odds_snapshots compactée."""
+    __tablename__ = "odds_snapshot_bars"
+
+    game_id = Column(String(50), primary_key=True)
+    player_id = Column(Integer, primary_key=True)
+    market = Column(String(50), primary_key=True)
+    bookmaker = Column(String(50), primary_key=True)
+    period_start = Column(Date, primary_key=True, index=True)
+    first_fetched_at = Column(DateTime)
+    last_fetched_at = Column(DateTime)
+    samples = Column(Integer)
+
+    line_open = Column(DECIMAL(10, 2))
+    line_close = Column(DECIMAL(10, 2))
+    line_high = Column(DECIMAL(10, 2))
+    line_low = Column(DECIMAL(10, 2))
+    over_open = Column(DECIMAL(10, 2))
+    over_close = Column(DECIMAL(10, 2))
+    over_high = Column(DECIMAL(10, 2))
+    over_low = Column(DECIMAL(10, 2))
+    under_open = Column(DECIMAL(10, 2))
+    under_close = Column(DECIMAL(10, 2))
+    under_high = Column(DECIMAL(10, 2))
+    under_low = Column(DECIMAL(10, 2))
+
+    created_at = Column(DateTime, default=datetime.now)
+
+
+class TeamRatingVersion(Base):
+    """Version des ratings DvP / Pace calculés depuis player_game_stats (une seule 'active' à la fois)."""
+    __tablename__ = "team_rating_versions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    window_games = Column(Integer, nullable=False)
+    games_count = Column(Integer, default=0)
+    status = Column(String(20), default='building')  # building | active | superseded
+    computed_at = Column(DateTime, default=datetime.now)
+    activated_at = Column(DateTime)
+    meta = Column(Text)
+
+
+class DvpRating(Base):
+    __tablename__ = "dvp_ratings"
+
+    version_id = Column(Integer, ForeignKey("team_rating_versions.id"), primary_key=True)
+    team_code = Column(String(3), primary_key=True)
+    position = Column(String(2), primary_key=True)
+    factor = Column(Float, nullable=False)  # points
+    rebounds_factor = Column(Float)
+    assists_factor = Column(Float)
+    three_points_made_factor = Column(Float)
+    allowed_avg = Column(Float)
+    samples = Column(Integer, default=0)
+
+
+class PaceRating(Base):
+    __tablename__ = "pace_ratings"
+
+    version_id = Column(Integer, ForeignKey("team_rating_versions.id"), primary_key=True)
+    team_code = Column(String(3), primary_key=True)
+    factor = Column(Float, nullable=False)
+    avg_game_points = Column(Float)
+    games = Column(Integer, default=0)
+
+
+class PlayerOnOffSplit(Base):
+    """Stats d'un joueur avec / sans un coéquipier (absent = aucune ligne player_game_stats sur le match)."""
+    __tablename__ = "player_on_off_splits"
+
+    team_code = Column(String(3), primary_key=True)
+    absent_player_id = Column(Integer, ForeignKey("player.id"), primary_key=True)
+    player_id = Column(Integer, ForeignKey("player.id"), primary_key=True)
+    games_with = Column(Integer, default=0)
+    games_without = Column(Integer, default=0)
+    points_with = Column(Float)
+    points_without = Column(Float)
+    rebounds_with = Column(Float)
+    rebounds_without = Column(Float)
+    assists_with = Column(Float)
+    assists_without = Column(Float)
+    points_boost = Column(Float, default=1.0)
+    rebounds_boost = Column(Float, default=1.0)
+    assists_boost = Column(Float, default=1.0)
+    computed_at = Column(DateTime, default=datetime.now)
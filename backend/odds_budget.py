@@ -0,0 +1,181 @@
+"""
+Module de planification du quota The-Odds-API (budget de requêtes + TTL adaptatif).
+
+💸 Budget de requêtes
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+Chaque réponse de The-Odds-API renvoie le quota restant dans ses headers
+(x-requests-remaining / x-requests-used / x-requests-last).
+On suit ce budget par clé API et on dépense les appels restants là où ils comptent :
+les matchs proches du tip-off dont les cotes sont les plus périmées passent en premier.
+
+⏱️ TTL adaptatif
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+Une ligne à J-2 bouge peu, une ligne à 30 min du tip-off bouge beaucoup :
+le TTL des cotes dépend de l'heure du match (long loin du match, court à l'approche,
+figé une fois le match commencé). ODDS_TTL_HOURS ne sert plus que de repli
+quand l'heure du match est inconnue.
+"""
+
+import os
+import re
+import time
+from datetime import datetime, timedelta
+
+# Coût d'un appel /events/{id}/odds = nb de marchés x nb de régions
+ODDS_REGIONS_COUNT = 1
+
+# Nombre d'appels qu'on garde en réserve (ne jamais vider complètement les clés)
+ODDS_QUOTA_RESERVE = int(os.getenv("ODDS_QUOTA_RESERVE", "0"))
+
+# Matchs jamais récupérés : considérés comme périmés depuis 24h
+NEVER_FETCHED_STALENESS_HOURS = 24.0
+
+# TTL de repli (heure de match inconnue)
+ODDS_TTL_HOURS = float(os.getenv("ODDS_TTL_HOURS", "4"))
+
+# (heures avant tip-off >=, TTL en heures) : du plus lointain au plus proche
+ODDS_TTL_TIERS = [
+    (48.0, 12.0),
+    (24.0, 6.0),
+    (6.0, 3.0),
+    (2.0, 1.0),
+    (0.5, 0.5),
+    (0.0, 0.25),
+]
+
+
+def parse_quota_headers(headers) -> dict | None:
+    """Extrait le quota des headers The-Odds-API (None si absents)."""
+    if not headers:
+        return None
+    try:
+        remaining = headers.get("x-requests-remaining")
+        used = headers.get("x-requests-used")
+        last = headers.get("x-requests-last")
+        if remaining is None and used is None:
+            return None
+        return {
+            "remaining": int(float(remaining)) if remaining is not None else None,
+            "used": int(float(used)) if used is not None else None,
+            "last": int(float(last)) if last is not None else None,
+            "updated_at": time.time(),
+        }
+    except (TypeError, ValueError):
+        return None
+
+
+def game_tipoff_utc(game) -> datetime | None:
+    """
+    Heure de tip-off (UTC naïve) d'un GameSchedule.
+
+    game_time est stocké sous plusieurs formats selon le script de sync :
+    "2024-12-21T00:30:00Z", "00:30:00Z", "19:30"... (toujours en UTC).
+    game_date est la date US : un horaire UTC avant midi tombe donc le lendemain.
+    """
+    if game is None or not game.game_date:
+        return None
+    raw = (game.game_time or "").strip()
+
+    if "T" in raw:
+        try:
+            return datetime.fromisoformat(raw.replace("Z", "")[:19])
+        except ValueError:
+            pass
+
+    m = re.search(r"(\d{1,2}):(\d{2})", raw)
+    if not m:
+        return None
+    hour, minute = int(m.group(1)), int(m.group(2))
+    tip = datetime(game.game_date.year, game.game_date.month, game.game_date.day, hour, minute)
+    if hour < 12:
+        tip += timedelta(days=1)
+    return tip
+
+
+def odds_ttl_hours(tipoff: datetime | None, now: datetime | None = None,
+                   fallback: float = ODDS_TTL_HOURS) -> float | None:
+    """
+    TTL des cotes d'un match selon le temps restant avant le tip-off.
+
+    Returns:
+        float | None: TTL en heures, None si le match a commencé (lignes figées, plus de refetch)
+    """
+    if tipoff is None:
+        return fallback
+    now = now or datetime.utcnow()
+    hours_to_tip = (tipoff - now).total_seconds() / 3600
+    if hours_to_tip < 0:
+        return None
+    for min_hours, ttl in ODDS_TTL_TIERS:
+        if hours_to_tip >= min_hours:
+            return ttl
+    return ODDS_TTL_TIERS[-1][1]
+
+
+def game_odds_ttl_hours(game, now: datetime | None = None) -> float | None:
+    """odds_ttl_hours() à partir d'un GameSchedule (date + heure)."""
+    return odds_ttl_hours(game_tipoff_utc(game), now=now)
+
+
+class OddsBudgetPlanner:
+    """Classe les matchs par urgence et tronque la liste au budget de requêtes restant."""
+
+    def __init__(self, provider, markets_count: int = 3, reserve: int = ODDS_QUOTA_RESERVE):
+        self.provider = provider
+        self.request_cost = max(1, markets_count * ODDS_REGIONS_COUNT)
+        self.reserve = reserve
+
+    def available_requests(self) -> int | None:
+        """
+        Nombre d'appels /odds encore possibles sur l'ensemble des clés.
+        Les clés jamais interrogées sont d'abord sondées (appel gratuit) ;
+        None si le quota d'une clé encore utilisable reste inconnu.
+        """
+        budgets = self.provider.remaining_key_budgets()
+        if any(not b or b.get("remaining") is None for b in budgets.values()):
+            self.provider.probe_key_budgets()
+            budgets = self.provider.remaining_key_budgets()
+        if not budgets:
+            return 0
+        total = 0
+        for budget in budgets.values():
+            if not budget or budget.get("remaining") is None:
+                return None
+            total += budget["remaining"]
+        return max(0, (total - self.reserve) // self.request_cost)
+
+    @staticmethod
+    def priority(tipoff: datetime | None, last_fetched_at: datetime | None, now: datetime) -> float:
+        """Score d'urgence : (heures de péremption + 1) / (heures avant tip-off + 1)."""
+        if last_fetched_at is None:
+            staleness = NEVER_FETCHED_STALENESS_HOURS
+        else:
+            staleness = max(0.0, (now - last_fetched_at).total_seconds() / 3600)
+        if tipoff is None:
+            hours_to_tip = 24.0
+        else:
+            hours_to_tip = (tipoff - now).total_seconds() / 3600
+            if hours_to_tip < 0:
+                return 0.0  # Match commencé : lignes figées, aucun intérêt à dépenser du quota
+        return (staleness + 1) / (hours_to_tip + 1)
+
+    def plan(self, games: list, last_fetch_by_game: dict, now: datetime | None = None):
+        """
+        Ordonne les matchs par priorité décroissante et garde ceux que le budget permet.
+
+        Returns:
+            tuple: (games_to_fetch, deferred_games)
+        """
+        now = now or datetime.utcnow()
+        scored = []
+        for g in games:
+            score = self.priority(game_tipoff_utc(g), last_fetch_by_game.get(g.nba_game_id), now)
+            if score > 0:
+                scored.append((score, g))
+        scored.sort(key=lambda x: x[0], reverse=True)
+        ordered = [g for _, g in scored]
+
+        budget = self.available_requests()
+        if budget is None:
+            return ordered, []
+        return ordered[:budget], ordered[budget:]
@@ -7,6 +7,10 @@ Ce module calcule l'augmentation des stats d'un joueur quand une STAR de son éq
 C'est le principe du "Usage Rate" : quand le patron n'est pas là, les lieutenants prennent plus de tirs.
 """
 
+import threading
+
+from cachetools import LRUCache
+
 # 🌟 LISTE DES STARS OFFENSIVES (Les "Alphas")
 # Si un de ces joueurs est OUT, ses coéquipiers reçoivent un boost.
 TEAM_STARS = {
@@ -79,3 +83,98 @@ def get_offensive_boost(player_name, team_code, team_roster):
             boosts["rebounds"] += 0.05  # +5% rebonds (impact mineur)
 
     return boosts, missing_stars
+
+
+# 📊 SPLITS ON/OFF CALCULÉS (data-pipeline/compute_on_off_splits.py)
+# Index mémoire : (équipe, joueur absent) -> {player_id: {"points": x, "rebounds": y, "assists": z}}
+# Les stars sans split (pas assez de matchs sans elles) gardent le boost forfaitaire de TEAM_STARS.
+_ON_OFF_INDEX = {"computed_at": None, "splits": {}}
+_team_boost_cache = LRUCache(maxsize=512)
+_on_off_lock = threading.Lock()
+
+NEUTRAL_BOOSTS = {"points": 1.0, "rebounds": 1.0, "assists": 1.0}
+# Boost forfaitaire par star absente (mêmes valeurs que get_offensive_boost)
+STAR_BOOST = {"points": 0.15, "rebounds": 0.05, "assists": 0.15}
+
+
+def _add_star_boost(boosts):
+    for stat, inc in STAR_BOOST.items():
+        boosts[stat] += inc
+
+
+def refresh_on_off_splits(engine):
+    """Recharge l'index des splits si la table a été recalculée (1 requête légère sinon)."""
+    global _ON_OFF_INDEX
+    from sqlalchemy import text
+
+    try:
+        with engine.connect() as conn:
+            computed_at = conn.execute(text("SELECT MAX(computed_at) FROM player_on_off_splits")).scalar()
+            if computed_at is None or computed_at == _ON_OFF_INDEX["computed_at"]:
+                return _ON_OFF_INDEX["computed_at"]
+            rows = conn.execute(text("""
+                SELECT team_code, absent_player_id, player_id, points_boost, rebounds_boost, assists_boost
+                FROM player_on_off_splits
+            """)).all()
+    except Exception as e:
+        print(f"⚠️ Splits on/off indisponibles (boost forfaitaire TEAM_STARS) : {e}")
+        return _ON_OFF_INDEX["computed_at"]
+
+    splits = {}
+    for team, absent_id, player_id, pts, reb, ast in rows:
+        splits.setdefault((team, absent_id), {})[player_id] = {
+            "points": float(pts), "rebounds": float(reb), "assists": float(ast)}
+
+    with _on_off_lock:
+        _ON_OFF_INDEX = {"computed_at": computed_at, "splits": splits}
+        _team_boost_cache.clear()
+    print(f"🔄 Splits on/off chargés : {len(rows)} paires, {len(splits)} absents.")
+    return computed_at
+
+
+def get_team_offensive_boosts(team_code, out_players):
+    """
+    Boosts offensifs de toute une équipe pour un ensemble de joueurs OUT (lookup indexé, en cache).
+
+    Args:
+        team_code (str): équipe (ex: "DAL")
+        out_players (list): joueurs OUT de l'équipe ({"id", "full_name"})
+
+    Returns:
+        dict: {"by_player": {player_id: boosts}, "default": boosts, "missing": [absents ayant un impact]}
+              "default" s'applique aux joueurs sans split (boost forfaitaire des stars absentes).
+    """
+    out_players = [p for p in out_players or [] if p.get("id") or p.get("full_name")]
+    key = (team_code, frozenset((p.get("id"), p.get("full_name")) for p in out_players))
+    with _on_off_lock:
+        cached = _team_boost_cache.get(key)
+        index = _ON_OFF_INDEX["splits"]
+    if cached is not None:
+        return cached
+
+    stars = TEAM_STARS.get(team_code, [])
+    absent_splits = [(p, index.get((team_code, p.get("id")), {})) for p in out_players]
+    missing = [p.get("full_name") for p, rows in absent_splits if rows or p.get("full_name") in stars]
+
+    default = dict(NEUTRAL_BOOSTS)
+    for p, _ in absent_splits:
+        if p.get("full_name") in stars:
+            _add_star_boost(default)
+
+    # Joueurs couverts par au moins un split : produit des splits, forfait pour les stars sans split
+    by_player = {}
+    for player_id in {pid for _, rows in absent_splits for pid in rows}:
+        boosts, flat = dict(NEUTRAL_BOOSTS), dict(NEUTRAL_BOOSTS)
+        for p, rows in absent_splits:
+            split = rows.get(player_id)
+            if split:
+                for stat in boosts:
+                    boosts[stat] *= split[stat]
+            elif p.get("full_name") in stars and p.get("id") != player_id:
+                _add_star_boost(flat)
+        by_player[player_id] = {stat: round(boosts[stat] * flat[stat], 3) for stat in boosts}
+
+    result = {"by_player": by_player, "default": default, "missing": missing}
+    with _on_off_lock:
+        _team_boost_cache[key] = result
+    return result
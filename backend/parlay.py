@@ -0,0 +1,243 @@
+"""
+Module de pricing des parlays (combinés) avec corrélation.
+
+🔗 Probabilité jointe
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+Multiplier les probabilités des legs suppose l'indépendance : faux dans un même match
+(deux coéquipiers Over points, points + passes d'un meneur...).
+
+- Chaque leg a une proba marginale (hit_probability du scan, sinon loi normale projection/consistency,
+  sinon cote implicite).
+- Corrélation entre legs = corrélation historique (player_game_stats) des stats sous-jacentes,
+  en cache (simulation.correlation_for), signe inversé pour un Under ; 0 entre matchs différents.
+- Copule gaussienne : N tirages de tous les legs du pool d'un coup -> matrice de réussite
+  compressée en bits (np.packbits). La proba d'un parlay = popcount(AND des lignes) / N :
+  des milliers de parlays s'évaluent en une seule opération vectorisée.
+"""
+
+import os
+
+import numpy as np
+from scipy.special import ndtri
+
+from backend.probability import cumulative_distribution_function
+from backend.simulation import SIM_STATS, COMBO_MARKETS, correlation_for, cholesky_factor, nearest_correlation
+
+PARLAY_DRAWS = int(os.getenv("PARLAY_DRAWS", "20000"))
+
+# Bornes des probabilités marginales (évite ndtri(0) / ndtri(1))
+MIN_LEG_PROBABILITY = 0.01
+MAX_LEG_PROBABILITY = 0.99
+
+# Parlays évalués par bloc (borne la mémoire : bloc x legs x draws/8 octets)
+PRICE_CHUNK_SIZE = 2048
+
+# Nombre de bits à 1 pour chaque octet (popcount par table si np.bitwise_count indisponible, numpy < 2)
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint16)
+
+
+def _popcount_rows(bits: np.ndarray) -> np.ndarray:
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(bits).sum(axis=1, dtype=np.int64)
+    return _POPCOUNT[bits].sum(axis=1, dtype=np.int64)
+
+
+def _get(leg, field, default=None):
+    if isinstance(leg, dict):
+        return leg.get(field, default)
+    return getattr(leg, field, default)
+
+
+def leg_probability(leg) -> float:
+    """Proba marginale d'un leg : hit_probability > loi normale (projection, consistency) > 1 / cote."""
+    p = _get(leg, "hit_probability")
+    if p is None:
+        projection, consistency, line = _get(leg, "projection"), _get(leg, "consistency"), _get(leg, "line")
+        if projection is not None and consistency and line is not None:
+            p_over = 1 - cumulative_distribution_function(line, projection, consistency)
+            p = p_over if _get(leg, "bet_type") == "Over" else 1 - p_over
+    if p is None:
+        odds = _get(leg, "odds")
+        p = 1 / odds if odds and odds > 1 else 0.5
+    return float(min(max(p, MIN_LEG_PROBABILITY), MAX_LEG_PROBABILITY))
+
+
+def leg_correlation(engine, legs: list) -> np.ndarray:
+    """
+    Corrélation (L, L) entre les événements "leg gagné".
+    Même match : corrélation historique des stats (signée Over/Under) ; matchs différents : 0.
+    """
+    n = len(legs)
+    corr = np.eye(n)
+    if engine is None or n < 2:
+        return corr
+
+    signs = np.array([1.0 if _get(l, "bet_type") == "Over" else -1.0 for l in legs])
+    by_game = {}
+    for i, leg in enumerate(legs):
+        if _get(leg, "market") in SIM_STATS or _get(leg, "market") in COMBO_MARKETS:
+            by_game.setdefault(_get(leg, "game_id"), []).append(i)
+
+    for idx in by_game.values():
+        if len(idx) < 2:
+            continue
+        keys = sorted({(int(_get(legs[i], "player_id")), _get(legs[i], "market")) for i in idx})
+        pos = {k: j for j, k in enumerate(keys)}
+        stat_corr = correlation_for(engine, keys)
+        cols = [pos[(int(_get(legs[i], "player_id")), _get(legs[i], "market"))] for i in idx]
+        block = stat_corr[np.ix_(cols, cols)] * np.outer(signs[idx], signs[idx])
+        corr[np.ix_(idx, idx)] = block
+    np.fill_diagonal(corr, 1.0)
+    return nearest_correlation(corr)
+
+
+class ParlayPricer:
+    """
+    Prépare un pool de legs une fois (marginales, corrélations, tirages en bits),
+    puis price n'importe quel lot de parlays (indices de legs) en vectorisé.
+    """
+
+    def __init__(self, legs: list, engine=None, draws: int = PARLAY_DRAWS, seed: int | None = 42):
+        self.legs = list(legs)
+        self.n_legs = len(self.legs)
+        self.draws = draws
+        self.probabilities = np.array([leg_probability(l) for l in self.legs])
+        self.odds = np.array([float(_get(l, "odds") or 1.0) for l in self.legs])
+        self.correlation = leg_correlation(engine, self.legs)
+
+        rng = np.random.default_rng(seed)
+        z = rng.standard_normal((draws, self.n_legs)) @ cholesky_factor(self.correlation).T
+        hits = z < ndtri(self.probabilities)[None, :]  # P(Z < Φ⁻¹(p)) = p
+        # Ligne supplémentaire "toujours vrai" : sert de padding pour les parlays plus courts
+        hits = np.concatenate([hits, np.ones((draws, 1), dtype=bool)], axis=1)
+        self.packed = np.packbits(hits.T, axis=1)  # (L + 1, draws / 8) ; bits de complément à 0
+        self.pad_index = self.n_legs
+
+    def price(self, combos) -> dict:
+        """
+        Price P parlays d'un coup.
+
+        Args:
+            combos: liste/array (P, k) d'indices de legs ; -1 ou pad_index = leg absent (parlays plus courts)
+
+        Returns:
+            dict d'arrays (P,) : joint_probability, independent_probability, total_odds, ev, correlation_lift
+        """
+        idx = np.asarray(combos, dtype=np.int64)
+        if idx.ndim == 1:
+            idx = idx[None, :]
+        idx = np.where(idx < 0, self.pad_index, idx)
+
+        hits = np.empty(idx.shape[0], dtype=np.int64)
+        for start in range(0, idx.shape[0], PRICE_CHUNK_SIZE):
+            chunk = idx[start:start + PRICE_CHUNK_SIZE]
+            joint_bits = np.bitwise_and.reduce(self.packed[chunk], axis=1)  # (chunk, B)
+            hits[start:start + PRICE_CHUNK_SIZE] = _popcount_rows(joint_bits)
+        joint = hits / self.draws
+
+        probs = np.append(self.probabilities, 1.0)[idx].prod(axis=1)
+        odds = np.append(self.odds, 1.0)[idx].prod(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            lift = np.where(probs > 0, joint / probs, 1.0)
+        return {
+            "joint_probability": joint,
+            "independent_probability": probs,
+            "total_odds": odds,
+            "ev": joint * odds - 1,
+            "correlation_lift": lift,
+        }
+
+    def price_one(self, leg_indices: list) -> dict:
+        res = self.price([list(leg_indices)])
+        return {k: float(v[0]) for k, v in res.items()}
+
+
+# --- OPTIMISATION (beam search) ---
+
+PARLAY_BEAM_WIDTH = 64
+MAX_LEGS_PER_GAME = 2
+
+
+def _leg_codes(legs: list, field_fn):
+    """Encode une clé par leg en entiers (comparaisons vectorisées)."""
+    codes = {}
+    return np.array([codes.setdefault(field_fn(l), len(codes)) for l in legs], dtype=np.int64)
+
+
+def max_feasible_legs(legs: list, max_legs_per_game: int = MAX_LEGS_PER_GAME) -> int:
+    """Plus grand nombre de legs atteignable sous les contraintes (par match, un leg par joueur-marché)."""
+    keys_by_game = {}
+    for leg in legs:
+        keys_by_game.setdefault(_get(leg, "game_id"), set()).add((_get(leg, "player_id"), _get(leg, "market")))
+    return sum(min(len(keys), max_legs_per_game) for keys in keys_by_game.values())
+
+
+def optimize_parlays(pricer: ParlayPricer, max_legs: int = 3, min_legs: int = 2, objective: str = "ev",
+                     beam_width: int = PARLAY_BEAM_WIDTH, max_legs_per_game: int = MAX_LEGS_PER_GAME,
+                     top_n: int = 5) -> list:
+    """
+    Cherche les meilleurs parlays de min_legs..max_legs legs dans le pool du pricer (beam search).
+
+    À chaque niveau, chaque parlay du faisceau est étendu par tous les legs compatibles encore inutilisés
+    (max_legs_per_game par match, un seul côté/ligne par joueur-marché) ; les candidats sont normalisés
+    en tuples triés et dédoublonnés (A+B et B+A ne comptent qu'une fois), pricés en un appel vectorisé,
+    et on garde les beam_width meilleurs. Le résultat ne dépend donc pas de l'ordre des legs.
+
+    Args:
+        objective: "ev" (espérance) ou "probability" (probabilité jointe)
+
+    Returns:
+        list[dict]: top_n parlays {"legs": [indices], + métriques de ParlayPricer.price}
+    """
+    n = pricer.n_legs
+    if n == 0 or max_legs < 1:
+        return []
+    min_legs = max(1, min(min_legs, max_legs))
+    key = "ev" if objective == "ev" else "joint_probability"
+
+    conflict = _leg_codes(pricer.legs, lambda l: (_get(l, "player_id"), _get(l, "market")))
+    game = _leg_codes(pricer.legs, lambda l: _get(l, "game_id"))
+    all_legs = np.arange(n)
+
+    beam = all_legs[:, None]  # (W, k)
+    scores = pricer.price(beam)
+    found = []  # (score, legs, metrics)
+
+    def collect(states, res):
+        order = np.argsort(-res[key])[:top_n]
+        for j in order:
+            found.append((float(res[key][j]), states[j].tolist(), {m: float(v[j]) for m, v in res.items()}))
+
+    if min_legs <= 1:
+        collect(beam, scores)
+    keep = np.argsort(-scores[key])[:beam_width]
+    beam = beam[keep]
+
+    for size in range(2, max_legs + 1):
+        # Masque (W, n) des extensions valides : tout leg hors du parlay (pas seulement les indices supérieurs)
+        valid = ~(beam[:, :, None] == all_legs[None, None, :]).any(axis=1)
+        valid &= ~(conflict[beam][:, :, None] == conflict[None, None, :]).any(axis=1)
+        same_game = (game[beam][:, :, None] == game[None, None, :]).sum(axis=1)
+        valid &= same_game < max_legs_per_game
+        w_idx, l_idx = np.nonzero(valid)
+        if w_idx.size == 0:
+            break
+
+        # Combinaison = ensemble de legs : tri par ligne puis dédoublonnage
+        candidates = np.unique(np.sort(np.concatenate([beam[w_idx], l_idx[:, None]], axis=1), axis=1), axis=0)
+        res = pricer.price(candidates)
+        if size >= min_legs:
+            collect(candidates, res)
+        keep = np.argsort(-res[key])[:beam_width]
+        beam = candidates[keep]
+
+    found.sort(key=lambda x: x[0], reverse=True)
+    out, seen = [], set()
+    for _, legs, metrics in found:
+        if tuple(legs) in seen:
+            continue
+        seen.add(tuple(legs))
+        out.append({"legs": legs, **metrics})
+        if len(out) >= top_n:
+            break
+    return out
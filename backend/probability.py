@@ -3,10 +3,37 @@ Module de calcul de probabilités pour les paliers (Milestones).
 
 Utilise la Loi Normale (Gaussienne) pour estimer la probabilité qu'un joueur atteigne un certain score.
 La Loi de Poisson est souvent citée, mais pour le basket (scores élevés > 10), la Loi Normale est plus adaptée et précise.
+
+Deux API :
+- calculate_milestone_probabilities : un joueur, un type de stat (version historique).
+- calculate_milestone_probabilities_batch : tout un match / slate en un seul calcul matriciel (numpy),
+  mêmes paliers et même correction de continuité (m - 0.5).
 """
 
 import math
 
+import numpy as np
+from scipy.special import ndtr
+
+# Nombre max de paliers par joueur (rebounds/assists : jusqu'à 7 paliers de 2)
+MAX_MILESTONES = 7
+
+# Paliers par type de stat : (début minimum, recul sous la projection, pas, marge au-dessus de la projection)
+# Les stats à paliers fixes (threes, steals, blocks) ont un début et une fin absolus.
+MILESTONE_GRIDS = {
+    "points": (10, 10, 5, 15),
+    "rebounds": (2, 4, 2, 8),
+    "assists": (2, 4, 2, 8),
+    "points_rebounds_assists": (10, 10, 5, 15),  # PRA : mêmes paliers que les points
+    "points_rebounds": (10, 10, 5, 15),
+    "points_assists": (10, 10, 5, 15),
+    "rebounds_assists": (4, 4, 2, 10),
+}
+FIXED_MILESTONES = {
+    "three_points_made": (1, 7),  # 1..6
+}
+DEFAULT_FIXED_MILESTONES = (1, 4)  # Steals, Blocks : 1..3
+
 def cumulative_distribution_function(x, mean, std_dev):
     """
     Fonction de répartition de la loi normale (CDF).
@@ -33,6 +60,14 @@ def cumulative_distribution_function(x, mean, std_dev):
     except Exception:
         return 0.0
 
+def _milestone_label(prob_percent):
+    if prob_percent >= 90: return "🔒 Safe"
+    if prob_percent >= 70: return "✅ Probable"
+    if prob_percent >= 50: return "⚖️ 50/50"
+    if prob_percent >= 30: return "⚠️ Risqué"
+    return "🔥 Jackpot"
+
+
 def calculate_milestone_probabilities(projection, std_dev, stat_type="points"):
     """
     Calcule les probabilités d'atteindre différents paliers.
@@ -67,6 +102,13 @@ def calculate_milestone_probabilities(projection, std_dev, stat_type="points"):
     elif stat_type == "three_points_made":
         # Paliers : 1, 2, 3, 4, 5...
         milestones = [1, 2, 3, 4, 5, 6]
+
+    elif stat_type in MILESTONE_GRIDS:
+        # Combos (PRA, P+R, P+A, R+A) : même grille que la version batch
+        floor_, back, step, ahead = MILESTONE_GRIDS[stat_type]
+        start = max(floor_, int(projection) - back)
+        start = start - (start % step)
+        milestones = [x for x in range(start, int(projection) + ahead, step)][:MAX_MILESTONES]
         
     else: # Steals, Blocks
         milestones = [1, 2, 3]
@@ -87,21 +129,107 @@ def calculate_milestone_probabilities(projection, std_dev, stat_type="points"):
         
         # On ne garde que les probas pertinentes (entre 5% et 99%)
         if 5 <= prob_percent <= 99.9:
-            label = ""
-            if prob_percent >= 90: label = "🔒 Safe"
-            elif prob_percent >= 70: label = "✅ Probable"
-            elif prob_percent >= 50: label = "⚖️ 50/50"
-            elif prob_percent >= 30: label = "⚠️ Risqué"
-            else: label = "🔥 Jackpot"
-            
             results.append({
                 "milestone": f"{m}+",
                 "value": m,
                 "probability": prob_percent,
-                "label": label
+                "label": _milestone_label(prob_percent)
             })
             
     # Trier par valeur de palier croissant
     results.sort(key=lambda x: x["value"])
     
     return results
+
+
+def milestone_grid(projections, stat_types):
+    """
+    Matrice des paliers (n joueurs x MAX_MILESTONES), mêmes règles que calculate_milestone_probabilities.
+
+    Returns:
+        tuple: (values int64 (n, K), valid bool (n, K)) ; les cases hors grille valent 0 / False
+    """
+    proj_int = np.trunc(np.asarray(projections, dtype=float)).astype(np.int64)
+    stat_types = np.asarray(stat_types, dtype=object)
+    n = proj_int.shape[0]
+    start = np.empty(n, dtype=np.int64)
+    step = np.ones(n, dtype=np.int64)
+    end = np.empty(n, dtype=np.int64)
+
+    # Paliers fixes par défaut, puis surcharges par type de stat
+    start[:] = DEFAULT_FIXED_MILESTONES[0]
+    end[:] = DEFAULT_FIXED_MILESTONES[1]
+    for stat, (lo, hi) in FIXED_MILESTONES.items():
+        mask = stat_types == stat
+        start[mask], end[mask] = lo, hi
+    for stat, (floor_, back, st, ahead) in MILESTONE_GRIDS.items():
+        mask = stat_types == stat
+        if not mask.any():
+            continue
+        s0 = np.maximum(floor_, proj_int[mask] - back)
+        start[mask] = s0 - (s0 % st)  # arrondi au multiple du pas inférieur
+        step[mask] = st
+        end[mask] = proj_int[mask] + ahead
+
+    values = start[:, None] + step[:, None] * np.arange(MAX_MILESTONES)[None, :]
+    valid = (values < end[:, None]) & (values > 0)
+    return np.where(valid, values, 0), valid
+
+
+def calculate_milestone_probabilities_batch(projections, std_devs, stat_types):
+    """
+    Probabilités P(X >= palier) pour N joueurs/stats en un seul calcul vectorisé.
+
+    Args:
+        projections (array-like[float]): projections (n,)
+        std_devs (array-like[float]): écarts-types (n,) ; 0/None -> 25% de la projection,
+            NaN -> aucun palier (comme la version scalaire, qui n'en garde aucun)
+        stat_types (array-like[str]): type de stat par ligne (n,)
+
+    Returns:
+        dict: {"values": (n, K) int, "valid": (n, K) bool, "probabilities": (n, K) float en % arrondi à 0.1,
+               NaN hors grille}
+    """
+    mean = np.asarray(projections, dtype=float)
+    if isinstance(std_devs, np.ndarray):
+        std = std_devs.astype(float)
+        missing = std == 0
+    else:
+        # None / 0 : écart-type par défaut (comme la version scalaire) ; NaN reste NaN (ligne masquée)
+        missing = np.array([not sd for sd in std_devs], dtype=bool)
+        std = np.array([0.0 if sd is None else sd for sd in std_devs], dtype=float)
+    std = np.where(missing, mean * 0.25, std)
+
+    # Écart-type ou projection NaN : pas de loi exploitable, la ligne n'a aucun palier valide
+    unknown = np.isnan(std) | np.isnan(mean)
+    values, valid = milestone_grid(np.where(unknown, 0.0, mean), stat_types)
+    valid &= ~unknown[:, None]
+    values = np.where(valid, values, 0)
+    threshold = values - 0.5  # correction de continuité : "au moins m" <=> X > m - 0.5
+
+    degenerate = ~unknown & (std == 0)
+    safe_std = np.where(degenerate | unknown, 1.0, std)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cdf = ndtr((threshold - mean[:, None]) / safe_std[:, None])
+    step_cdf = np.where(threshold < mean[:, None], 0.0, 1.0)
+    cdf = np.where(degenerate[:, None], step_cdf, cdf)
+
+    probs = np.round((1 - cdf) * 100, 1)
+    return {
+        "values": values,
+        "valid": valid,
+        "probabilities": np.where(valid, probs, np.nan),
+    }
+
+
+def milestone_batch_to_lists(batch):
+    """Convertit le résultat batch au format de calculate_milestone_probabilities (liste de dicts par ligne)."""
+    values, valid, probs = batch["values"], batch["valid"], batch["probabilities"]
+    keep = valid & (probs >= 5) & (probs <= 99.9)
+    out = []
+    for i in range(values.shape[0]):
+        row = []
+        for m, p in zip(values[i][keep[i]].tolist(), probs[i][keep[i]].tolist()):
+            row.append({"milestone": f"{m}+", "value": m, "probability": p, "label": _milestone_label(p)})
+        out.append(row)
+    return out
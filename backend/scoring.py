@@ -2,6 +2,11 @@
 Module de scoring pour identifier les "Jimmy Locks" (Paris haute confiance).
 """
 
+import heapq
+import itertools
+
+import numpy as np
+
 def calculate_confidence_score(projection_data, market_line, game_spread=0):
     """
     Calcule un score de 0 à 100 pour la qualité du pari.
@@ -54,4 +59,104 @@ def calculate_confidence_score(projection_data, market_line, game_spread=0):
     elif score >= 65: tag = "✅ PLAY"
     elif score >= 50: tag = "⚠️ LEAN"
 
-    return round(score, 1), tag
\ No newline at end of file
+    return round(score, 1), tag
+
+# --- VERSION BATCH (colonnes numpy) ---
+
+# Pénalité de confiance selon le statut blessure (appliquée après le score)
+INJURY_STATUS_PENALTY = {
+    'OUT': 0.0,
+    'DOUBTFUL': 0.5,
+    'QUESTIONABLE': 0.7,
+    'DAY_TO_DAY': 0.7,
+    'GTD': 0.7,
+    'PROBABLE': 0.9,
+}
+
+
+def injury_factors(statuses, play_probabilities=None):
+    """Facteur blessure par candidat : pénalité de statut x probabilité de jouer (en %)."""
+    factor = np.array([INJURY_STATUS_PENALTY.get(str(s).upper(), 1.0) for s in statuses], dtype=float)
+    if play_probabilities is not None:
+        pp = np.array([np.nan if p is None else float(p) for p in play_probabilities], dtype=float)
+        factor *= np.where(np.isnan(pp), 1.0, np.clip(pp / 100.0, 0.0, 1.0))
+    return factor
+
+
+def _column(values, n, default):
+    if values is None:
+        return np.full(n, default, dtype=float)
+    return np.array([default if v is None else v for v in values], dtype=float)
+
+
+def calculate_confidence_scores(projections, market_lines, consistency=None, recent_avg=None,
+                                defensive_factor=None, game_spread=None, injury_factor=None):
+    """
+    Version colonnes de calculate_confidence_score : même barème, tous les candidats en une passe.
+
+    Args:
+        projections, market_lines: (n,) ; une ligne <= 0 ou absente donne (0, "N/A")
+        consistency: écart-type récent (défaut 10), recent_avg: moyenne récente (défaut projection)
+        defensive_factor (défaut 1.0), game_spread (défaut 0), injury_factor (défaut 1.0, appliqué après le tag)
+
+    Returns:
+        tuple: (scores float (n,), tags object (n,))
+    """
+    proj = np.asarray(projections, dtype=float)
+    n = proj.shape[0]
+    line = np.nan_to_num(_column(market_lines, n, 0.0), nan=0.0)
+    cons = _column(consistency, n, 10.0)
+    mean_val = _column(recent_avg, n, np.nan)
+    mean_val = np.where(np.isnan(mean_val), proj, mean_val)
+    def_factor = _column(defensive_factor, n, 1.0)
+    spread = np.abs(_column(game_spread, n, 0.0))
+    valid = line > 0
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        edge = np.abs((proj - line) / np.where(valid, line, 1.0))
+        cv = np.where(mean_val > 0, cons / np.where(mean_val > 0, mean_val, 1.0), np.nan)
+
+    score = np.full(n, 50.0)
+    # 1. Edge
+    score += np.select([edge > 0.15, edge > 0.10, edge > 0.05], [15, 15, 10], default=-5)
+    # 2. Consistance (CV) ; NaN (moyenne nulle) -> 0
+    score += np.select([cv < 0.15, cv < 0.20, cv > 0.35, cv > 0.25], [15, 10, -10, -5], default=0)
+    # 3. Défense
+    score += np.select([def_factor >= 1.08, def_factor <= 0.92], [15, -10], default=0)
+    # 4. Blowout
+    score += np.select([spread >= 14, spread >= 10], [-15, -5], default=0)
+
+    score = np.round(score, 1)
+    tags = np.select([score >= 80, score >= 65, score >= 50], ["🔒 LOCK", "✅ PLAY", "⚠️ LEAN"], default="PASS")
+    tags = np.where(valid, tags, "N/A").astype(object)
+    score = np.where(valid, score, 0.0)
+
+    if injury_factor is not None:
+        score = score * np.asarray(injury_factor, dtype=float)
+    return score, tags
+
+
+class TopKPicks:
+    """Sélection bornée des K meilleurs picks (tas min) : mémoire O(K) quel que soit le nombre de candidats."""
+
+    def __init__(self, k: int = 50, key: str = "ev"):
+        self.k = k
+        self.key = key
+        self._heap = []
+        self._counter = itertools.count()  # départage les égalités sans comparer les dicts
+        self.seen = 0
+
+    def push(self, pick: dict):
+        self.seen += 1
+        item = (pick[self.key], next(self._counter), pick)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, item)
+        elif item[0] > self._heap[0][0]:
+            heapq.heapreplace(self._heap, item)
+
+    def extend(self, picks):
+        for pick in picks:
+            self.push(pick)
+
+    def sorted(self) -> list:
+        return [p for _, _, p in sorted(self._heap, key=lambda x: (-x[0], x[1]))]
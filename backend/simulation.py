@@ -0,0 +1,275 @@
+"""
+Module de simulation Monte Carlo d'un match (props corrélés).
+
+🎲 Principe
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+Les props ne sont pas indépendants : les points de deux coéquipiers, ou les points et passes
+d'un même meneur, bougent ensemble. On tire N matchs (plusieurs milliers) pour les deux effectifs
+d'un coup, en matriciel :
+
+1. Corrélations (joueur, stat) estimées sur les matchs historiques communs de player_game_stats,
+   rétrécies vers 0 quand peu de matchs sont partagés, puis projetées sur une matrice PSD.
+2. Tirage gaussien corrélé (Cholesky), transformé en uniformes (copule gaussienne).
+3. Chaque colonne est ramenée à sa loi marginale ajustée (distributions.py), centrée sur la projection.
+
+Un seul run donne tous les props, combos (PRA) et paliers du match, et les échantillons
+servent aussi au calcul de probabilité jointe des parlays.
+"""
+
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+from cachetools import TTLCache
+from scipy.special import ndtr, gammaincc, betainc
+from sqlalchemy import text, bindparam
+
+from backend.distributions import distribution_cache, NORMAL, NEG_BINOMIAL, DISTRIBUTION_WINDOW_GAMES, \
+    COMBO_STATS, combo_columns_sql
+from backend.probability import milestone_grid
+
+SIM_STATS = ["points", "rebounds", "assists"]
+
+# Marchés combinés = somme de colonnes simulées (PRA, P+R, P+A, R+A)
+COMBO_MARKETS = COMBO_STATS
+
+SIM_DRAWS = int(os.getenv("SIM_DRAWS", "5000"))
+
+# Rétrécissement : corr * n / (n + CORRELATION_SHRINK_GAMES), n = nb de matchs communs
+CORRELATION_SHRINK_GAMES = 20
+MIN_SHARED_GAMES = 5
+
+# Valeur propre minimale de la projection PSD
+PSD_EPSILON = 1e-6
+
+# Corrélations (TTL 1h) et dernières simulations par match (lues par le moteur de parlays)
+_correlation_cache = TTLCache(maxsize=128, ttl=3600)
+_simulation_cache = TTLCache(maxsize=64, ttl=3 * 3600)
+_cache_lock = threading.Lock()
+
+
+def load_game_logs(engine, player_ids: list, window_games: int = DISTRIBUTION_WINDOW_GAMES) -> pd.DataFrame:
+    """Derniers matchs de chaque joueur (avec game_id pour aligner les matchs communs), combos inclus."""
+    q = text(f"""
+        SELECT player_id, game_id, {', '.join(SIM_STATS)}, {combo_columns_sql()}
+        FROM (
+            SELECT pgs.*, ROW_NUMBER() OVER (PARTITION BY player_id ORDER BY game_id DESC) AS rn
+            FROM player_game_stats pgs
+            WHERE player_id IN :ids
+        ) recent
+        WHERE rn <= :window
+    """).bindparams(bindparam("ids", expanding=True))
+    with engine.connect() as conn:
+        return pd.read_sql(q, conn, params={"ids": list(player_ids), "window": window_games})
+
+
+def nearest_correlation(corr: np.ndarray, eps: float = PSD_EPSILON) -> np.ndarray:
+    """Projection sur une matrice de corrélation valide (valeurs propres >= eps, diagonale = 1)."""
+    corr = (corr + corr.T) / 2
+    vals, vecs = np.linalg.eigh(corr)
+    if vals.min() >= eps:
+        return corr
+    fixed = (vecs * np.maximum(vals, eps)) @ vecs.T
+    d = np.sqrt(np.diag(fixed))
+    fixed = fixed / d[:, None] / d[None, :]
+    np.fill_diagonal(fixed, 1.0)
+    return fixed
+
+
+def estimate_correlation(logs: pd.DataFrame, keys: list) -> np.ndarray:
+    """
+    Matrice de corrélation (d, d) des colonnes (player_id, stat) sur les matchs communs.
+    Les combos (PRA...) sont des colonnes comme les autres : leur corrélation avec les stats simples est exacte.
+
+    Paires avec moins de MIN_SHARED_GAMES matchs communs : 0 (indépendance).
+    """
+    d = len(keys)
+    if logs.empty or d == 0:
+        return np.eye(d)
+
+    values = [c for c in SIM_STATS + list(COMBO_MARKETS) if c in logs.columns]
+    wide = logs.pivot_table(index="game_id", columns="player_id", values=values, aggfunc="first")
+    cols = [(stat, pid) for pid, stat in keys]
+    wide = wide.reindex(columns=pd.MultiIndex.from_tuples(cols))
+
+    present = wide.notna().to_numpy(dtype=float)
+    shared = present.T @ present  # nb de matchs communs par paire
+
+    corr = wide.corr(min_periods=MIN_SHARED_GAMES).to_numpy()
+    corr = np.nan_to_num(corr, nan=0.0)
+    corr = corr * (shared / (shared + CORRELATION_SHRINK_GAMES))
+    np.fill_diagonal(corr, 1.0)
+    return nearest_correlation(corr)
+
+
+def cholesky_factor(corr: np.ndarray) -> np.ndarray:
+    try:
+        return np.linalg.cholesky(corr)
+    except np.linalg.LinAlgError:
+        return np.linalg.cholesky(nearest_correlation(corr, eps=1e-4))
+
+
+def correlation_for(engine, keys: list) -> np.ndarray:
+    """Matrice de corrélation des colonnes (player_id, stat), en cache 1h par ensemble de colonnes."""
+    cache_key = tuple(keys)
+    with _cache_lock:
+        cached = _correlation_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    logs = load_game_logs(engine, sorted({pid for pid, _ in keys}))
+    corr = estimate_correlation(logs, keys)
+    with _cache_lock:
+        _correlation_cache[cache_key] = corr
+    return corr
+
+
+def _count_cdf_table(family: np.ndarray, mean: np.ndarray, r: np.ndarray) -> np.ndarray:
+    """CDF P(X <= k) pour k = 0..K-1 de chaque colonne de comptage (c, K)."""
+    mean = np.maximum(mean, 1e-9)
+    var = np.where(family == NEG_BINOMIAL, mean + mean ** 2 / np.where(r > 0, r, 1.0), mean)
+    k_max = int(np.ceil((mean + 10 * np.sqrt(var)).max())) + 10
+    k = np.arange(k_max, dtype=float)[None, :] + 1
+    poisson = gammaincc(k, mean[:, None])
+    rr = np.where(r > 0, r, 1.0)[:, None]
+    negbin = betainc(rr, k, rr / (rr + mean[:, None]))
+    return np.where((family == NEG_BINOMIAL)[:, None], negbin, poisson)
+
+
+def _to_marginals(z: np.ndarray, fits: list, means: np.ndarray) -> np.ndarray:
+    """
+    Normales corrélées (n, d) -> tirages entiers selon la loi marginale de chaque colonne.
+    Lois de comptage : inverse de CDF tabulée (searchsorted), bien plus rapide que ppf().
+    """
+    out = np.empty(z.shape, dtype=np.int16)
+    family = np.array([f["family"] for f in fits])
+    std = np.array([f["std"] for f in fits], dtype=float)
+    r = np.nan_to_num(np.array([f["r"] for f in fits], dtype=float))
+
+    col = family == NORMAL
+    if col.any():
+        vals = means[col] + std[col] * z[:, col]
+        out[:, col] = np.clip(np.rint(vals), 0, None)
+
+    count_cols = np.flatnonzero(family != NORMAL)
+    if count_cols.size:
+        u = ndtr(z[:, count_cols])
+        table = _count_cdf_table(family[count_cols], means[count_cols], r[count_cols])
+        for j, c in enumerate(count_cols):
+            out[:, c] = np.searchsorted(table[j], u[:, j], side="left")
+    return out
+
+
+class GameSimulation:
+    """Échantillons joints d'un match : (draws, d) avec d = (joueur, stat)."""
+
+    def __init__(self, game_id: str, keys: list, samples: np.ndarray, means: np.ndarray):
+        self.game_id = game_id
+        self.keys = keys
+        self.samples = samples
+        self.means = means
+        self.index = {k: i for i, k in enumerate(keys)}
+
+    @property
+    def draws(self) -> int:
+        return self.samples.shape[0]
+
+    def has(self, player_id: int, market: str) -> bool:
+        parts = COMBO_MARKETS.get(market, (market,))
+        return all((player_id, s) in self.index for s in parts)
+
+    def samples_for(self, player_id: int, market: str) -> np.ndarray | None:
+        """Tirages d'un marché (les combos sont la somme des colonnes, la covariance est incluse)."""
+        parts = COMBO_MARKETS.get(market, (market,))
+        cols = [self.index.get((player_id, s)) for s in parts]
+        if any(c is None for c in cols):
+            return None
+        if len(cols) == 1:
+            return self.samples[:, cols[0]]
+        return self.samples[:, cols].sum(axis=1, dtype=np.int32)
+
+    def prob_over(self, player_id: int, market: str, line: float) -> float | None:
+        s = self.samples_for(player_id, market)
+        return None if s is None else float(np.mean(s > line))
+
+    def prob_under(self, player_id: int, market: str, line: float) -> float | None:
+        s = self.samples_for(player_id, market)
+        return None if s is None else float(np.mean(s < line))
+
+    def hit_matrix(self, legs: list) -> np.ndarray | None:
+        """
+        Matrice booléenne (draws, n_legs) : chaque leg = (player_id, market, line, "Over"/"Under").
+        None si un leg n'est pas simulé.
+        """
+        cols = []
+        for player_id, market, line, side in legs:
+            s = self.samples_for(player_id, market)
+            if s is None:
+                return None
+            cols.append(s > line if side == "Over" else s < line)
+        return np.column_stack(cols) if cols else np.ones((self.draws, 0), dtype=bool)
+
+    def milestones(self, player_id: int, market: str) -> list:
+        s = self.samples_for(player_id, market)
+        if s is None:
+            return []
+        values, valid = milestone_grid([float(s.mean())], [market])
+        probs = (s[:, None] >= values[0][None, :]).mean(axis=0)
+        return [{"milestone": f"{m}+", "value": int(m), "probability": round(float(p) * 100, 1)}
+                for m, p, ok in zip(values[0], probs, valid[0]) if ok]
+
+    def summary(self) -> dict:
+        """{player_id: {market: {"mean", "p10", "p90", "milestones"}}} pour tous les marchés simulés."""
+        out = {}
+        player_ids = sorted({pid for pid, _ in self.keys})
+        for pid in player_ids:
+            markets = {}
+            for market in SIM_STATS + list(COMBO_MARKETS):
+                s = self.samples_for(pid, market)
+                if s is None:
+                    continue
+                p10, p90 = np.percentile(s, [10, 90])
+                markets[market] = {
+                    "mean": round(float(s.mean()), 1),
+                    "p10": float(p10),
+                    "p90": float(p90),
+                    "milestones": self.milestones(pid, market),
+                }
+            out[pid] = markets
+        return out
+
+
+def simulate_game(engine, game_id: str, player_ids: list, projections: dict | None = None,
+                  draws: int = SIM_DRAWS, seed: int | None = None) -> GameSimulation | None:
+    """
+    Simule `draws` matchs pour tous les joueurs (les deux effectifs) en un seul tirage matriciel.
+
+    Args:
+        projections: {(player_id, stat): projection} ; absente, None ou NaN -> moyenne historique ajustée
+    """
+    fits = distribution_cache.get(engine, player_ids)
+    keys = [(pid, stat) for pid in sorted({int(p) for p in player_ids if p}) for stat in SIM_STATS
+            if (pid, stat) in fits]
+    if not keys:
+        return None
+
+    projections = projections or {}
+    col_fits = [fits[k] for k in keys]
+    means = np.array([projections.get(k) for k in keys], dtype=float)  # None -> NaN
+    # Projection non calculée (le scan stocke None) : une moyenne NaN corromprait les tirages int16
+    means = np.where(np.isnan(means), [f["mean"] for f in col_fits], means)
+
+    chol = cholesky_factor(correlation_for(engine, keys))
+    rng = np.random.default_rng(seed)
+    z = rng.standard_normal((draws, len(keys))) @ chol.T
+    samples = _to_marginals(z, col_fits, means)
+
+    sim = GameSimulation(game_id, keys, samples, means)
+    with _cache_lock:
+        _simulation_cache[game_id] = sim
+    return sim
+
+
+def get_cached_simulation(game_id: str) -> GameSimulation | None:
+    with _cache_lock:
+        return _simulation_cache.get(game_id)
@@ -0,0 +1,60 @@
+"""
+URLs de base des services externes (The-Odds-API, stats.nba.com, ESPN, cdn.nba.com).
+
+Chaque URL est surchargeable par variable d'environnement, ce qui permet de pointer
+tout le projet vers le serveur de replay local (replay_server.py) pour les benchmarks
+et les tests de charge hors-ligne :
+
+    ODDS_API_BASE_URL=http://localhost:8765/odds
+    NBA_STATS_BASE_URL=http://localhost:8765/nba-stats
+    ...
+"""
+
+import os
+
+# Valeurs réelles (utilisées aussi par replay_server.py en mode record)
+DEFAULT_BASE_URLS = {
+    "odds": "https://api.the-odds-api.com/v4/sports/basketball_nba",
+    "nba-stats": "https://stats.nba.com/stats",
+    "nba-cdn": "https://cdn.nba.com/static/json",
+    "nba-com": "https://www.nba.com",
+    "espn-site": "https://site.web.api.espn.com/apis/site/v2/sports/basketball/nba",
+    "espn-site-alt": "https://site.api.espn.com/apis/site/v2/sports/basketball/nba",
+    "espn-fantasy": "https://site.web.api.espn.com/apis/fantasy/v2",
+}
+
+# Upstream -> variable d'environnement de surcharge
+ENV_OVERRIDES = {
+    "odds": "ODDS_API_BASE_URL",
+    "nba-stats": "NBA_STATS_BASE_URL",
+    "nba-cdn": "NBA_CDN_BASE_URL",
+    "nba-com": "NBA_COM_BASE_URL",
+    "espn-site": "ESPN_SITE_BASE_URL",
+    "espn-site-alt": "ESPN_SITE_ALT_BASE_URL",
+    "espn-fantasy": "ESPN_FANTASY_BASE_URL",
+}
+
+
+def base_url(upstream: str) -> str:
+    """URL de base d'un upstream (surcharge env sinon valeur réelle), sans slash final."""
+    override = os.getenv(ENV_OVERRIDES[upstream])
+    return (override or DEFAULT_BASE_URLS[upstream]).rstrip("/")
+
+
+ODDS_API_BASE_URL = base_url("odds")
+NBA_STATS_BASE_URL = base_url("nba-stats")
+NBA_CDN_BASE_URL = base_url("nba-cdn")
+NBA_COM_BASE_URL = base_url("nba-com")
+ESPN_SITE_BASE_URL = base_url("espn-site")
+ESPN_SITE_ALT_BASE_URL = base_url("espn-site-alt")
+ESPN_FANTASY_BASE_URL = base_url("espn-fantasy")
+
+
+def configure_nba_api():
+    """Redirige la librairie nba_api (stats + live) si NBA_STATS_BASE_URL / NBA_CDN_BASE_URL sont surchargées."""
+    if os.getenv(ENV_OVERRIDES["nba-stats"]):
+        from nba_api.stats.library.http import NBAStatsHTTP
+        NBAStatsHTTP.base_url = NBA_STATS_BASE_URL + "/{endpoint}"
+    if os.getenv(ENV_OVERRIDES["nba-cdn"]):
+        from nba_api.live.nba.library.http import NBALiveHTTP
+        NBALiveHTTP.base_url = NBA_CDN_BASE_URL + "/liveData/{endpoint}"
@@ -0,0 +1,169 @@
+"""
+Maintenance des partitions mensuelles de odds_snapshots.
+
+1. Crée à l'avance les partitions du mois courant et du mois suivant.
+2. Vide la partition DEFAULT : chaque mois qui y a des lignes reçoit sa partition
+   (ensure_odds_snapshot_partition y déplace les lignes, cf. migration 013).
+3. Compacte les partitions plus vieilles que ODDS_RAW_RETENTION_MONTHS :
+   open/close/high/low par (game, player, market, bookmaker) dans odds_snapshot_bars,
+   puis DETACH + DROP de la partition (les lignes brutes disparaissent).
+"""
+import os
+import re
+import json
+from datetime import date
+
+import psycopg2
+
+# --- CONFIGURATION ---
+DB_PARAMS = {
+    "dbname": "jimmy_nba_db",
+    "user": "jimmy_user",
+    "password": "secure_password_123",
+    "host": "localhost",
+    "port": "5432"
+}
+
+PARTITION_RE = re.compile(r"^odds_snapshots_y(\d{4})m(\d{2})$")
+
+COMPACT_SQL = """
+    INSERT INTO odds_snapshot_bars (
+        game_id, player_id, market, bookmaker, period_start, first_fetched_at, last_fetched_at, samples,
+        line_open, line_close, line_high, line_low,
+        over_open, over_close, over_high, over_low,
+        under_open, under_close, under_high, under_low
+    )
+    SELECT game_id, player_id, market, bookmaker, %s, MIN(fetched_at), MAX(fetched_at), COUNT(*),
+           (ARRAY_AGG(line ORDER BY fetched_at ASC))[1], (ARRAY_AGG(line ORDER BY fetched_at DESC))[1],
+           MAX(line), MIN(line),
+           (ARRAY_AGG(price_over ORDER BY fetched_at ASC))[1], (ARRAY_AGG(price_over ORDER BY fetched_at DESC))[1],
+           MAX(price_over), MIN(price_over),
+           (ARRAY_AGG(price_under ORDER BY fetched_at ASC))[1], (ARRAY_AGG(price_under ORDER BY fetched_at DESC))[1],
+           MAX(price_under), MIN(price_under)
+    FROM {partition}
+    WHERE player_id IS NOT NULL
+    GROUP BY game_id, player_id, market, bookmaker
+    ON CONFLICT (game_id, player_id, market, bookmaker, period_start) DO UPDATE SET
+        first_fetched_at = EXCLUDED.first_fetched_at,
+        last_fetched_at = EXCLUDED.last_fetched_at,
+        samples = EXCLUDED.samples,
+        line_open = EXCLUDED.line_open, line_close = EXCLUDED.line_close,
+        line_high = EXCLUDED.line_high, line_low = EXCLUDED.line_low,
+        over_open = EXCLUDED.over_open, over_close = EXCLUDED.over_close,
+        over_high = EXCLUDED.over_high, over_low = EXCLUDED.over_low,
+        under_open = EXCLUDED.under_open, under_close = EXCLUDED.under_close,
+        under_high = EXCLUDED.under_high, under_low = EXCLUDED.under_low
+"""
+
+
+def start_ingestion_run(cur, source: str, scope: str = None, version_tag: str = None):
+    cur.execute(
+        """
+        INSERT INTO ingestion_runs (source, scope, version_tag, status, started_at)
+        VALUES (%s, %s, %s, 'running', CURRENT_TIMESTAMP)
+        RETURNING id
+        """,
+        (source, scope, version_tag)
+    )
+    return cur.fetchone()[0]
+
+
+def finish_ingestion_run(cur, run_id: int, status: str = 'success', meta: dict | None = None):
+    cur.execute(
+        """
+        UPDATE ingestion_runs
+        SET status = %s,
+            ended_at = CURRENT_TIMESTAMP,
+            meta = %s,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE id = %s
+        """,
+        (status, json.dumps(meta or {}), run_id)
+    )
+
+
+def _add_months(d: date, months: int) -> date:
+    total = d.year * 12 + (d.month - 1) + months
+    return date(total // 12, total % 12 + 1, 1)
+
+
+def list_partitions(cur):
+    """Retourne [(nom, mois)] des partitions mensuelles attachées à odds_snapshots."""
+    cur.execute("""
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+        WHERE p.relname = 'odds_snapshots'
+    """)
+    out = []
+    for (name,) in cur.fetchall():
+        m = PARTITION_RE.match(name)
+        if m:
+            out.append((name, date(int(m.group(1)), int(m.group(2)), 1)))
+    return sorted(out, key=lambda x: x[1])
+
+
+def compact_odds_snapshots(retention_months: int = 2, dry_run: bool = False):
+    conn = psycopg2.connect(**DB_PARAMS)
+    cur = conn.cursor()
+    run_id = start_ingestion_run(cur, source="odds_compaction", scope=f"retention_{retention_months}m")
+    conn.commit()
+
+    compacted = []
+    try:
+        # 1. Partitions à venir (évite que les écritures tombent dans la partition DEFAULT)
+        this_month = date.today().replace(day=1)
+        for m in (this_month, _add_months(this_month, 1)):
+            cur.execute("SELECT ensure_odds_snapshot_partition(%s)", (m,))
+        conn.commit()
+
+        # 2. Mois tombés dans DEFAULT (partition manquante au moment de l'écriture)
+        cur.execute("""
+            SELECT DISTINCT date_trunc('month', fetched_at)::date
+            FROM odds_snapshots_default
+            ORDER BY 1
+        """)
+        default_months = [m for (m,) in cur.fetchall()]
+        for m in default_months:
+            cur.execute("SELECT ensure_odds_snapshot_partition(%s)", (m,))
+            conn.commit()
+            print(f"📦 Lignes de {m:%Y-%m} sorties de la partition DEFAULT.")
+
+        # 3. Compaction des partitions trop vieilles (une transaction par partition)
+        cutoff = _add_months(this_month, -retention_months)
+        for name, month in list_partitions(cur):
+            if month >= cutoff:
+                continue
+            print(f"🗜️ Compaction de {name} ({month:%Y-%m})...")
+            if dry_run:
+                compacted.append({"partition": name, "bars": None})
+                continue
+
+            cur.execute(COMPACT_SQL.format(partition=name), (month,))
+            bars = cur.rowcount
+            cur.execute(f"ALTER TABLE odds_snapshots DETACH PARTITION {name}")
+            cur.execute(f"DROP TABLE {name}")
+            conn.commit()
+            compacted.append({"partition": name, "bars": bars})
+            print(f"   ✅ {bars} barres OHLC écrites, partition supprimée.")
+
+        finish_ingestion_run(cur, run_id, status="success",
+                             meta={"compacted": compacted, "drained_default_months": [str(m) for m in default_months],
+                                   "dry_run": dry_run})
+        conn.commit()
+        print(f"🎉 Compaction terminée : {len(compacted)} partition(s).")
+    except Exception as e:
+        conn.rollback()
+        finish_ingestion_run(cur, run_id, status="failed", meta={"error": str(e), "compacted": compacted})
+        conn.commit()
+        print(f"❌ Erreur compaction odds_snapshots : {e}")
+    finally:
+        cur.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    retention = int(os.getenv("ODDS_RAW_RETENTION_MONTHS", "2"))
+    dry = os.getenv("ODDS_COMPACT_DRY_RUN", "0") == "1"
+    compact_odds_snapshots(retention_months=retention, dry_run=dry)
@@ -0,0 +1,167 @@
+"""
+Calcul des splits avec / sans coéquipier (player_on_off_splits) depuis player_game_stats.
+
+🔄 Redistribution d'usage
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+Pour chaque (joueur, coéquipier) d'une même équipe (équipe lue dans matchup) :
+- "avec" = matchs du joueur où le coéquipier a une ligne,
+- "sans" = matchs du joueur où le coéquipier n'a PAS de ligne, pendant son passage dans l'équipe.
+Boost = moyenne sans / moyenne avec, rétréci vers 1.00 quand peu de matchs "sans".
+
+Seuls les coéquipiers à gros temps de jeu sont considérés comme "absents" possibles.
+Le backend (offensive_impact.get_team_offensive_boosts) remplace ainsi le +15% forfaitaire de TEAM_STARS.
+"""
+import os
+import json
+
+import psycopg2
+
+# --- CONFIGURATION ---
+DB_PARAMS = {
+    "dbname": "jimmy_nba_db",
+    "user": "jimmy_user",
+    "password": "secure_password_123",
+    "host": "localhost",
+    "port": "5432"
+}
+
+# Derniers matchs de chaque équipe pris en compte
+ON_OFF_WINDOW_GAMES = int(os.getenv("ON_OFF_WINDOW_GAMES", "82"))
+# Minutes moyennes minimales pour qu'une absence compte (rotation)
+ABSENT_MIN_MINUTES = 20
+MIN_GAMES_WITH = 5
+MIN_GAMES_WITHOUT = 2
+# Rétrécissement : boost = 1 + (ratio - 1) * n / (n + ON_OFF_SHRINK_GAMES), n = matchs sans
+ON_OFF_SHRINK_GAMES = 5
+# Bornes des multiplicateurs
+MIN_BOOST = 0.7
+MAX_BOOST = 1.5
+
+SPLITS_SQL = """
+    WITH logs AS (
+        SELECT pgs.player_id, pgs.game_id, g.game_date, UPPER(LEFT(TRIM(pgs.matchup), 3)) AS team_code,
+               pgs.points, pgs.rebounds, pgs.assists, pgs.minutes_played
+        FROM player_game_stats pgs
+        JOIN game g ON g.id = pgs.game_id
+        WHERE pgs.matchup IS NOT NULL
+    ),
+    team_games AS (
+        SELECT team_code, game_id,
+               ROW_NUMBER() OVER (PARTITION BY team_code ORDER BY game_date DESC, game_id DESC) AS rn
+        FROM (SELECT DISTINCT team_code, game_id, game_date FROM logs) t
+    ),
+    windowed AS (
+        SELECT l.*
+        FROM logs l
+        JOIN team_games tg ON tg.team_code = l.team_code AND tg.game_id = l.game_id
+        WHERE tg.rn <= %(window)s
+    ),
+    tenure AS (
+        -- Passage de chaque joueur de rotation dans l'équipe (hors de cette période, il n'est pas "absent")
+        SELECT player_id, team_code, MIN(game_date) AS first_date, MAX(game_date) AS last_date
+        FROM windowed
+        GROUP BY player_id, team_code
+        HAVING AVG(COALESCE(minutes_played, 0)) >= %(min_minutes)s
+    ),
+    pairs AS (
+        SELECT w.team_code, w.player_id, t.player_id AS absent_player_id,
+               w.points, w.rebounds, w.assists,
+               (x.player_id IS NOT NULL) AS with_teammate
+        FROM windowed w
+        JOIN tenure t ON t.team_code = w.team_code AND t.player_id <> w.player_id
+                     AND w.game_date BETWEEN t.first_date AND t.last_date
+        LEFT JOIN windowed x ON x.game_id = w.game_id AND x.player_id = t.player_id
+    ),
+    splits AS (
+        SELECT team_code, player_id, absent_player_id,
+               COUNT(*) FILTER (WHERE with_teammate) AS games_with,
+               COUNT(*) FILTER (WHERE NOT with_teammate) AS games_without,
+               AVG(points) FILTER (WHERE with_teammate) AS points_with,
+               AVG(points) FILTER (WHERE NOT with_teammate) AS points_without,
+               AVG(rebounds) FILTER (WHERE with_teammate) AS rebounds_with,
+               AVG(rebounds) FILTER (WHERE NOT with_teammate) AS rebounds_without,
+               AVG(assists) FILTER (WHERE with_teammate) AS assists_with,
+               AVG(assists) FILTER (WHERE NOT with_teammate) AS assists_without
+        FROM pairs
+        GROUP BY team_code, player_id, absent_player_id
+    )
+    INSERT INTO player_on_off_splits (
+        team_code, player_id, absent_player_id, games_with, games_without,
+        points_with, points_without, rebounds_with, rebounds_without, assists_with, assists_without,
+        points_boost, rebounds_boost, assists_boost, computed_at
+    )
+    SELECT team_code, player_id, absent_player_id, games_with, games_without,
+           points_with, points_without, rebounds_with, rebounds_without, assists_with, assists_without,
+           {points_boost}, {rebounds_boost}, {assists_boost}, CURRENT_TIMESTAMP
+    FROM splits
+    WHERE games_with >= %(min_with)s AND games_without >= %(min_without)s
+"""
+
+
+def _boost_sql(stat: str) -> str:
+    ratio = f"COALESCE({stat}_without / NULLIF({stat}_with, 0), 1.0)"
+    shrunk = f"1 + ({ratio} - 1) * games_without::float / (games_without + %(shrink)s)"
+    return f"LEAST(GREATEST({shrunk}, %(min_boost)s), %(max_boost)s)"
+
+
+def start_ingestion_run(cur, source: str, scope: str = None, version_tag: str = None):
+    cur.execute(
+        """
+        INSERT INTO ingestion_runs (source, scope, version_tag, status, started_at)
+        VALUES (%s, %s, %s, 'running', CURRENT_TIMESTAMP)
+        RETURNING id
+        """,
+        (source, scope, version_tag)
+    )
+    return cur.fetchone()[0]
+
+
+def finish_ingestion_run(cur, run_id: int, status: str = 'success', meta: dict | None = None):
+    cur.execute(
+        """
+        UPDATE ingestion_runs
+        SET status = %s,
+            ended_at = CURRENT_TIMESTAMP,
+            meta = %s,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE id = %s
+        """,
+        (status, json.dumps(meta or {}), run_id)
+    )
+
+
+def compute_on_off_splits(window_games: int = ON_OFF_WINDOW_GAMES):
+    conn = psycopg2.connect(**DB_PARAMS)
+    cur = conn.cursor()
+    run_id = start_ingestion_run(cur, source="on_off_splits", scope=f"window_{window_games}g")
+    conn.commit()
+
+    try:
+        sql = SPLITS_SQL.format(points_boost=_boost_sql("points"), rebounds_boost=_boost_sql("rebounds"),
+                                assists_boost=_boost_sql("assists"))
+        # Remplacement complet dans une seule transaction : les lecteurs voient l'ancienne table jusqu'au commit
+        cur.execute("DELETE FROM player_on_off_splits")
+        cur.execute(sql, {
+            "window": window_games, "min_minutes": ABSENT_MIN_MINUTES,
+            "min_with": MIN_GAMES_WITH, "min_without": MIN_GAMES_WITHOUT,
+            "shrink": ON_OFF_SHRINK_GAMES, "min_boost": MIN_BOOST, "max_boost": MAX_BOOST,
+        })
+        rows = cur.rowcount
+        cur.execute("SELECT COUNT(DISTINCT (team_code, absent_player_id)) FROM player_on_off_splits")
+        absents = cur.fetchone()[0]
+
+        finish_ingestion_run(cur, run_id, status="success", meta={"rows": rows, "absent_players": absents})
+        conn.commit()
+        print(f"🎉 Splits on/off : {rows} paires (joueur, absent), {absents} absents couverts.")
+    except Exception as e:
+        conn.rollback()
+        finish_ingestion_run(cur, run_id, status="failed", meta={"error": str(e)})
+        conn.commit()
+        print(f"❌ Erreur calcul splits on/off : {e}")
+    finally:
+        cur.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    compute_on_off_splits()
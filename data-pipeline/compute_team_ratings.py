@@ -0,0 +1,228 @@
+"""
+Calcul des ratings DvP (Defense vs Position) et Pace depuis nos propres logs (player_game_stats).
+
+Remplace les constantes saisies à la main de backend/defense_ratings.py :
+1. Adversaire lu dans matchup ("LAL @ BOS" / "LAL vs. BOS" -> BOS), poste lu dans player.position.
+2. Fenêtre glissante : les N derniers matchs de chaque équipe (ROW_NUMBER / DENSE_RANK en SQL).
+3. DvP = stat concédée par poste / moyenne de la ligue pour ce poste (points, rebonds, passes, 3 pts) ;
+   Pace = total de points des matchs de l'équipe / moyenne de la ligue (proxy : pas de possessions en base).
+   Les deux sont rétrécis vers 1.00 quand l'échantillon est petit.
+4. Écriture d'une nouvelle version complète (team_rating_versions), activée en fin de transaction :
+   le backend la recharge à chaud (defense_ratings.refresh_team_ratings).
+"""
+import os
+import json
+
+import psycopg2
+
+# --- CONFIGURATION ---
+DB_PARAMS = {
+    "dbname": "jimmy_nba_db",
+    "user": "jimmy_user",
+    "password": "secure_password_123",
+    "host": "localhost",
+    "port": "5432"
+}
+
+# Matchs par équipe dans la fenêtre glissante
+RATINGS_WINDOW_GAMES = int(os.getenv("RATINGS_WINDOW_GAMES", "25"))
+# Lignes joueur ignorées sous ce temps de jeu (garbage time, blessure en cours de match)
+DVP_MIN_MINUTES = 10
+# Rétrécissement vers 1.00 : équivalent de N lignes (DvP) / N matchs (Pace) à la moyenne de la ligue
+DVP_SHRINK_SAMPLES = 20
+PACE_SHRINK_GAMES = 5
+# Versions conservées (active + historiques)
+KEEP_VERSIONS = 5
+
+# Même normalisation que defense_ratings.get_defensive_factor (G-F -> G -> SG, etc.)
+POSITION_SQL = """
+    CASE
+        WHEN split_part(UPPER(COALESCE(p.position, '')), '-', 1) IN ('PG', 'SG', 'SF', 'PF', 'C')
+            THEN split_part(UPPER(p.position), '-', 1)
+        WHEN split_part(UPPER(COALESCE(p.position, '')), '-', 1) LIKE '%%G%%' THEN 'SG'
+        WHEN split_part(UPPER(COALESCE(p.position, '')), '-', 1) LIKE '%%F%%' THEN 'SF'
+        WHEN split_part(UPPER(COALESCE(p.position, '')), '-', 1) LIKE '%%C%%' THEN 'C'
+    END
+"""
+
+# Stats avec un facteur DvP propre (points -> colonne "factor", les autres -> "<stat>_factor")
+DVP_STATS = ("points", "rebounds", "assists", "three_points_made")
+
+
+def _dvp_factor_sql(stat: str) -> str:
+    """Moyenne concédée rétrécie vers la ligue, rapportée à la ligue (NULL si la ligue ne produit pas la stat)."""
+    return (f"(a.{stat}_avg * a.samples + l.{stat}_avg * %(shrink)s) / (a.samples + %(shrink)s) "
+            f"/ NULLIF(l.{stat}_avg, 0)")
+
+
+DVP_FACTORS_SQL = ",\n           ".join(_dvp_factor_sql(s) for s in DVP_STATS)
+
+DVP_SQL = f"""
+    WITH logs AS (
+        SELECT pgs.game_id, g.game_date,
+               UPPER(RIGHT(TRIM(pgs.matchup), 3)) AS opp_code,
+               {POSITION_SQL} AS position,
+               pgs.points, pgs.rebounds, pgs.assists, pgs.three_points_made, pgs.minutes_played
+        FROM player_game_stats pgs
+        JOIN game g ON g.id = pgs.game_id
+        JOIN player p ON p.id = pgs.player_id
+        WHERE pgs.matchup IS NOT NULL
+    ),
+    defense_games AS (
+        SELECT opp_code, game_id,
+               ROW_NUMBER() OVER (PARTITION BY opp_code ORDER BY game_date DESC, game_id DESC) AS rn
+        FROM (SELECT DISTINCT opp_code, game_id, game_date FROM logs) d
+    ),
+    windowed AS (
+        SELECT l.opp_code, l.position, l.points, l.rebounds, l.assists, l.three_points_made
+        FROM logs l
+        JOIN defense_games d ON d.opp_code = l.opp_code AND d.game_id = l.game_id
+        WHERE d.rn <= %(window)s
+          AND l.position IS NOT NULL
+          AND COALESCE(l.minutes_played, 0) >= %(min_minutes)s
+    ),
+    allowed AS (
+        SELECT opp_code AS team_code, position, COUNT(*) AS samples,
+               {", ".join(f"AVG({s}) AS {s}_avg" for s in DVP_STATS)}
+        FROM windowed
+        GROUP BY opp_code, position
+    ),
+    league AS (
+        SELECT position, {", ".join(f"AVG({s}) AS {s}_avg" for s in DVP_STATS)}
+        FROM windowed
+        GROUP BY position
+    )
+    INSERT INTO dvp_ratings (version_id, team_code, position, factor,
+                             {", ".join(f"{s}_factor" for s in DVP_STATS[1:])}, allowed_avg, samples)
+    SELECT %(version_id)s, a.team_code, a.position,
+           {DVP_FACTORS_SQL},
+           a.points_avg, a.samples
+    FROM allowed a
+    JOIN league l ON l.position = a.position
+    WHERE l.points_avg > 0
+"""
+
+PACE_SQL = """
+    WITH team_points AS (
+        SELECT pgs.game_id, g.game_date, UPPER(LEFT(TRIM(pgs.matchup), 3)) AS team_code, SUM(pgs.points) AS pts
+        FROM player_game_stats pgs
+        JOIN game g ON g.id = pgs.game_id
+        WHERE pgs.matchup IS NOT NULL
+        GROUP BY pgs.game_id, g.game_date, UPPER(LEFT(TRIM(pgs.matchup), 3))
+    ),
+    complete_games AS (
+        -- Seulement les matchs où les deux équipes ont des lignes (sinon le total est tronqué)
+        SELECT game_id, SUM(pts) AS total
+        FROM team_points
+        GROUP BY game_id
+        HAVING COUNT(*) = 2
+    ),
+    team_games AS (
+        SELECT t.team_code, c.total,
+               ROW_NUMBER() OVER (PARTITION BY t.team_code ORDER BY t.game_date DESC, t.game_id DESC) AS rn
+        FROM team_points t
+        JOIN complete_games c ON c.game_id = t.game_id
+    ),
+    windowed AS (
+        SELECT team_code, total FROM team_games WHERE rn <= %(window)s
+    ),
+    league AS (
+        SELECT AVG(total) AS league_avg FROM windowed
+    )
+    INSERT INTO pace_ratings (version_id, team_code, factor, avg_game_points, games)
+    SELECT %(version_id)s, w.team_code,
+           (AVG(w.total) * COUNT(*) + l.league_avg * %(shrink)s) / (COUNT(*) + %(shrink)s) / l.league_avg,
+           AVG(w.total), COUNT(*)
+    FROM windowed w
+    CROSS JOIN league l
+    WHERE l.league_avg > 0
+    GROUP BY w.team_code, l.league_avg
+"""
+
+
+def start_ingestion_run(cur, source: str, scope: str = None, version_tag: str = None):
+    cur.execute(
+        """
+        INSERT INTO ingestion_runs (source, scope, version_tag, status, started_at)
+        VALUES (%s, %s, %s, 'running', CURRENT_TIMESTAMP)
+        RETURNING id
+        """,
+        (source, scope, version_tag)
+    )
+    return cur.fetchone()[0]
+
+
+def finish_ingestion_run(cur, run_id: int, status: str = 'success', meta: dict | None = None):
+    cur.execute(
+        """
+        UPDATE ingestion_runs
+        SET status = %s,
+            ended_at = CURRENT_TIMESTAMP,
+            meta = %s,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE id = %s
+        """,
+        (status, json.dumps(meta or {}), run_id)
+    )
+
+
+def compute_team_ratings(window_games: int = RATINGS_WINDOW_GAMES):
+    conn = psycopg2.connect(**DB_PARAMS)
+    cur = conn.cursor()
+    run_id = start_ingestion_run(cur, source="team_ratings", scope=f"window_{window_games}g")
+    conn.commit()
+
+    try:
+        cur.execute(
+            "INSERT INTO team_rating_versions (window_games, status) VALUES (%s, 'building') RETURNING id",
+            (window_games,)
+        )
+        version_id = cur.fetchone()[0]
+
+        cur.execute(DVP_SQL, {"version_id": version_id, "window": window_games,
+                              "min_minutes": DVP_MIN_MINUTES, "shrink": DVP_SHRINK_SAMPLES})
+        dvp_rows = cur.rowcount
+        cur.execute(PACE_SQL, {"version_id": version_id, "window": window_games, "shrink": PACE_SHRINK_GAMES})
+        pace_rows = cur.rowcount
+
+        if dvp_rows == 0 and pace_rows == 0:
+            raise RuntimeError("aucune ligne calculée (player_game_stats vide ou matchup manquant)")
+
+        cur.execute("SELECT COUNT(DISTINCT game_id) FROM player_game_stats WHERE matchup IS NOT NULL")
+        games_count = cur.fetchone()[0]
+
+        # Activation dans la même transaction : le backend ne voit jamais une version partielle
+        cur.execute("UPDATE team_rating_versions SET status = 'superseded' WHERE status = 'active'")
+        cur.execute(
+            """
+            UPDATE team_rating_versions
+            SET status = 'active', activated_at = CURRENT_TIMESTAMP, games_count = %s, meta = %s
+            WHERE id = %s
+            """,
+            (games_count, json.dumps({"dvp_rows": dvp_rows, "pace_rows": pace_rows}), version_id)
+        )
+        cur.execute(
+            """
+            DELETE FROM team_rating_versions
+            WHERE status = 'superseded'
+              AND id NOT IN (SELECT id FROM team_rating_versions ORDER BY id DESC LIMIT %s)
+            """,
+            (KEEP_VERSIONS,)
+        )
+
+        meta = {"version_id": version_id, "dvp_rows": dvp_rows, "pace_rows": pace_rows, "games": games_count}
+        finish_ingestion_run(cur, run_id, status="success", meta=meta)
+        conn.commit()
+        print(f"🎉 Ratings v{version_id} actifs : {dvp_rows} lignes DvP, {pace_rows} équipes Pace ({games_count} matchs).")
+    except Exception as e:
+        conn.rollback()
+        finish_ingestion_run(cur, run_id, status="failed", meta={"error": str(e)})
+        conn.commit()
+        print(f"❌ Erreur calcul ratings DvP / Pace : {e}")
+    finally:
+        cur.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    compute_team_ratings()
@@ -1,13 +1,8 @@
 """Fetch des cotes The-Odds-API et écriture dans odds_snapshots avec traçabilité ingestion_runs."""
 import os
-import sys
-from pathlib import Path
 import json
 
-# Ensure project root on PYTHONPATH so `backend` imports work when called from data-pipeline
-ROOT_DIR = Path(__file__).resolve().parent.parent
-if str(ROOT_DIR) not in sys.path:
-    sys.path.append(str(ROOT_DIR))
+import pipeline_bootstrap  # noqa: F401 (racine du projet sur le PYTHONPATH pour `backend`)
 
 from datetime import datetime, timedelta
 from typing import Optional
@@ -42,7 +37,9 @@ def finish_ingestion_run(db, run_id: int, status: str = "success", meta: Optiona
     db.commit()
 
 
-def fetch_odds_for_upcoming_games(days_ahead: int = 2, ttl_hours: int = 4, version_tag: Optional[str] = None):
+def fetch_odds_for_upcoming_games(days_ahead: int = 2, ttl_hours: Optional[float] = None,
+                                  version_tag: Optional[str] = None):
+    """ttl_hours=None : TTL adaptatif par match (long loin du tip-off, court à l'approche, figé après)."""
     provider = BettingOddsProvider()
     if provider.quota_exceeded or not provider.api_key:
         print("❌ Pas de clé The-Odds-API disponible.")
@@ -58,24 +55,25 @@ def fetch_odds_for_upcoming_games(days_ahead: int = 2, ttl_hours: int = 4, versi
                 models.GameSchedule.game_date <= until
             ).all()
 
-            success = 0
-            skipped = 0
-            for g in games:
-                ok = provider.fetch_odds_snapshots_for_game(
-                    db,
-                    game_id=g.nba_game_id,
-                    home_code=g.home_team_code,
-                    away_code=g.away_team_code,
-                    ingestion_run_id=run_id,
-                    ttl_hours=ttl_hours,
-                )
-                if ok:
-                    success += 1
-                else:
-                    skipped += 1
+            # Fetch concurrent sur tout le slate (ODDS_MAX_CONCURRENCY), écriture séquentielle
+            write_stats = {"inserted": 0, "unchanged": 0}
+            success, skipped = provider.fetch_odds_snapshots_for_games(
+                db,
+                games,
+                ingestion_run_id=run_id,
+                ttl_hours=ttl_hours,
+                stats=write_stats,
+            )
 
-            finish_ingestion_run(db, run_id, status="success", meta={"success": success, "skipped": skipped, "games": len(games)})
-            print(f"📥 Odds fetch terminé. Success: {success}, Skipped: {skipped}, Games: {len(games)}")
+            finish_ingestion_run(db, run_id, status="success", meta={
+                "success": success,
+                "skipped": skipped,
+                "games": len(games),
+                "rows_inserted": write_stats["inserted"],
+                "rows_unchanged": write_stats["unchanged"],
+            })
+            print(f"📥 Odds fetch terminé. Success: {success}, Skipped: {skipped}, Games: {len(games)}, "
+                  f"Lignes écrites: {write_stats['inserted']}, Inchangées: {write_stats['unchanged']}")
         except Exception as e:
             db.rollback()
             finish_ingestion_run(db, run_id, status="failed", meta={"error": str(e)})
@@ -84,6 +82,8 @@ def fetch_odds_for_upcoming_games(days_ahead: int = 2, ttl_hours: int = 4, versi
 
 if __name__ == "__main__":
     days = int(os.getenv("ODDS_DAYS_AHEAD", "2"))
-    ttl = int(os.getenv("ODDS_TTL_HOURS", "4"))
+    # ODDS_TTL_FORCE_HOURS force un TTL fixe (sinon TTL adaptatif, ODDS_TTL_HOURS = repli)
+    forced = os.getenv("ODDS_TTL_FORCE_HOURS")
+    ttl = float(forced) if forced else None
     tag = os.getenv("ODDS_VERSION_TAG")
     fetch_odds_for_upcoming_games(days_ahead=days, ttl_hours=ttl, version_tag=tag)
@@ -0,0 +1,20 @@
+"""
+Amorçage commun des scripts data-pipeline.
+
+- À l'import : ajoute la racine du projet au PYTHONPATH pour que `from backend...` fonctionne
+  quand un script est lancé depuis data-pipeline/ (aucun autre effet de bord).
+- configure_upstreams() : à appeler depuis le bloc `__main__` des scripts uniquement. Importer un script
+  (ex: main.py importe populate_stats) ne doit pas reconfigurer la session nba_api globale.
+"""
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.append(str(ROOT_DIR))
+
+
+def configure_upstreams():
+    """Redirige nba_api vers les URLs surchargées (NBA_STATS_BASE_URL / NBA_CDN_BASE_URL), cf. backend/upstreams.py."""
+    from backend.upstreams import configure_nba_api
+    configure_nba_api()
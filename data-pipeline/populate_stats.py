@@ -3,6 +3,8 @@ from nba_api.stats.endpoints import playergamelog
 import hashlib
 import json
 
+import pipeline_bootstrap
+
 # --- CONFIGURATION ---
 DB_PARAMS = {
     "dbname": "jimmy_nba_db",
@@ -178,5 +180,8 @@ def sync_player_stats(nba_player_id, season='2024-25', limit=82):
         return (0, 0, 0)
 
 if __name__ == "__main__":
+    # nba_api redirigé seulement quand le script est lancé (pas à l'import depuis le backend)
+    pipeline_bootstrap.configure_upstreams()
+
     # Test avec Luka
     sync_player_stats(1629029, limit=5)
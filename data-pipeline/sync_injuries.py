@@ -21,6 +21,10 @@ import requests
 from datetime import datetime, timedelta
 import json
 
+import pipeline_bootstrap  # noqa: F401 (racine du projet sur le PYTHONPATH pour `backend`)
+
+from backend.upstreams import ESPN_SITE_BASE_URL, NBA_COM_BASE_URL
+
 # Configuration BDD via variables d'environnement (fallback valeurs locales)
 DB_PARAMS = {
     "dbname": os.getenv("DB_NAME", "jimmy_nba_db"),
@@ -56,7 +60,7 @@ def fetch_espn_injuries():
 
     try:
         # ESPN Injury Report API (non officielle mais très utilisée)
-        url = "https://site.web.api.espn.com/apis/site/v2/sports/basketball/nba/teams"
+        url = f"{ESPN_SITE_BASE_URL}/teams"
 
         response = requests.get(url, timeout=10)
         response.raise_for_status()
@@ -72,7 +76,7 @@ def fetch_espn_injuries():
                 team_abbr = team.get('abbreviation')
 
                 # Récupérer le roster avec injuries
-                roster_url = f"https://site.web.api.espn.com/apis/site/v2/sports/basketball/nba/teams/{team_id}/roster"
+                roster_url = f"{ESPN_SITE_BASE_URL}/teams/{team_id}/roster"
 
                 try:
                     roster_response = requests.get(roster_url, timeout=5)
@@ -128,7 +132,7 @@ def fetch_nba_injuries():
 
     try:
         # Cette API est moins documentée, on essaie plusieurs endpoints
-        url = "https://www.nba.com/stats/api/injuries/data"
+        url = f"{NBA_COM_BASE_URL}/stats/api/injuries/data"
 
         response = requests.get(url, timeout=10, headers={
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
@@ -7,6 +7,10 @@ import psycopg2
 import requests
 from datetime import datetime, timedelta
 
+import pipeline_bootstrap  # noqa: F401 (racine du projet sur le PYTHONPATH pour `backend`)
+
+from backend.upstreams import ESPN_FANTASY_BASE_URL, ESPN_SITE_ALT_BASE_URL
+
 DB_PARAMS = {
     "dbname": "jimmy_nba_db",
     "user": "jimmy_user",
@@ -35,7 +39,7 @@ def fetch_espn_injuries_simple():
 
     try:
         # Endpoint agrégé ESPN (plus rapide)
-        url = "https://site.web.api.espn.com/apis/fantasy/v2/games/fba/seasons/2025/segments/0/leagues/default?view=kona_player_info"
+        url = f"{ESPN_FANTASY_BASE_URL}/games/fba/seasons/2025/segments/0/leagues/default?view=kona_player_info"
 
         headers = {
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
@@ -47,7 +51,7 @@ def fetch_espn_injuries_simple():
         if not response.ok:
             # Fallback : essayer l'ancien endpoint
             print("   Tentative endpoint alternatif...")
-            url = "https://site.api.espn.com/apis/site/v2/sports/basketball/nba/teams"
+            url = f"{ESPN_SITE_ALT_BASE_URL}/teams"
             response = requests.get(url, headers=headers, timeout=15)
 
         if response.ok:
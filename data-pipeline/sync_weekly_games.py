@@ -14,6 +14,9 @@ Source : nba_api (officiel NBA.com)
 
 import psycopg2
 from datetime import datetime, timedelta
+
+import pipeline_bootstrap
+
 from nba_api.live.nba.endpoints.scoreboard import ScoreBoard
 from nba_api.stats.endpoints import leaguegamefinder
 import time
@@ -283,6 +286,9 @@ def get_weekly_games_from_db():
 
 
 if __name__ == "__main__":
+    # nba_api redirigé seulement quand le script est lancé (pas à l'import depuis le backend)
+    pipeline_bootstrap.configure_upstreams()
+
     print("=" * 80)
     print("🏀 TEST DU MODULE WEEKLY_GAMES")
     print("=" * 80)
@@ -9,6 +9,10 @@ import requests
 from datetime import datetime, timedelta
 import json
 
+import pipeline_bootstrap  # noqa: F401 (racine du projet sur le PYTHONPATH pour `backend`)
+
+from backend.upstreams import NBA_CDN_BASE_URL
+
 # Configuration BDD
 DB_PARAMS = {
     "dbname": "jimmy_nba_db",
@@ -35,10 +39,10 @@ def fetch_weekly_games_http():
 
         try:
             # API officielle NBA.com (format v2)
-            url = f"https://cdn.nba.com/static/json/liveData/scoreboard/todaysScoreboard_00.json"
+            url = f"{NBA_CDN_BASE_URL}/liveData/scoreboard/todaysScoreboard_00.json"
 
             # Pour des dates spécifiques, utiliser l'endpoint schedule
-            schedule_url = "https://cdn.nba.com/static/json/staticData/scheduleLeagueV2_1.json"
+            schedule_url = f"{NBA_CDN_BASE_URL}/staticData/scheduleLeagueV2_1.json"
 
             headers = {
                 'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
@@ -88,7 +92,7 @@ def fetch_weekly_games_http():
     if not games:
         print("   Tentative avec l'endpoint 'today'...")
         try:
-            url = "https://cdn.nba.com/static/json/liveData/scoreboard/todaysScoreboard_00.json"
+            url = f"{NBA_CDN_BASE_URL}/liveData/scoreboard/todaysScoreboard_00.json"
             response = requests.get(url, headers=headers, timeout=10)
 
             if response.ok:
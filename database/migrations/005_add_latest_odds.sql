@@ -0,0 +1,33 @@
+-- Migration: table latest_odds (ligne courante par match/joueur/marché/bookmaker)
+-- Date: 2026-01-15
+-- Alimentée par upsert dans la même transaction que chaque écriture odds_snapshots :
+-- toutes les lectures "ligne actuelle" deviennent des lookups par clé primaire.
+
+CREATE TABLE IF NOT EXISTS latest_odds (
+    game_id VARCHAR(50) NOT NULL,
+    player_id INTEGER NOT NULL REFERENCES player(id) ON DELETE CASCADE,
+    market VARCHAR(50) NOT NULL,
+    bookmaker VARCHAR(50) NOT NULL,
+    line DECIMAL(10,2),
+    price_over DECIMAL(10,2),
+    price_under DECIMAL(10,2),
+    source VARCHAR(30) DEFAULT 'the-odds-api',
+    ingestion_run_id INTEGER,
+    fetched_at TIMESTAMP,          -- dernier changement de la ligne
+    ttl_expire_at TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,  -- dernière confirmation
+    PRIMARY KEY (game_id, player_id, market, bookmaker)
+);
+
+CREATE INDEX IF NOT EXISTS idx_latest_odds_ttl ON latest_odds(ttl_expire_at);
+
+-- Backfill depuis l'historique existant (dernier snapshot par clé)
+INSERT INTO latest_odds (game_id, player_id, market, bookmaker, line, price_over, price_under, source,
+                         ingestion_run_id, fetched_at, ttl_expire_at, updated_at)
+SELECT DISTINCT ON (game_id, player_id, market, bookmaker)
+       game_id, player_id, market, bookmaker, line, price_over, price_under, source,
+       ingestion_run_id, fetched_at, ttl_expire_at, updated_at
+FROM odds_snapshots
+WHERE player_id IS NOT NULL
+ORDER BY game_id, player_id, market, bookmaker, fetched_at DESC
+ON CONFLICT (game_id, player_id, market, bookmaker) DO NOTHING;
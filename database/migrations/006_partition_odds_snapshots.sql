@@ -0,0 +1,115 @@
+-- Migration: partitionnement mensuel de odds_snapshots (RANGE sur fetched_at) + table de compaction
+-- Date: 2026-01-20
+-- Les requêtes récentes (filtre sur fetched_at) ne touchent plus que la partition du mois courant.
+-- Les vieilles partitions sont résumées en open/close/high/low dans odds_snapshot_bars
+-- puis supprimées par data-pipeline/compact_odds_snapshots.py.
+
+BEGIN;
+
+-- ============================================================================
+-- 1. On met l'ancienne table de côté (le sequence des ids est conservé)
+-- ============================================================================
+ALTER TABLE odds_snapshots RENAME TO odds_snapshots_legacy;
+ALTER TABLE odds_snapshots_legacy RENAME CONSTRAINT uq_odds_snapshot TO uq_odds_snapshot_legacy;
+ALTER SEQUENCE odds_snapshots_id_seq OWNED BY NONE;
+
+DROP INDEX IF EXISTS idx_odds_snapshots_game;
+DROP INDEX IF EXISTS idx_odds_snapshots_player;
+DROP INDEX IF EXISTS idx_odds_snapshots_market;
+DROP INDEX IF EXISTS idx_odds_snapshots_bookmaker;
+DROP INDEX IF EXISTS idx_odds_snapshots_ttl;
+
+-- ============================================================================
+-- 2. Table partitionnée (la clé de partition doit faire partie des contraintes uniques)
+-- ============================================================================
+CREATE TABLE odds_snapshots (
+    id INTEGER NOT NULL DEFAULT nextval('odds_snapshots_id_seq'),
+    ingestion_run_id INTEGER REFERENCES ingestion_runs(id) ON DELETE SET NULL,
+    game_id VARCHAR(50) NOT NULL,
+    player_id INTEGER REFERENCES player(id) ON DELETE SET NULL,
+    market VARCHAR(50) NOT NULL,
+    line DECIMAL(10,2),
+    price_over DECIMAL(10,2),
+    price_under DECIMAL(10,2),
+    bookmaker VARCHAR(50) NOT NULL,
+    source VARCHAR(30) DEFAULT 'the-odds-api',
+    fetched_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    ttl_expire_at TIMESTAMP,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, fetched_at),
+    CONSTRAINT uq_odds_snapshot UNIQUE (game_id, player_id, market, bookmaker, fetched_at)
+) PARTITION BY RANGE (fetched_at);
+
+ALTER SEQUENCE odds_snapshots_id_seq OWNED BY odds_snapshots.id;
+
+-- Index composites (propagés à chaque partition)
+CREATE INDEX IF NOT EXISTS idx_odds_snapshots_game_fetched ON odds_snapshots(game_id, fetched_at DESC);
+CREATE INDEX IF NOT EXISTS idx_odds_snapshots_player_market ON odds_snapshots(player_id, market, fetched_at DESC);
+CREATE INDEX IF NOT EXISTS idx_odds_snapshots_ttl ON odds_snapshots(ttl_expire_at);
+
+-- Partition par défaut (filet de sécurité si la partition du mois n'a pas été créée)
+CREATE TABLE IF NOT EXISTS odds_snapshots_default PARTITION OF odds_snapshots DEFAULT;
+
+-- ============================================================================
+-- 3. Création idempotente d'une partition mensuelle : odds_snapshots_yYYYYmMM
+-- ============================================================================
+CREATE OR REPLACE FUNCTION ensure_odds_snapshot_partition(month_start DATE) RETURNS TEXT AS $$
+DECLARE
+    start_ts DATE := date_trunc('month', month_start)::date;
+    end_ts DATE := (date_trunc('month', month_start) + INTERVAL '1 month')::date;
+    part_name TEXT := 'odds_snapshots_y' || to_char(start_ts, 'YYYY') || 'm' || to_char(start_ts, 'MM');
+BEGIN
+    IF to_regclass(part_name) IS NULL THEN
+        EXECUTE format('CREATE TABLE %I PARTITION OF odds_snapshots FOR VALUES FROM (%L) TO (%L)',
+                       part_name, start_ts, end_ts);
+    END IF;
+    RETURN part_name;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Partitions couvrant l'historique existant + le mois prochain
+DO $$
+DECLARE
+    m DATE;
+BEGIN
+    m := date_trunc('month', COALESCE((SELECT MIN(fetched_at) FROM odds_snapshots_legacy), CURRENT_DATE))::date;
+    WHILE m <= (date_trunc('month', CURRENT_DATE) + INTERVAL '1 month')::date LOOP
+        PERFORM ensure_odds_snapshot_partition(m);
+        m := (m + INTERVAL '1 month')::date;
+    END LOOP;
+END $$;
+
+-- ============================================================================
+-- 4. Copie de l'historique puis suppression de l'ancienne table
+-- ============================================================================
+INSERT INTO odds_snapshots (id, ingestion_run_id, game_id, player_id, market, line, price_over, price_under,
+                            bookmaker, source, fetched_at, ttl_expire_at, created_at, updated_at)
+SELECT id, ingestion_run_id, game_id, player_id, market, line, price_over, price_under,
+       bookmaker, source, COALESCE(fetched_at, created_at, CURRENT_TIMESTAMP), ttl_expire_at, created_at, updated_at
+FROM odds_snapshots_legacy;
+
+DROP TABLE odds_snapshots_legacy;
+
+-- ============================================================================
+-- 5. Résumés compactés des vieilles partitions (open/close/high/low)
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS odds_snapshot_bars (
+    game_id VARCHAR(50) NOT NULL,
+    player_id INTEGER NOT NULL,
+    market VARCHAR(50) NOT NULL,
+    bookmaker VARCHAR(50) NOT NULL,
+    period_start DATE NOT NULL,          -- mois de la partition compactée
+    first_fetched_at TIMESTAMP,
+    last_fetched_at TIMESTAMP,
+    samples INTEGER,
+    line_open DECIMAL(10,2), line_close DECIMAL(10,2), line_high DECIMAL(10,2), line_low DECIMAL(10,2),
+    over_open DECIMAL(10,2), over_close DECIMAL(10,2), over_high DECIMAL(10,2), over_low DECIMAL(10,2),
+    under_open DECIMAL(10,2), under_close DECIMAL(10,2), under_high DECIMAL(10,2), under_low DECIMAL(10,2),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (game_id, player_id, market, bookmaker, period_start)
+);
+
+CREATE INDEX IF NOT EXISTS idx_odds_bars_period ON odds_snapshot_bars(period_start);
+
+COMMIT;
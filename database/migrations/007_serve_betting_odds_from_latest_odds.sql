@@ -0,0 +1,13 @@
+-- Migration: betting_odds n'est plus alimentée, les lectures legacy passent par latest_odds
+-- Date: 2026-01-22
+-- Les cotes legacy encore présentes sont recopiées dans latest_odds (si aucune ligne plus récente n'existe).
+
+INSERT INTO latest_odds (game_id, player_id, market, bookmaker, line, price_over, price_under, source,
+                         fetched_at, ttl_expire_at, updated_at)
+SELECT game_id, player_id, market, COALESCE(bookmaker, 'legacy'), line, odds_over, odds_under, 'betting_odds',
+       updated_at, updated_at + INTERVAL '4 hours', updated_at
+FROM betting_odds
+WHERE player_id IS NOT NULL AND game_id IS NOT NULL AND market IS NOT NULL
+ON CONFLICT (game_id, player_id, market, bookmaker) DO NOTHING;
+
+COMMENT ON TABLE betting_odds IS 'Legacy : plus alimentée depuis la migration 007 (voir latest_odds / odds_snapshots)';
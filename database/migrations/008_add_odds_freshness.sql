@@ -0,0 +1,27 @@
+-- Migration: registre de fraîcheur des cotes (1 ligne par match)
+-- Date: 2026-01-24
+-- Upsert dans la même transaction que chaque écriture latest_odds : la planification du scan
+-- et les checks de cache lisent une ligne par match au lieu d'un DISTINCT sur les lignes de cotes.
+
+CREATE TABLE IF NOT EXISTS odds_freshness (
+    game_id VARCHAR(50) PRIMARY KEY,
+    last_fetched_at TIMESTAMP NOT NULL,
+    ttl_expire_at TIMESTAMP,
+    bookmaker_count INTEGER DEFAULT 0,
+    row_count INTEGER DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_odds_freshness_ttl ON odds_freshness(ttl_expire_at);
+
+-- Backfill depuis latest_odds (hors lignes dérivées consensus / best)
+INSERT INTO odds_freshness (game_id, last_fetched_at, ttl_expire_at, bookmaker_count, row_count, updated_at)
+SELECT game_id,
+       MAX(updated_at),
+       MAX(ttl_expire_at),
+       COUNT(DISTINCT bookmaker) FILTER (WHERE source <> 'derived'),
+       COUNT(*),
+       CURRENT_TIMESTAMP
+FROM latest_odds
+GROUP BY game_id
+ON CONFLICT (game_id) DO NOTHING;
@@ -0,0 +1,15 @@
+-- Migration: noms d'outcomes The-Odds-API non reconnus
+-- Date: 2026-01-26
+-- Upsert (+1 par payload) à chaque écriture de cotes : liste des aliases à ajouter dans la table aliases.
+
+CREATE TABLE IF NOT EXISTS unmatched_odds_names (
+    normalized_name VARCHAR(150) PRIMARY KEY,
+    raw_name VARCHAR(150),
+    source VARCHAR(30) DEFAULT 'the-odds-api',
+    seen_count INTEGER DEFAULT 0,
+    first_seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_game_id VARCHAR(50)
+);
+
+CREATE INDEX IF NOT EXISTS idx_unmatched_odds_names_last_seen ON unmatched_odds_names(last_seen_at);
@@ -0,0 +1,40 @@
+-- Migration: ratings DvP et Pace calculés depuis player_game_stats (versionnés)
+-- Date: 2026-01-27
+-- data-pipeline/compute_team_ratings.py écrit une nouvelle version complète puis la passe 'active'
+-- (la précédente devient 'superseded') ; le backend recharge la version active à chaud.
+
+CREATE TABLE IF NOT EXISTS team_rating_versions (
+    id SERIAL PRIMARY KEY,
+    window_games INTEGER NOT NULL,
+    games_count INTEGER DEFAULT 0,
+    status VARCHAR(20) DEFAULT 'building',   -- building | active | superseded
+    computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    activated_at TIMESTAMP,
+    meta JSONB
+);
+
+CREATE INDEX IF NOT EXISTS idx_team_rating_versions_status ON team_rating_versions(status, id);
+
+-- Coefficient de points concédés par poste (1.00 = moyenne de la ligue)
+CREATE TABLE IF NOT EXISTS dvp_ratings (
+    version_id INTEGER NOT NULL REFERENCES team_rating_versions(id) ON DELETE CASCADE,
+    team_code VARCHAR(3) NOT NULL,
+    position VARCHAR(2) NOT NULL,
+    factor DOUBLE PRECISION NOT NULL,
+    allowed_avg DOUBLE PRECISION,
+    samples INTEGER DEFAULT 0,
+    PRIMARY KEY (version_id, team_code, position)
+);
+
+-- Rythme relatif (1.00 = moyenne de la ligue)
+CREATE TABLE IF NOT EXISTS pace_ratings (
+    version_id INTEGER NOT NULL REFERENCES team_rating_versions(id) ON DELETE CASCADE,
+    team_code VARCHAR(3) NOT NULL,
+    factor DOUBLE PRECISION NOT NULL,
+    avg_game_points DOUBLE PRECISION,
+    games INTEGER DEFAULT 0,
+    PRIMARY KEY (version_id, team_code)
+);
+
+-- Accès par match / équipe adverse pour l'agrégation (fenêtre glissante)
+CREATE INDEX IF NOT EXISTS idx_player_game_stats_game ON player_game_stats(game_id);
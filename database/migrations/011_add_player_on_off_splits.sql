@@ -0,0 +1,26 @@
+-- Migration: splits avec / sans coéquipier (redistribution d'usage quand un joueur est absent)
+-- Date: 2026-01-28
+-- Recalculée en entier par data-pipeline/compute_on_off_splits.py (DELETE + INSERT dans une transaction).
+-- Lecture backend : index mémoire (team_code, absent_player_id) -> boosts par joueur.
+
+CREATE TABLE IF NOT EXISTS player_on_off_splits (
+    team_code VARCHAR(3) NOT NULL,
+    player_id INTEGER NOT NULL REFERENCES player(id) ON DELETE CASCADE,
+    absent_player_id INTEGER NOT NULL REFERENCES player(id) ON DELETE CASCADE,
+    games_with INTEGER DEFAULT 0,
+    games_without INTEGER DEFAULT 0,
+    points_with DOUBLE PRECISION,
+    points_without DOUBLE PRECISION,
+    rebounds_with DOUBLE PRECISION,
+    rebounds_without DOUBLE PRECISION,
+    assists_with DOUBLE PRECISION,
+    assists_without DOUBLE PRECISION,
+    -- Multiplicateurs rétrécis vers 1.00 selon games_without
+    points_boost DOUBLE PRECISION DEFAULT 1.0,
+    rebounds_boost DOUBLE PRECISION DEFAULT 1.0,
+    assists_boost DOUBLE PRECISION DEFAULT 1.0,
+    computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (team_code, absent_player_id, player_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_on_off_splits_player ON player_on_off_splits(player_id);
@@ -0,0 +1,8 @@
+-- Migration: facteurs DvP par stat (rebonds, passes, paniers à 3 pts) en plus des points
+-- Date: 2026-01-29
+-- dvp_ratings.factor reste le facteur points ; chaque stat a sa propre colonne (NULL = neutre 1.00).
+-- Remplis par data-pipeline/compute_team_ratings.py, lus par defense_ratings.get_defensive_factor(..., stat).
+
+ALTER TABLE dvp_ratings ADD COLUMN IF NOT EXISTS rebounds_factor DOUBLE PRECISION;
+ALTER TABLE dvp_ratings ADD COLUMN IF NOT EXISTS assists_factor DOUBLE PRECISION;
+ALTER TABLE dvp_ratings ADD COLUMN IF NOT EXISTS three_points_made_factor DOUBLE PRECISION;
@@ -0,0 +1,46 @@
+-- Migration: ensure_odds_snapshot_partition déplace les lignes de la partition DEFAULT
+-- Date: 2026-01-30
+-- Si la partition d'un mois manquait, ses lignes sont tombées dans odds_snapshots_default :
+-- Postgres refuse alors de créer la partition du mois (plage déjà présente dans DEFAULT).
+-- La fonction sort d'abord ces lignes de DEFAULT, crée la partition, puis les réinsère.
+-- data-pipeline/compact_odds_snapshots.py vide ainsi DEFAULT à chaque passage (avant compaction).
+
+BEGIN;
+
+CREATE OR REPLACE FUNCTION ensure_odds_snapshot_partition(month_start DATE) RETURNS TEXT AS $$
+DECLARE
+    start_ts DATE := date_trunc('month', month_start)::date;
+    end_ts DATE := (date_trunc('month', month_start) + INTERVAL '1 month')::date;
+    part_name TEXT := 'odds_snapshots_y' || to_char(start_ts, 'YYYY') || 'm' || to_char(start_ts, 'MM');
+    moved INTEGER := 0;
+BEGIN
+    IF to_regclass(part_name) IS NULL THEN
+        IF to_regclass('odds_snapshots_default') IS NOT NULL THEN
+            -- Bloque les écritures dans DEFAULT jusqu'à la fin de la transaction
+            LOCK TABLE odds_snapshots_default IN SHARE ROW EXCLUSIVE MODE;
+            CREATE TEMP TABLE odds_snapshots_moving (LIKE odds_snapshots);
+            WITH rows_out AS (
+                DELETE FROM odds_snapshots_default
+                WHERE fetched_at >= start_ts AND fetched_at < end_ts
+                RETURNING *
+            )
+            INSERT INTO odds_snapshots_moving SELECT * FROM rows_out;
+            GET DIAGNOSTICS moved = ROW_COUNT;
+        END IF;
+
+        EXECUTE format('CREATE TABLE %I PARTITION OF odds_snapshots FOR VALUES FROM (%L) TO (%L)',
+                       part_name, start_ts, end_ts);
+
+        IF to_regclass('pg_temp.odds_snapshots_moving') IS NOT NULL THEN
+            INSERT INTO odds_snapshots SELECT * FROM odds_snapshots_moving;
+            DROP TABLE odds_snapshots_moving;
+        END IF;
+        IF moved > 0 THEN
+            RAISE NOTICE '% : % ligne(s) déplacée(s) depuis odds_snapshots_default', part_name, moved;
+        END IF;
+    END IF;
+    RETURN part_name;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMIT;
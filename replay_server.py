@@ -0,0 +1,177 @@
+"""
+Serveur local record/replay pour The-Odds-API, stats.nba.com, cdn.nba.com et ESPN.
+
+Permet de lancer des scans, benchmarks et tests de charge hors-ligne.
+
+🎬 Modes
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+- record : proxy vers le vrai service, chaque réponse est sauvegardée en fixture JSON.
+- replay : sert uniquement les fixtures (404 si absente), aucun appel réseau.
+
+Les URLs sont préfixées par l'upstream : /odds/..., /nba-stats/..., /espn-site/...
+(voir backend/upstreams.py). Pour y brancher le projet :
+
+    python replay_server.py --mode replay --latency-ms 80 --error-rate 0.05 --error-status 429
+    export ODDS_API_BASE_URL=http://localhost:8765/odds   (etc., la liste est affichée au démarrage)
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit, parse_qsl, urlencode
+
+import requests
+
+from backend.upstreams import DEFAULT_BASE_URLS, ENV_OVERRIDES
+
+# Paramètres exclus de la clé de fixture (secrets / bruit)
+IGNORED_PARAMS = {"apiKey", "apikey", "api_key"}
+
+# Headers de réponse conservés dans les fixtures (quota The-Odds-API inclus)
+KEPT_HEADERS = {"content-type", "x-requests-remaining", "x-requests-used", "x-requests-last"}
+
+# Headers navigateur envoyés en mode record (stats.nba.com bloque les clients "nus")
+RECORD_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:91.0) Gecko/20100101 Firefox/91.0',
+    'Accept': 'application/json, text/plain, */*',
+    'Referer': 'https://www.nba.com/',
+    'Origin': 'https://www.nba.com',
+}
+
+
+def fixture_path(fixtures_dir: Path, upstream: str, path: str, query: str) -> Path:
+    """Chemin déterministe d'une fixture : <dir>/<upstream>/<path lisible>__<hash>.json"""
+    params = sorted((k, v) for k, v in parse_qsl(query, keep_blank_values=True) if k not in IGNORED_PARAMS)
+    key = f"{upstream}{path}?{urlencode(params)}"
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+    slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", path.strip("/"))[:80] or "root"
+    return fixtures_dir / upstream / f"{slug}__{digest}.json"
+
+
+class ReplayConfig:
+    def __init__(self, mode, fixtures_dir, latency_ms=0, jitter_ms=0, error_rate=0.0, error_status=500):
+        self.mode = mode
+        self.fixtures_dir = Path(fixtures_dir)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.session = requests.Session()
+        self.lock = threading.Lock()
+        self.stats = {"served": 0, "recorded": 0, "missing": 0, "injected_errors": 0}
+
+    def count(self, key):
+        with self.lock:
+            self.stats[key] += 1
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    config: ReplayConfig = None
+
+    def log_message(self, fmt, *args):
+        pass  # logs maison plus bas
+
+    def _send(self, status: int, body: bytes, headers: dict | None = None):
+        self.send_response(status)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: int, payload: dict):
+        self._send(status, json.dumps(payload).encode("utf-8"), {"Content-Type": "application/json"})
+
+    def do_GET(self):
+        cfg = self.config
+        parts = urlsplit(self.path)
+        segments = parts.path.lstrip("/").split("/", 1)
+        upstream = segments[0]
+        path = "/" + (segments[1] if len(segments) > 1 else "")
+
+        if parts.path == "/__stats":
+            return self._send_json(200, cfg.stats)
+        if upstream not in DEFAULT_BASE_URLS:
+            return self._send_json(404, {"error": f"upstream inconnu : {upstream}", "known": list(DEFAULT_BASE_URLS)})
+
+        # Latence simulée
+        delay = cfg.latency_ms + (random.uniform(-cfg.jitter_ms, cfg.jitter_ms) if cfg.jitter_ms else 0)
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+        # Injection d'erreurs (ex: 429 pour tester la rotation de clés)
+        if cfg.error_rate and random.random() < cfg.error_rate:
+            cfg.count("injected_errors")
+            return self._send_json(cfg.error_status, {"error": "injected", "status": cfg.error_status})
+
+        fpath = fixture_path(cfg.fixtures_dir, upstream, path, parts.query)
+
+        if cfg.mode == "record":
+            try:
+                upstream_url = DEFAULT_BASE_URLS[upstream] + path
+                res = cfg.session.get(upstream_url, params=parse_qsl(parts.query, keep_blank_values=True),
+                                      headers=RECORD_HEADERS, timeout=20)
+            except Exception as e:
+                return self._send_json(502, {"error": f"upstream injoignable : {e}"})
+            headers = {k: v for k, v in res.headers.items() if k.lower() in KEPT_HEADERS}
+            fixture = {"status": res.status_code, "headers": headers, "body": res.text,
+                       "request": {"upstream": upstream, "path": path, "recorded_at": time.time()}}
+            fpath.parent.mkdir(parents=True, exist_ok=True)
+            fpath.write_text(json.dumps(fixture), encoding="utf-8")
+            cfg.count("recorded")
+            print(f"💾 {res.status_code} {upstream}{path} -> {fpath.name}")
+            return self._send(res.status_code, res.content, headers)
+
+        if not fpath.exists():
+            cfg.count("missing")
+            print(f"❓ Fixture absente : {upstream}{path}?{parts.query}")
+            return self._send_json(404, {"error": "fixture_not_found", "fixture": str(fpath)})
+
+        fixture = json.loads(fpath.read_text(encoding="utf-8"))
+        cfg.count("served")
+        return self._send(fixture.get("status", 200), fixture.get("body", "").encode("utf-8"),
+                          fixture.get("headers") or {"Content-Type": "application/json"})
+
+
+def run_server(host: str, port: int, config: ReplayConfig):
+    handler = type("BoundReplayHandler", (ReplayHandler,), {"config": config})
+    server = ThreadingHTTPServer((host, port), handler)
+    print(f"🎬 Replay server ({config.mode}) sur http://{host}:{port} — fixtures : {config.fixtures_dir}")
+    print("   Variables à exporter :")
+    for upstream, env in ENV_OVERRIDES.items():
+        print(f"   export {env}=http://{host}:{port}/{upstream}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"📊 {config.stats}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record/replay local des APIs externes de Jimmy.AI")
+    parser.add_argument("--mode", choices=["record", "replay"], default="replay")
+    parser.add_argument("--fixtures", default="fixtures/replay")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=500)
+    args = parser.parse_args()
+
+    run_server(args.host, args.port, ReplayConfig(
+        mode=args.mode,
+        fixtures_dir=args.fixtures,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+    ))
@@ -0,0 +1,48 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+# Racine du projet sur le PYTHONPATH pour `from backend...` (même principe que data-pipeline/pipeline_bootstrap.py)
+ROOT_DIR = Path(__file__).resolve().parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+
+@pytest.fixture
+def game_logs():
+    """
+    Fabrique de logs synthétiques player_game_stats (une ligne par joueur et par match).
+
+    Les caches de distributions / corrélations / simulations sont globaux au module :
+    chaque fichier de tests utilise ses propres player_ids pour ne pas relire les lois d'un autre.
+
+    Args (de la fabrique):
+        linked_assists: joueurs dont les passes suivent les points (corrélation positive)
+    """
+    def make(player_ids, n_games=60, seed=0, linked_assists=()):
+        rng = np.random.default_rng(seed)
+        rows = []
+        for g in range(n_games):
+            for rank, pid in enumerate(player_ids, start=1):
+                pts = int(max(0, rng.normal(10 + rank * 4, 5)))
+                ast = int(rng.poisson(1) + pts // 4) if pid in linked_assists else int(rng.poisson(3))
+                rows.append({"id": len(rows) + 1, "player_id": pid, "game_id": f"{g:04d}", "points": pts,
+                             "rebounds": int(rng.poisson(5)), "assists": ast,
+                             "three_points_made": int(rng.poisson(1.5)), "steals": int(rng.poisson(1)),
+                             "blocks": int(rng.poisson(0.5))})
+        return pd.DataFrame(rows)
+    return make
+
+
+@pytest.fixture
+def stats_engine(game_logs):
+    """Fabrique de bases SQLite en mémoire dont la table player_game_stats contient game_logs(...)."""
+    def make(player_ids, **kwargs):
+        engine = create_engine("sqlite://")
+        game_logs(player_ids, **kwargs).to_sql("player_game_stats", engine, index=False)
+        return engine
+    return make
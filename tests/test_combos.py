@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+
+from backend.distributions import COMBO_STATS, add_combo_columns, combo_columns_sql, fit_distributions
+from backend.game_context import GameContext
+from backend.simulation import simulate_game
+
+PLAYER_IDS = [101, 102, 103]
+
+
+def test_add_combo_columns_is_sum_of_components(game_logs):
+    df = add_combo_columns(game_logs(PLAYER_IDS))
+    for combo, parts in COMBO_STATS.items():
+        assert (df[combo] == df[list(parts)].sum(axis=1)).all()
+
+    # Composante manquante -> combo manquant (pas de somme partielle)
+    df = add_combo_columns(pd.DataFrame({"points": [20.0, np.nan], "rebounds": [5.0, 7.0], "assists": [3.0, 4.0]}))
+    assert df["points_rebounds_assists"].tolist()[0] == 28.0
+    assert np.isnan(df["points_rebounds_assists"].iloc[1]) and np.isnan(df["points_assists"].iloc[1])
+    assert df["rebounds_assists"].tolist() == [8.0, 11.0]
+
+
+def test_sql_combo_columns_match_pandas(game_logs, stats_engine):
+    engine = stats_engine(PLAYER_IDS)
+    df = game_logs(PLAYER_IDS)
+    sql = pd.read_sql(f"SELECT id, {combo_columns_sql()} FROM player_game_stats ORDER BY id", engine)
+    expected = add_combo_columns(df).sort_values("id").reset_index(drop=True)
+    for combo in COMBO_STATS:
+        assert sql[combo].tolist() == expected[combo].tolist()
+
+
+def test_combo_fit_mean_is_sum_of_component_means(game_logs):
+    fits = fit_distributions(add_combo_columns(game_logs(PLAYER_IDS)))
+    for pid in PLAYER_IDS:
+        for combo, parts in COMBO_STATS.items():
+            assert abs(fits[(pid, combo)]["mean"] - sum(fits[(pid, s)]["mean"] for s in parts)) < 1e-9
+
+
+def test_combo_projection_is_sum_of_contextualized_components():
+    ctx = GameContext("PHI", "BOS", [{"id": 1, "full_name": "Joel Embiid", "position": "C", "injury_status": "OUT"},
+                                     {"id": 2, "full_name": "Tyrese Maxey", "position": "PG"}], [])
+    base = {"points": {"base_projection": 24.0, "consistency": 5.0},
+            "rebounds": {"base_projection": 4.0, "consistency": 2.0},
+            "assists": {"base_projection": 6.0, "consistency": 2.0}}
+    base.update({combo: {"base_projection": sum(base[s]["base_projection"] for s in parts), "consistency": 6.0}
+                 for combo, parts in COMBO_STATS.items()})
+    proj = ctx.apply(base, "PHI", "PG", "Tyrese Maxey", 2)
+    for combo, parts in COMBO_STATS.items():
+        parts_sum = sum(proj[s]["projection"] for s in parts)
+        # Les projections sont arrondies à 0.1 par stat
+        assert abs(proj[combo]["projection"] - parts_sum) <= 0.05 * (len(parts) + 1)
+
+
+def test_simulated_combo_samples_are_sum_of_component_columns(stats_engine):
+    sim = simulate_game(stats_engine(PLAYER_IDS), "G1", PLAYER_IDS, draws=2000, seed=1)
+    for pid in PLAYER_IDS:
+        for combo, parts in COMBO_STATS.items():
+            expected = sum(sim.samples[:, sim.index[(pid, s)]].astype(np.int32) for s in parts)
+            assert np.array_equal(sim.samples_for(pid, combo), expected)
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from backend.distributions import (NORMAL, POISSON, NEG_BINOMIAL, _prob_at_least, fit_distributions,
+                                   milestone_probabilities, probability_over, probability_under)
+from backend.probability import calculate_milestone_probabilities_batch, milestone_grid
+
+
+def _params(family, mean, std=None, r=None):
+    n = len(mean)
+    return (np.full(n, family, dtype=np.int8), np.asarray(mean, dtype=float),
+            np.asarray(std if std is not None else np.zeros(n), dtype=float),
+            np.asarray(r if r is not None else np.zeros(n), dtype=float))
+
+
+def test_poisson_matches_scipy():
+    rng = np.random.default_rng(3)
+    mean = rng.uniform(0.2, 12.0, 300)
+    k = rng.integers(0, 20, 300)
+    family, mean, std, r = _params(POISSON, mean)
+    expected = np.where(k <= 0, 1.0, stats.poisson.sf(k - 1, mean))
+    np.testing.assert_allclose(_prob_at_least(family, mean, std, r, k), expected, rtol=1e-9, atol=1e-12)
+
+
+def test_negative_binomial_matches_scipy():
+    rng = np.random.default_rng(3)
+    mean = rng.uniform(0.5, 12.0, 300)
+    r = rng.uniform(0.5, 30.0, 300)
+    k = rng.integers(0, 25, 300)
+    family, mean, std, r = _params(NEG_BINOMIAL, mean, r=r)
+    expected = np.where(k <= 0, 1.0, stats.nbinom.sf(k - 1, r, r / (r + mean)))
+    np.testing.assert_allclose(_prob_at_least(family, mean, std, r, k), expected, rtol=1e-9, atol=1e-12)
+
+
+def test_normal_uses_continuity_correction_and_broadcasts_grid():
+    family, mean, std, r = _params(NORMAL, [20.0, 5.0], std=[5.0, 0.0])
+    grid = np.array([[15, 20, 25], [4, 5, 6]])
+    out = _prob_at_least(family, mean, std, r, grid)
+    np.testing.assert_allclose(out[0], stats.norm.sf(grid[0] - 0.5, 20.0, 5.0))
+    # Écart-type nul : loi dégénérée en la moyenne
+    np.testing.assert_array_equal(out[1], [1.0, 1.0, 0.0])
+
+
+def test_over_under_and_push_sum_to_one():
+    fits = [{"family": POISSON, "mean": 4.2, "std": 2.0, "r": np.nan},
+            {"family": NEG_BINOMIAL, "mean": 6.0, "std": 3.5, "r": 4.0}]
+    for line in (3.5, 4.0):
+        over = probability_over(fits, [line, line])
+        under = probability_under(fits, [line, line])
+        push = np.array([stats.poisson.pmf(line, 4.2), stats.nbinom.pmf(line, 4.0, 4.0 / 10.0)]) \
+            if float(line).is_integer() else 0.0
+        np.testing.assert_allclose(over + under + push, 1.0)
+
+
+def test_fit_distributions_picks_family_by_dispersion():
+    rng = np.random.default_rng(3)
+    n = 400
+    df = pd.DataFrame({
+        "player_id": np.repeat([1, 2], n),
+        "points": rng.normal(25, 6, 2 * n),
+        "assists": np.concatenate([rng.poisson(4.0, n), rng.negative_binomial(2, 2 / 8, n)]),
+    })
+    fits = fit_distributions(df, ["points", "assists"])
+    assert fits[(1, "points")]["family"] == NORMAL
+    assert fits[(1, "assists")]["family"] == POISSON
+    nb = fits[(2, "assists")]
+    assert nb["family"] == NEG_BINOMIAL
+    assert abs(nb["r"] * (1 - nb["p"]) / nb["p"] - nb["mean"]) < 1e-9
+
+
+def test_milestones_use_fitted_law_centred_on_projection():
+    fits = [{"family": POISSON, "mean": 3.0, "std": 1.7, "r": np.nan},
+            {"family": NORMAL, "mean": 22.0, "std": 6.0, "r": np.nan}]
+    projections, stat_types = [4.5, 27.0], ["assists", "points"]
+    batch = milestone_probabilities(fits, projections, stat_types)
+
+    values, valid = milestone_grid(projections, stat_types)
+    np.testing.assert_array_equal(batch["values"], values)
+    np.testing.assert_array_equal(batch["valid"], valid)
+    poisson = np.round(stats.poisson.sf(values[0] - 1, 4.5) * 100, 1)
+    np.testing.assert_allclose(batch["probabilities"][0][valid[0]], poisson[valid[0]])
+    # Normale : même résultat que la version historique avec l'écart-type ajusté
+    normal = calculate_milestone_probabilities_batch([27.0], [6.0], ["points"])["probabilities"][0]
+    np.testing.assert_allclose(batch["probabilities"][1][valid[1]], normal[valid[1]])
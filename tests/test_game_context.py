@@ -0,0 +1,60 @@
+from backend.game_context import GameContext, what_if_projections
+
+PHI = [{"id": 1, "full_name": "Joel Embiid", "position": "C", "injury_status": "HEALTHY"},
+       {"id": 2, "full_name": "Tyrese Maxey", "position": "PG", "injury_status": "HEALTHY"}]
+BOS = [{"id": 3, "full_name": "Kristaps Porzingis", "position": "C", "injury_status": "HEALTHY"}]
+
+
+def _base(points, rebounds, assists):
+    return {"points": {"base_projection": points, "consistency": 5.0},
+            "rebounds": {"base_projection": rebounds, "consistency": 2.0},
+            "assists": {"base_projection": assists, "consistency": 2.0},
+            "points_rebounds_assists": {"base_projection": points + rebounds + assists, "consistency": 7.0}}
+
+
+BASES = {1: _base(25.0, 10.0, 4.0), 2: _base(24.0, 4.0, 6.0), 3: _base(18.0, 7.0, 2.0)}
+MARKETS = ["points", "rebounds", "assists", "points_rebounds_assists"]
+
+
+def _by_player(rows):
+    return {(p_after["id"], stat): (before["projection"], after["projection"])
+            for _, p_after, stat, before, after in rows}
+
+
+def test_what_if_out_player_projects_zero():
+    base_ctx = GameContext("PHI", "BOS", PHI, BOS, game_id="g1")
+    ctx = base_ctx.with_statuses({"Joel Embiid": "OUT"})
+    rows = _by_player(what_if_projections(base_ctx, ctx, BASES, MARKETS))
+
+    for stat in MARKETS:
+        before, after = rows[(1, stat)]
+        assert before > 0 and after == 0.0
+    # Coéquipier : boost d'usage ; adversaire : pivot défensif absent -> bonus
+    assert rows[(2, "points")][1] > rows[(2, "points")][0]
+    assert rows[(3, "rebounds")][1] > rows[(3, "rebounds")][0]
+    assert ctx.affected_teams == {"PHI"}
+
+
+def test_what_if_back_to_healthy_restores_projection():
+    out_ctx = GameContext("PHI", "BOS", [{**PHI[0], "injury_status": "OUT"}, PHI[1]], BOS, game_id="g1")
+    ctx = out_ctx.with_statuses({1: "HEALTHY"})
+    rows = _by_player(what_if_projections(out_ctx, ctx, BASES, MARKETS))
+    assert rows[(1, "points")][0] == 0.0
+    assert rows[(1, "points")][1] == ctx.apply(BASES[1], "PHI", "C", "Joel Embiid", 1)["points"]["projection"]
+
+
+def test_what_if_without_change_has_no_delta():
+    base_ctx = GameContext("PHI", "BOS", PHI, BOS, game_id="g1")
+    ctx = base_ctx.with_statuses({"Joel Embiid": "healthy"})
+    assert not ctx.affected_teams
+    assert all(b == a for b, a in _by_player(what_if_projections(base_ctx, ctx, BASES, MARKETS)).values())
+
+
+
+def test_summary_exposes_active_ratings_version(monkeypatch):
+    from backend import defense_ratings
+    monkeypatch.setitem(defense_ratings._ACTIVE_RATINGS, "version", 7)
+    base_ctx = GameContext("PHI", "BOS", PHI, BOS, game_id="g1")
+    monkeypatch.setitem(defense_ratings._ACTIVE_RATINGS, "version", 8)
+    # Le what-if garde la version du scan qui a construit le contexte
+    assert base_ctx.with_statuses({"Joel Embiid": "OUT"}).summary()["ratings_version"] == 7
@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from backend import models
+from backend.betting_service import BettingOddsProvider
+
+
+class FakeSession:
+    """Session HTTP factice : quota restant par clé, renvoyé dans les headers x-requests-*."""
+
+    def __init__(self, remaining):
+        self.remaining = remaining
+        self.calls = []
+
+    def get(self, url, params=None, timeout=None):
+        key = params["apiKey"]
+        self.calls.append((url, key))
+        return SimpleNamespace(status_code=200, json=lambda: [],
+                               headers={"x-requests-remaining": str(self.remaining[key]), "x-requests-used": "0"})
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    monkeypatch.setenv("THE_ODDS_API_KEY", "key1,key2")
+    provider = BettingOddsProvider()
+    provider.session = FakeSession({"key1": 4, "key2": 2})
+    return provider
+
+
+def _game(game_id, hours_to_tip):
+    tip = datetime.utcnow() + timedelta(hours=hours_to_tip)
+    return SimpleNamespace(nba_game_id=game_id, game_date=tip.date(), game_time=tip.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                           home_team_code="BOS", away_team_code="PHI")
+
+
+def test_fresh_provider_probes_budgets_before_planning(provider):
+    # 3 marchés par appel : (4 + 2) // 3 = 2 matchs possibles
+    games = [_game("far", 40), _game("soon", 1), _game("mid", 10)]
+    planned, deferred = provider.planner.plan(games, {})
+    assert [g.nba_game_id for g in planned] == ["soon", "mid"]
+    assert [g.nba_game_id for g in deferred] == ["far"]
+    assert sorted(key for _, key in provider.session.calls) == ["key1", "key2"]
+
+    # Budgets connus : pas de nouvel appel
+    provider.planner.plan(games, {})
+    assert len(provider.session.calls) == 2
+
+
+def test_single_game_path_respects_budget(provider):
+    provider.session.remaining = {"key1": 1, "key2": 1}
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        provider.get_event_id = lambda *a: pytest.fail("quota épuisé : aucun appel /odds attendu")
+        assert provider.update_odds_for_game(db, "G1", "BOS", "PHI", ttl_hours=4, game=_game("G1", 2)) is False
@@ -0,0 +1,80 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from backend import models
+from backend.betting_service import BettingOddsProvider, BEST_PRICE_BOOKMAKER, CONSENSUS_BOOKMAKER
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add_all([models.Player(id=1, full_name="Luka Dončić"),
+                         models.Player(id=2, full_name="Jaren Jackson Jr.")])
+        session.commit()
+        yield session
+
+
+def _outcomes(name, point, over, under):
+    return [{"name": "Over", "description": name, "point": point, "price": over},
+            {"name": "Under", "description": name, "point": point, "price": under}]
+
+
+def _payload(luka_fanduel_line=30.5):
+    return {"bookmakers": [
+        {"title": "FanDuel", "markets": [{"key": "player_points", "outcomes":
+            _outcomes("Luka Doncic", luka_fanduel_line, 1.9, 1.9) + _outcomes("Jaren Jackson", 18.5, 1.8, 2.0)
+            + _outcomes("Nobody Here", 5.5, 1.8, 1.9)}]},
+        {"title": "DraftKings", "markets": [{"key": "player_points", "outcomes":
+            _outcomes("Luka Doncic", 30.5, 1.95, 1.85)}]},
+    ]}
+
+
+def _store(provider, db, payload):
+    stats = {}
+    assert provider.store_odds_snapshots(db, "G1", payload, ttl_hours=4, stats=stats)
+    return stats
+
+
+def test_store_odds_snapshots_writes_only_deltas(db):
+    provider = BettingOddsProvider()
+
+    # 3 lignes bookmakers (Luka x2, JJJ x1) + consensus et meilleure cote pour 2 joueurs
+    assert _store(provider, db, _payload()) == {"inserted": 7, "unchanged": 0}
+    assert db.query(models.OddsSnapshot).count() == 7
+    first_fetch = {(r.player_id, r.bookmaker): r.fetched_at for r in db.query(models.LatestOdds)}
+
+    # Payload identique : aucune ligne d'historique, fetched_at conservé dans latest_odds
+    assert _store(provider, db, _payload()) == {"inserted": 0, "unchanged": 7}
+    assert db.query(models.OddsSnapshot).count() == 7
+    assert {(r.player_id, r.bookmaker): r.fetched_at for r in db.query(models.LatestOdds)} == first_fetch
+
+    # FanDuel bouge Luka : sa ligne + le consensus et la meilleure cote de Luka changent, JJJ non
+    assert _store(provider, db, _payload(luka_fanduel_line=31.5)) == {"inserted": 3, "unchanged": 4}
+    changed = {(r.player_id, r.bookmaker) for r in db.query(models.OddsSnapshot)
+               .filter(models.OddsSnapshot.fetched_at > max(first_fetch.values()))}
+    assert changed == {(1, "FanDuel"), (1, CONSENSUS_BOOKMAKER), (1, BEST_PRICE_BOOKMAKER)}
+    assert db.query(models.LatestOdds).count() == 7
+
+    freshness = db.get(models.OddsFreshness, "G1")
+    assert (freshness.bookmaker_count, freshness.row_count) == (2, 7)
+    assert [u.normalized_name for u in db.query(models.UnmatchedOddsName)] == ["nobody here"]
+
+
+def test_unmatched_name_resolves_once_player_is_added(db):
+    provider = BettingOddsProvider()
+    _store(provider, db, _payload())
+    assert [u["normalized_name"] for u in provider.get_unmatched_names(db)] == ["nobody here"]
+
+    # Joueur inséré (roster sync) : l'index est reconstruit sans attendre le TTL, cache des ratés compris
+    db.add(models.Player(id=3, full_name="Nobody Here"))
+    db.commit()
+    assert provider.get_unmatched_names(db) == []
+    assert provider.get_player_index(db).match("Nobody Here") == 3
+
+    db.add(models.Alias(entity_type="player", entity_id=2, source="manual", alias="Triple J",
+                        normalized_alias="triple j"))
+    db.commit()
+    assert provider.get_player_index(db).match("Triple J") == 2
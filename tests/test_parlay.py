@@ -0,0 +1,67 @@
+import numpy as np
+
+from backend.parlay import ParlayPricer, optimize_parlays, max_feasible_legs
+
+
+def _leg(i, p, odds, game=None):
+    return {"player_id": i, "market": "points", "bet_type": "Over", "game_id": game or f"g{i}",
+            "hit_probability": p, "odds": odds}
+
+
+# EV individuelles bien séparées : la meilleure paire est toujours {0, 1}
+LEGS = [_leg(0, 0.60, 2.2), _leg(1, 0.55, 2.3), _leg(2, 0.50, 2.1),
+        _leg(3, 0.50, 1.9), _leg(4, 0.45, 2.0), _leg(5, 0.40, 2.2)]
+
+
+def _best_pair(legs, beam_width):
+    pricer = ParlayPricer(legs, engine=None)
+    best = optimize_parlays(pricer, max_legs=2, min_legs=2, objective="ev", beam_width=beam_width, top_n=1)[0]
+    return {legs[i]["player_id"] for i in best["legs"]}
+
+
+def test_top_parlay_does_not_depend_on_leg_order():
+    rng = np.random.default_rng(0)
+    for _ in range(10):
+        shuffled = [LEGS[i] for i in rng.permutation(len(LEGS))]
+        # Faisceau de 1 : le meilleur leg doit pouvoir s'étendre même s'il arrive en dernier
+        assert _best_pair(shuffled, beam_width=1) == {0, 1}
+
+
+def test_parlays_are_deduplicated_as_sets():
+    pricer = ParlayPricer(LEGS, engine=None)
+    results = optimize_parlays(pricer, max_legs=3, min_legs=2, objective="ev", top_n=20)
+    combos = [tuple(sorted(r["legs"])) for r in results]
+    assert len(combos) == len(set(combos))
+
+
+def test_max_feasible_legs_single_game():
+    legs = [_leg(i, 0.5, 2.0, game="g0") for i in range(4)]
+    assert max_feasible_legs(legs, max_legs_per_game=2) == 2
+    # Deux côtés du même joueur-marché ne comptent qu'une fois
+    assert max_feasible_legs([_leg(0, 0.5, 2.0), {**_leg(0, 0.5, 2.0), "bet_type": "Under"}], 2) == 1
+    pricer = ParlayPricer(legs, engine=None)
+    assert optimize_parlays(pricer, max_legs=3, min_legs=3, max_legs_per_game=2) == []
+    assert len(optimize_parlays(pricer, max_legs=2, min_legs=2, max_legs_per_game=2)[0]["legs"]) == 2
+
+
+def test_independent_legs_price_as_product():
+    pricer = ParlayPricer(LEGS[:3], engine=None, draws=200_000, seed=1)
+    res = pricer.price_one([0, 1, 2])
+    assert abs(res["independent_probability"] - 0.60 * 0.55 * 0.50) < 1e-12
+    assert abs(res["joint_probability"] - res["independent_probability"]) < 0.005
+    assert abs(res["total_odds"] - 2.2 * 2.3 * 2.1) < 1e-9
+    assert abs(res["ev"] - (res["joint_probability"] * res["total_odds"] - 1)) < 1e-12
+
+
+def test_same_game_correlation_lifts_joint_probability(stats_engine):
+    engine = stats_engine([301], linked_assists=(301,))
+    over = {"player_id": 301, "game_id": "G1", "bet_type": "Over", "hit_probability": 0.5, "odds": 1.9}
+    legs = [{**over, "market": "points"}, {**over, "market": "assists"},
+            {**over, "market": "assists", "bet_type": "Under"}]
+    pricer = ParlayPricer(legs, engine=engine, seed=2)
+    assert pricer.correlation[0, 1] > 0.3 and pricer.correlation[0, 2] < -0.3
+    assert pricer.price_one([0, 1])["correlation_lift"] > 1.1
+    assert pricer.price_one([0, 2])["correlation_lift"] < 0.9
+    # Matchs différents : pas de corrélation
+    other_game = ParlayPricer([legs[0], {**legs[1], "game_id": "G2"}], engine=engine)
+    assert np.allclose(other_game.correlation, np.eye(2))
@@ -0,0 +1,32 @@
+import numpy as np
+
+from backend.probability import (MILESTONE_GRIDS, calculate_milestone_probabilities,
+                                 calculate_milestone_probabilities_batch, milestone_batch_to_lists)
+
+STAT_TYPES = ["points", "rebounds", "assists", "three_points_made", "steals", *MILESTONE_GRIDS]
+
+
+def test_batch_milestones_match_scalar_on_random_inputs():
+    rng = np.random.default_rng(7)
+    n = 2000
+    projections = rng.uniform(0.0, 50.0, n).round(1)
+    std_devs = list(rng.uniform(0.0, 12.0, n))
+    # Cas limites de la version scalaire : écart-type nul, absent ou NaN
+    for i in range(0, n, 10):
+        std_devs[i] = 0.0
+    for i in range(3, n, 17):
+        std_devs[i] = None
+    for i in range(5, n, 23):
+        std_devs[i] = float("nan")
+    stat_types = list(rng.choice(STAT_TYPES, n))
+
+    batch = milestone_batch_to_lists(calculate_milestone_probabilities_batch(projections, std_devs, stat_types))
+    for i in range(n):
+        assert batch[i] == calculate_milestone_probabilities(projections[i], std_devs[i], stat_types[i]), i
+
+
+def test_batch_milestones_nan_rows_have_no_valid_cells():
+    res = calculate_milestone_probabilities_batch([20.0, 20.0], [float("nan"), 5.0], ["points", "points"])
+    assert not res["valid"][0].any()
+    assert np.isnan(res["probabilities"][0]).all()
+    assert res["valid"][1].any()
@@ -0,0 +1,36 @@
+import numpy as np
+
+from backend.scoring import calculate_confidence_score, calculate_confidence_scores, TopKPicks
+
+
+def test_batch_confidence_matches_scalar_on_random_inputs():
+    rng = np.random.default_rng(11)
+    n = 5000
+    projections = rng.uniform(0.0, 40.0, n).round(1)
+    lines = rng.uniform(-1.0, 40.0, n).round(1)
+    consistency = rng.uniform(0.0, 12.0, n).round(2)
+    recent = rng.uniform(0.0, 40.0, n).round(1)
+    recent[::9] = 0.0
+    def_factor = rng.choice([0.85, 0.92, 0.95, 1.0, 1.05, 1.08, 1.15], n)
+    spread = rng.uniform(-20.0, 20.0, n).round(1)
+
+    scores, tags = calculate_confidence_scores(projections, lines, consistency=consistency, recent_avg=recent,
+                                               defensive_factor=def_factor, game_spread=spread)
+    for i in range(n):
+        data = {"projection": projections[i], "consistency": consistency[i], "recent_avg": recent[i],
+                "defensive_factor": def_factor[i]}
+        score, tag = calculate_confidence_score(data, lines[i], game_spread=spread[i])
+        assert (scores[i], tags[i]) == (score, tag), i
+
+
+def test_batch_confidence_defaults_match_scalar_defaults():
+    scores, tags = calculate_confidence_scores([25.0, 8.0], [20.5, 0])
+    assert (scores[0], tags[0]) == calculate_confidence_score({"projection": 25.0}, 20.5)
+    assert (scores[1], tags[1]) == (0.0, "N/A")
+
+
+def test_top_k_keeps_best_picks_in_order():
+    top = TopKPicks(k=3)
+    top.extend({"ev": ev, "id": i} for i, ev in enumerate([0.1, 0.5, -0.2, 0.3, 0.5, 0.05]))
+    assert [p["id"] for p in top.sorted()] == [1, 4, 3]
+    assert top.seen == 6
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.simulation import estimate_correlation, nearest_correlation, simulate_game
+
+PLAYER_IDS = [201, 202, 203, 204]
+
+
+@pytest.fixture
+def engine(stats_engine):
+    """Les passes du joueur 201 suivent ses points (corrélation positive)."""
+    return stats_engine(PLAYER_IDS, linked_assists=(201,))
+
+
+def test_simulated_means_follow_projections(engine):
+    projections = {(202, "points"): 30.0, (203, "rebounds"): 12.0, (204, "assists"): 1.0}
+    sim = simulate_game(engine, "G1", PLAYER_IDS, projections=projections, draws=20000, seed=3)
+    for (pid, stat), projection in projections.items():
+        assert abs(sim.samples_for(pid, stat).mean() - projection) < 0.05 * projection + 0.1
+
+
+def test_missing_projection_falls_back_to_fitted_mean(engine):
+    base = simulate_game(engine, "G1", PLAYER_IDS, draws=5000, seed=5)
+    sim = simulate_game(engine, "G1", PLAYER_IDS, projections={(201, "points"): None, (202, "points"): float("nan")},
+                        draws=5000, seed=5)
+    assert np.array_equal(sim.samples, base.samples)
+    assert not np.isnan(sim.means).any()
+
+
+def test_simulation_keeps_historical_correlation(engine):
+    sim = simulate_game(engine, "G1", PLAYER_IDS, draws=20000, seed=4)
+    same_player = np.corrcoef(sim.samples_for(201, "points"), sim.samples_for(201, "assists"))[0, 1]
+    other_players = np.corrcoef(sim.samples_for(202, "points"), sim.samples_for(203, "points"))[0, 1]
+    assert same_player > 0.4
+    assert abs(other_players) < 0.1
+
+
+def test_simulation_is_reproducible_with_seed(engine):
+    a = simulate_game(engine, "G1", PLAYER_IDS, draws=1000, seed=7)
+    b = simulate_game(engine, "G1", PLAYER_IDS, draws=1000, seed=7)
+    assert np.array_equal(a.samples, b.samples)
+    assert simulate_game(engine, "G1", [999], draws=1000, seed=7) is None
+
+
+def test_nearest_correlation_is_valid():
+    corr = np.array([[1.0, 0.9, -0.9], [0.9, 1.0, 0.9], [-0.9, 0.9, 1.0]])  # non semi-définie positive
+    fixed = nearest_correlation(corr)
+    assert np.linalg.eigvalsh(fixed).min() > 0
+    assert np.allclose(np.diag(fixed), 1.0) and np.allclose(fixed, fixed.T)
+    np.linalg.cholesky(fixed)
+
+
+def test_estimate_correlation_ignores_thin_pairs():
+    logs = pd.DataFrame({"player_id": [1, 2, 1, 2], "game_id": ["a", "a", "b", "b"],
+                         "points": [10, 20, 30, 40], "rebounds": [1, 2, 3, 4], "assists": [0, 0, 1, 1]})
+    # 2 matchs communs seulement : pas assez pour estimer -> indépendance
+    assert np.allclose(estimate_correlation(logs, [(1, "points"), (2, "points")]), np.eye(2))